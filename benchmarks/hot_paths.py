@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for pyPost's in-process hot paths.
+
+Times database queries and updates at realistic row counts, environment
+substitution with large environments, response formatting of large JSON
+and XML bodies and syntax highlighting of large documents, all on
+generated fixtures. Each run is appended to a JSON Lines history file and
+compared with the run before it, so numbers can be taken before and after
+an optimization.
+
+    python benchmarks/hot_paths.py
+    python benchmarks/hot_paths.py --only format --sizes 1,10,100
+    python benchmarks/hot_paths.py --history results.jsonl --max-regression 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from results import append_result, last_result, run_metadata  # noqa: E402
+
+MB = 1024 * 1024
+GROUPS = ('database', 'substitution', 'format', 'highlight')
+
+
+def measure(function: Callable[[], object], repeat: int) -> Dict:
+    """Fastest and median wall time of repeated calls, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3)}
+
+
+def json_records(size: int) -> str:
+    """A JSON array of user-like records of about size bytes, without whitespace"""
+    records = []
+    length = 2
+    index = 0
+    while length < size:
+        record = json.dumps({
+            'id': index, 'name': f"User {index}", 'email': f"user{index}@example.com",
+            'active': index % 3 != 0, 'score': index * 1.5, 'tags': ['alpha', 'beta'][:index % 3],
+            'address': {'street': f"{index} Main St", 'city': "Springfield", 'zip': f"{index % 99999:05d}"},
+        }, separators=(',', ':'))
+        records.append(record)
+        length += len(record) + 1
+        index += 1
+    return '[' + ','.join(records) + ']'
+
+
+def xml_records(size: int) -> str:
+    """An XML document of user-like elements of about size bytes"""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><users>']
+    length = len(parts[0])
+    index = 0
+    while length < size:
+        part = (f'<user id="{index}" active="{str(index % 3 != 0).lower()}"><name>User {index}</name>'
+                f'<email>user{index}@example.com</email><!-- record {index} -->'
+                f'<address city="Springfield"><street>{index} Main St</street></address></user>')
+        parts.append(part)
+        length += len(part)
+        index += 1
+    parts.append('</users>')
+    return ''.join(parts)
+
+
+def bench_database(rows: List[int], repeat: int) -> Iterator[tuple]:
+    """execute_update and execute_query on a history table of each row count"""
+    from database import DatabaseManager
+
+    body = json_records(2048).encode('utf-8')
+    with tempfile.TemporaryDirectory() as directory:
+        for count in rows:
+            db_manager = DatabaseManager(os.path.join(directory, f"bench_{count}.db"))
+            insert = ("INSERT INTO history (method, url, request_data, response_data, response_body, "
+                      "status_code, response_time) VALUES (?, ?, ?, ?, ?, ?, ?)")
+            start = time.perf_counter()
+            for index in range(count):
+                db_manager.execute_update(insert, (
+                    'GET', f"https://api.example.com/users/{index}",
+                    json.dumps({'method': 'GET', 'headers': {'Accept': 'application/json'}}),
+                    json.dumps({'status_code': 200, 'headers': {'Content-Type': 'application/json'}}),
+                    body, 200, 42,
+                ))
+            per_update = (time.perf_counter() - start) * 1000 / count
+            yield f"database.execute_update.{count}", {'per_call_ms': round(per_update, 3)}
+            yield f"database.execute_query.recent.{count}", measure(lambda: db_manager.execute_query(
+                "SELECT id, method, url, status_code, created_at FROM history ORDER BY created_at DESC LIMIT 200"
+            ), repeat)
+            yield f"database.execute_query.all.{count}", measure(lambda: db_manager.execute_query(
+                "SELECT id, method, url, status_code, response_time, created_at FROM history"
+            ), repeat)
+            yield f"database.execute_query.by_id.{count}", measure(lambda: db_manager.execute_query(
+                "SELECT * FROM history WHERE id = ?", (count // 2,)
+            ), repeat)
+
+
+def bench_substitution(variables: List[int], repeat: int) -> Iterator[tuple]:
+    """substitute_text over a 64 KB body with environments of each size"""
+    from request_model import substitute_text, substitutions_for
+
+    for count in variables:
+        substitutions = substitutions_for({f"var_{index}": f"value-{index}" for index in range(count)})
+        # One placeholder per line, cycling through the environment
+        body = '\n'.join(f'"field_{line}": "{{{{var_{line % count}}}}}",' for line in range(2048))
+        yield f"substitution.{count}_variables", measure(lambda: substitute_text(body, substitutions), repeat)
+
+
+def bench_format(sizes: List[float], repeat: int) -> Iterator[tuple]:
+    """format_body on JSON and XML bodies of each size in MB"""
+    from response_formatter import format_body
+
+    for size in sizes:
+        label = f"{size:g}MB"
+        text = json_records(int(size * MB))
+        yield f"format.json.{label}", measure(lambda: format_body(text, 'application/json'), repeat)
+        text = xml_records(int(size * MB))
+        yield f"format.xml.{label}", measure(lambda: format_body(text, 'application/xml'), repeat)
+        del text
+
+
+def bench_highlight(sizes: List[float], repeat: int) -> Iterator[tuple]:
+    """SyntaxHighlighter line spans for formatted JSON of each size in MB; skipped without Qt"""
+    try:
+        from PySide6.QtGui import QGuiApplication
+    except ImportError:
+        return
+    from line_buffer import LineBuffer
+    from response_formatter import format_body
+    from syntax_highlighter import SyntaxHighlighter
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QGuiApplication.instance() or QGuiApplication([])  # noqa: F841
+    # Below the Pygments limit the whole document is lexed at once
+    small = LineBuffer.from_text(format_body(json_records(200 * 1024), 'application/json'))
+
+    def lex_small():
+        highlighter = SyntaxHighlighter()
+        highlighter.set_lexer('application/json', small)
+        highlighter.line_spans(0, small.line(0))
+
+    yield "highlight.pygments.200KB", measure(lex_small, repeat)
+
+    for size in sizes:
+        label = f"{size:g}MB"
+        source = LineBuffer.from_text(format_body(json_records(int(size * MB)), 'application/json'))
+        last = source.line_count - 1
+
+        def jump_to_end():
+            highlighter = SyntaxHighlighter()
+            highlighter.set_lexer('application/json', source)
+            highlighter.line_spans(last, source.line(last))
+
+        def scroll_screen():
+            # A screen of lines from the middle, after the checkpoints exist
+            middle = source.line_count // 2
+            for line in range(middle, min(middle + 60, source.line_count)):
+                highlighter.line_spans(line, source.line(line))
+
+        highlighter = SyntaxHighlighter()
+        highlighter.set_lexer('application/json', source)
+        highlighter.line_spans(last, source.line(last))
+        yield f"highlight.jump_to_end.{label}", measure(jump_to_end, repeat)
+        yield f"highlight.scroll_screen.{label}", measure(scroll_screen, repeat)
+
+
+def run(groups: List[str], rows: List[int], variables: List[int], sizes: List[float], repeat: int) -> Dict:
+    """All measurements of the chosen groups, keyed by benchmark name"""
+    benchmarks = {
+        'database': lambda: bench_database(rows, repeat),
+        'substitution': lambda: bench_substitution(variables, repeat),
+        'format': lambda: bench_format(sizes, repeat),
+        'highlight': lambda: bench_highlight(sizes, repeat),
+    }
+    results = {}
+    for group in groups:
+        for name, timing in benchmarks[group]():
+            results[name] = timing
+            print(f"{name:44} {_headline(timing):>12.3f} ms", file=sys.stderr)
+    return {**run_metadata(), 'settings': {'rows': rows, 'variables': variables, 'sizes_mb': sizes,
+                                           'repeat': repeat}, 'results': results}
+
+
+def _headline(timing: Dict) -> float:
+    """The figure compared between runs"""
+    return timing.get('median_ms', timing.get('per_call_ms'))
+
+
+def _numbers(text: str, kind=int) -> List:
+    return [kind(value) for value in text.split(',') if value.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time pyPost's in-process hot paths on generated fixtures")
+    parser.add_argument('--only', action='append', choices=GROUPS, help="run only this group; may be repeated")
+    parser.add_argument('--rows', default='1000,10000', help="history row counts (default: %(default)s)")
+    parser.add_argument('--variables', default='10,100,1000', help="environment sizes (default: %(default)s)")
+    parser.add_argument('--sizes', default='1,10', help="body sizes in MB for formatting and highlighting "
+                                                        "(default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per measurement (default: %(default)s)")
+    parser.add_argument('--history', default=os.path.join(ROOT, 'benchmarks', 'hot_paths.jsonl'),
+                        help="JSON Lines file results are appended to and compared with")
+    parser.add_argument('--max-regression', type=float,
+                        help="fail if any benchmark got slower than the previous run by more than this percentage")
+    args = parser.parse_args()
+
+    previous = last_result(args.history)
+    result = run(args.only or list(GROUPS), _numbers(args.rows), _numbers(args.variables),
+                 _numbers(args.sizes, float), args.repeat)
+    append_result(args.history, result)
+
+    if previous is None:
+        return 0
+    print(f"compared with {previous['version']} of {previous['timestamp']}:", file=sys.stderr)
+    failures = []
+    for name, timing in result['results'].items():
+        before = previous['results'].get(name)
+        if not before:
+            continue
+        change = (_headline(timing) - _headline(before)) / _headline(before) * 100
+        print(f"{name:44} {_headline(before):>12.3f} -> {_headline(timing):>12.3f} ms  {change:+.1f}%",
+              file=sys.stderr)
+        if args.max_regression is not None and change > args.max_regression:
+            failures.append(f"{name} is {change:.1f}% slower, limit {args.max_regression}%")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
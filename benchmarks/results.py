@@ -0,0 +1,47 @@
+"""Metadata and result history shared by the benchmarks"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def version() -> str:
+    """Commit of the benchmarked tree, or "unknown" outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_metadata() -> Dict:
+    """What a result was measured on, so results can be compared across versions"""
+    return {
+        'version': version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def last_result(path: str) -> Optional[Dict]:
+    """Most recent result in a JSON Lines history file, if there is one"""
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+
+def append_result(path: str, result: Dict):
+    """Add a result to a JSON Lines history file"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result) + "\n")
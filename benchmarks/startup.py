@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Cold startup benchmark for pyPost.
+
+Reports the `python -X importtime` cost of importing main_window and the
+time until the main window has been shown, each measured in a fresh
+interpreter. With --check it fails when a module that is deliberately kept
+out of startup gets imported again, or when a limit is exceeded.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --check --max-import-ms 400
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that are only imported once they are needed
+DEFERRED_MODULES = ('requests', 'cryptography', 'pygments', 'charset_normalizer')
+
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+from PySide6.QtWidgets import QApplication
+app = QApplication([])
+from main_window import MainWindow
+window = MainWindow()
+window.show()
+app.processEvents()
+shown = time.perf_counter()
+# Let the deferred data load finish
+for _ in range(50):
+    app.processEvents()
+print(f"{(shown - start) * 1000:.1f} {(time.perf_counter() - start) * 1000:.1f}")
+"""
+
+
+def _run(args: List[str], cwd: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=ROOT, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True, text=True, check=True)
+
+
+def import_report(module: str = 'main_window') -> List[Tuple[str, int, int, int]]:
+    """(name, depth, self us, cumulative us) for each module imported by module"""
+    with tempfile.TemporaryDirectory() as cwd:
+        result = _run(['-X', 'importtime', '-c', f'import {module}'], cwd)
+    report = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        report.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return report
+
+
+def time_to_window() -> Tuple[float, float]:
+    """Milliseconds until the window is shown and until its data is loaded"""
+    # A temporary directory keeps the benchmark away from the real database
+    with tempfile.TemporaryDirectory() as cwd:
+        result = _run(['-c', WINDOW_SCRIPT], cwd)
+    shown, loaded = result.stdout.split()[-2:]
+    return float(shown), float(loaded)
+
+
+def summarize(report: List[Tuple[str, int, int, int]], top: int) -> Dict:
+    """Total import time of the module and its most expensive imports"""
+    target = report[-1]
+    # Modules are reported after their own imports, so the target's imports
+    # are the entries since the previous top-level one
+    start = len(report) - 1
+    while start > 0 and report[start - 1][1] > target[1]:
+        start -= 1
+    children = [entry for entry in report[start:-1] if entry[1] == target[1] + 1]
+    children.sort(key=lambda entry: entry[3], reverse=True)
+    imported = {entry[0].split('.')[0] for entry in report[start:]}
+    return {
+        'total_ms': target[3] / 1000,
+        'top': [(name, cumulative / 1000) for name, _, _, cumulative in children[:top]],
+        'deferred_imported': sorted(name for name in DEFERRED_MODULES if name in imported),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure pyPost cold startup")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement; the fastest is kept")
+    parser.add_argument('--top', type=int, default=10, help="number of imports listed")
+    parser.add_argument('--check', action='store_true', help="fail if a deferred module is imported at startup")
+    parser.add_argument('--max-import-ms', type=float, help="fail if importing main_window takes longer")
+    parser.add_argument('--max-window-ms', type=float, help="fail if showing the window takes longer")
+    args = parser.parse_args()
+
+    summaries = [summarize(import_report(), args.top) for _ in range(args.repeat)]
+    best = min(summaries, key=lambda summary: summary['total_ms'])
+    shown, loaded = min(time_to_window() for _ in range(args.repeat))
+
+    print(f"import main_window: {best['total_ms']:.1f} ms")
+    for name, milliseconds in best['top']:
+        print(f"  {milliseconds:8.1f} ms  {name}")
+    print(f"window shown:       {shown:.1f} ms")
+    print(f"data loaded:        {loaded:.1f} ms")
+
+    failures = []
+    if args.check and best['deferred_imported']:
+        failures.append(f"deferred modules imported at startup: {', '.join(best['deferred_imported'])}")
+    if args.max_import_ms is not None and best['total_ms'] > args.max_import_ms:
+        failures.append(f"import took {best['total_ms']:.1f} ms, limit {args.max_import_ms} ms")
+    if args.max_window_ms is not None and shown > args.max_window_ms:
+        failures.append(f"window took {shown:.1f} ms, limit {args.max_window_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Request throughput benchmark for pyPost.
+
+Starts the mock server in-process as a local target and sends requests
+through each layer of pyPost: a bare requests session for reference,
+http_client.send_request, the runner on the shared scheduler and, when Qt
+is available, HTTPWorker threads. Reports requests per second, latency
+percentiles and the overhead over the bare session, plus the memory held
+per in-flight request. Results are written as JSON; --compare prints the
+change against an earlier result file and fails on regressions.
+
+    python benchmarks/throughput.py --output throughput.json
+    python benchmarks/throughput.py --compare throughput.json --max-regression 15
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests  # noqa: E402
+
+from http_client import send_request  # noqa: E402
+from mock_server import FaultProfile, MockServer, Stub, stub_key  # noqa: E402
+from request_model import RequestModel  # noqa: E402
+from runner import RunJob, stream_jobs, submit_job  # noqa: E402
+from scheduler import request_scheduler  # noqa: E402
+from results import run_metadata  # noqa: E402
+
+PATH = '/items'
+
+
+def start_target(body_size: int, latency_ms: float = 0) -> MockServer:
+    """Mock server answering GET /items with a JSON body of about body_size bytes"""
+    body = json.dumps({'items': ['x' * 62] * max(1, body_size // 66)}).encode('utf-8')
+    stubs = {stub_key('GET', PATH): Stub(200, {'Content-Type': 'application/json'}, body)}
+    return MockServer(stubs, FaultProfile(latency=latency_ms)).start()
+
+
+def summarize(latencies: List[float], seconds: float) -> Dict:
+    """Requests per second and latency percentiles in milliseconds"""
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    return {
+        'requests': len(ordered),
+        'seconds': round(seconds, 3),
+        'rps': round(len(ordered) / seconds, 1),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def _sequential(send: Callable[[], None], count: int) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        sent = time.perf_counter()
+        send()
+        latencies.append(time.perf_counter() - sent)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_session(url: str, count: int) -> Dict:
+    """A bare requests session, the floor for the other layers"""
+    with requests.Session() as session:
+        return _sequential(lambda: session.get(url).content, count)
+
+
+def bench_send_request(url: str, count: int) -> Dict:
+    """http_client.send_request with a reused session, including body decoding"""
+    with requests.Session() as session:
+        return _sequential(lambda: send_request('GET', url, {}, session=session), count)
+
+
+def bench_runner(url: str, count: int, parallel: int) -> Dict:
+    """Runner jobs through the request scheduler with parallel requests in flight"""
+    job = RunJob("benchmark", RequestModel('GET', url))
+    latencies = []
+    start = time.perf_counter()
+    sent = {}
+
+    def jobs():
+        for index in range(count):
+            sent[index] = time.perf_counter()
+            yield job
+
+    # Results come back in job order, so the index matches the send time
+    for index, result in enumerate(stream_jobs(jobs(), {}, parallel)):
+        if not result.passed:
+            raise RuntimeError(f"Benchmark request failed: {result.error or result.status_code}")
+        latencies.append(time.perf_counter() - sent.pop(index))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_worker(url: str, count: int, parallel: int) -> Optional[Dict]:
+    """HTTPWorker threads as request tabs start them; None without Qt"""
+    try:
+        from PySide6.QtCore import QCoreApplication
+    except ImportError:
+        return None
+    from http_worker import HTTPWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    remaining = count
+    while remaining:
+        batch = []
+        for _ in range(min(parallel, remaining)):
+            worker = HTTPWorker('GET', url, {})
+            worker.error.connect(errors.append)
+            batch.append((worker, time.perf_counter()))
+            worker.start()
+        for worker, sent in batch:
+            worker.wait()
+            latencies.append(time.perf_counter() - sent)
+        remaining -= len(batch)
+        # Deliver the queued finished signals
+        app.processEvents()
+    if errors:
+        raise RuntimeError(f"Benchmark request failed: {errors[0]}")
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_memory(url: str, in_flight: int, latency_ms: float) -> Dict:
+    """Python memory held per request while in_flight requests wait on a slow server"""
+    job = RunJob("benchmark", RequestModel('GET', url))
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    futures = [submit_job(job, {}) for _ in range(in_flight)]
+    # Sample once every request has been sent and is waiting for its response
+    time.sleep(latency_ms / 1000 / 2)
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    for future in futures:
+        future.result()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {
+        'in_flight': in_flight,
+        'bytes_per_request': held // in_flight,
+        'peak_bytes_per_request': peak // in_flight,
+    }
+
+
+def run(count: int, parallel: int, body_size: int, in_flight: int, memory_latency: float) -> Dict:
+    """All measurements, as written to the result file"""
+    # One host is benchmarked, so the per-host limit would otherwise cap it
+    request_scheduler().configure(max(parallel, in_flight), max(parallel, in_flight), 0)
+    server = start_target(body_size)
+    try:
+        url = server.url + PATH
+        # Warm up connections, imports and charset detection
+        bench_send_request(url, 10)
+        results = {
+            'session': bench_session(url, count),
+            'send_request': bench_send_request(url, count),
+            f'runner_parallel_{parallel}': bench_runner(url, count, parallel),
+        }
+        worker = bench_worker(url, count, parallel)
+        if worker is not None:
+            results[f'worker_parallel_{parallel}'] = worker
+    finally:
+        server.stop()
+    floor = results['session']['p50_ms']
+    for name, result in results.items():
+        result['overhead_p50_ms'] = round(result['p50_ms'] - floor, 3)
+
+    slow_server = start_target(body_size, memory_latency)
+    try:
+        memory = bench_memory(slow_server.url + PATH, in_flight, memory_latency)
+    finally:
+        slow_server.stop()
+
+    return {
+        **run_metadata(),
+        'settings': {'requests': count, 'parallel': parallel, 'body_size': body_size},
+        'throughput': results,
+        'memory': memory,
+    }
+
+
+def compare(current: Dict, previous: Dict) -> List[tuple]:
+    """(name, previous rps, current rps, percent change) for benchmarks in both"""
+    rows = []
+    for name, result in current['throughput'].items():
+        before = previous.get('throughput', {}).get(name)
+        if before:
+            change = (result['rps'] - before['rps']) / before['rps'] * 100
+            rows.append((name, before['rps'], result['rps'], change))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure pyPost request throughput against a local server")
+    parser.add_argument('--requests', type=int, default=500, help="requests per benchmark")
+    parser.add_argument('--parallel', type=int, default=8, help="requests in flight for runner and worker benchmarks")
+    parser.add_argument('--body-size', type=int, default=2048, help="approximate response body size in bytes")
+    parser.add_argument('--in-flight', type=int, default=64, help="concurrent requests for the memory benchmark")
+    parser.add_argument('--memory-latency', type=float, default=500,
+                        help="server latency in ms while measuring memory per request")
+    parser.add_argument('--output', help="write the JSON result to a file instead of stdout")
+    parser.add_argument('--compare', metavar='FILE', help="earlier result file to compare requests/sec with")
+    parser.add_argument('--max-regression', type=float,
+                        help="with --compare, fail if any benchmark lost more than this percentage")
+    args = parser.parse_args()
+
+    result = run(args.requests, args.parallel, args.body_size, args.in_flight, args.memory_latency)
+    document = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(document + "\n")
+    else:
+        print(document)
+
+    for name, values in result['throughput'].items():
+        print(f"{name:24} {values['rps']:9.1f} req/s  p50 {values['p50_ms']:7.2f} ms  "
+              f"p95 {values['p95_ms']:7.2f} ms  +{values['overhead_p50_ms']:.2f} ms", file=sys.stderr)
+    print(f"{'memory':24} {result['memory']['bytes_per_request']} B per in-flight request", file=sys.stderr)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding='utf-8') as f:
+        previous = json.load(f)
+    failures = []
+    for name, before, after, change in compare(result, previous):
+        print(f"{name:24} {before:9.1f} -> {after:9.1f} req/s  {change:+.1f}%", file=sys.stderr)
+        if args.max_regression is not None and change < -args.max_regression:
+            failures.append(f"{name} lost {-change:.1f}% requests/sec, limit {args.max_regression}%")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
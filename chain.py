@@ -0,0 +1,122 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from http_cache import HttpCache
+from http_client import RetryPolicy
+from runner import RunJob, RunResult, submit_job
+
+
+def is_chained(jobs: List[RunJob]) -> bool:
+    """Whether any job extracts variables or depends on another"""
+    return any(job.request.extract or job.request.depends_on for job in jobs)
+
+
+def _find_job(jobs: List[RunJob], name: str) -> int:
+    """Index of the job with the given name or, failing that, the given last path component"""
+    for index, job in enumerate(jobs):
+        if job.name == name:
+            return index
+    matches = [index for index, job in enumerate(jobs) if job.name.rsplit('/', 1)[-1] == name]
+    if len(matches) != 1:
+        raise ValueError(f"{'Ambiguous' if matches else 'Unknown'} dependency {name!r}")
+    return matches[0]
+
+
+def dependency_graph(jobs: List[RunJob]) -> List[List[int]]:
+    """Indexes of the jobs each job depends on.
+
+    Raises ValueError for unknown or ambiguous names and for cycles.
+    """
+    graph = [[_find_job(jobs, name) for name in job.request.depends_on] for job in jobs]
+
+    # Kahn's algorithm; jobs left over are on a cycle
+    remaining = [len(dependencies) for dependencies in graph]
+    dependents = [[] for _ in jobs]
+    for index, dependencies in enumerate(graph):
+        for dependency in dependencies:
+            dependents[dependency].append(index)
+    ready = [index for index, count in enumerate(remaining) if count == 0]
+    visited = 0
+    while ready:
+        index = ready.pop()
+        visited += 1
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    if visited < len(jobs):
+        cycle = [jobs[index].name for index, count in enumerate(remaining) if count]
+        raise ValueError(f"Dependency cycle between {', '.join(cycle)}")
+    return graph
+
+
+def run_chain(jobs: List[RunJob], substitutions: Dict[str, str], parallel: int = 1,
+              policy: Optional[RetryPolicy] = None, cache: Optional[HttpCache] = None) -> Iterator[RunResult]:
+    """Run jobs as a dependency graph, yielding results as they finish.
+
+    Every job whose dependencies have passed is sent at once, up to
+    parallel at a time. A job sees the variables extracted by all of its
+    direct and indirect dependencies, on top of its own data row; jobs
+    depending on a failed one are reported as errors without being sent.
+    Raises ValueError for an invalid graph before anything is sent.
+    """
+    graph = dependency_graph(jobs)
+    dependents = [[] for _ in jobs]
+    for index, dependencies in enumerate(graph):
+        for dependency in dependencies:
+            dependents[dependency].append(index)
+    remaining = [len(dependencies) for dependencies in graph]
+    # Variables a job passes on: its own extractions over those it inherited
+    visible: List[Optional[Dict[str, str]]] = [None] * len(jobs)
+    ready = deque(index for index, count in enumerate(remaining) if count == 0)
+
+    def release(index: int):
+        for dependent in dependents[index]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    parallel = max(1, parallel)
+    running = {}
+    inherited = {}
+    while ready or running:
+        while ready and len(running) < parallel:
+            index = ready.popleft()
+            job = jobs[index]
+            failed = [jobs[dependency].name for dependency in graph[index] if visible[dependency] is None]
+            if failed:
+                yield RunResult(job.name, job.request.method, job.request.url,
+                                error=f"Skipped: {', '.join(failed)} failed", iteration=job.iteration)
+                release(index)
+                continue
+            inherited[index] = {}
+            for dependency in graph[index]:
+                inherited[index].update(visible[dependency])
+            variables = {**(job.variables or {}), **inherited[index]}
+            future = submit_job(RunJob(job.name, job.request, variables, job.iteration), substitutions, policy,
+                                cache=cache)
+            running[future] = index
+        if not running:
+            break
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = running.pop(future)
+            result = future.result()
+            variables = inherited.pop(index)
+            if result.passed:
+                visible[index] = {**variables, **result.extracted}
+            yield result
+            release(index)
+
+
+def run_chains(jobs: List[RunJob], substitutions: Dict[str, str],
+               rows: Optional[Iterable[Dict[str, str]]] = None, parallel: int = 1,
+               policy: Optional[RetryPolicy] = None, cache: Optional[HttpCache] = None) -> Iterator[RunResult]:
+    """Run the graph once, or once per data row with the row's variables"""
+    if rows is None:
+        yield from run_chain(jobs, substitutions, parallel, policy, cache)
+        return
+    for iteration, row in enumerate(rows, 1):
+        iteration_jobs = [RunJob(job.name, job.request, row, iteration) for job in jobs]
+        yield from run_chain(iteration_jobs, substitutions, parallel, policy, cache)
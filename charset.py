@@ -0,0 +1,91 @@
+import codecs
+import logging
+import re
+from typing import Optional, Tuple
+
+try:
+    from charset_normalizer import from_bytes
+    CHARSET_DETECTION_AVAILABLE = True
+except ImportError:
+    CHARSET_DETECTION_AVAILABLE = False
+
+# Only this many leading bytes are sampled when the encoding has to be guessed
+DETECTION_SAMPLE_SIZE = 64 * 1024
+# Encoding used when nothing else identifies one
+FALLBACK_ENCODING = 'latin-1'
+
+# Longest BOMs first so that UTF-32 LE is not mistaken for UTF-16 LE
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+_CHARSET_PARAM = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+
+
+def declared_charset(content_type: str) -> Optional[str]:
+    """Charset named in a Content-Type header, if Python knows it"""
+    match = _CHARSET_PARAM.search(content_type or "")
+    if not match:
+        return None
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        logging.info(f"Unknown charset in Content-Type: {match.group(1)}")
+        return None
+
+
+def bom_encoding(data: bytes) -> Optional[Tuple[str, int]]:
+    """Encoding and BOM length if the data starts with a byte order mark"""
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding, len(bom)
+    return None
+
+
+def detect_encoding(data: bytes) -> str:
+    """Guess the encoding from a bounded prefix of the data"""
+    if CHARSET_DETECTION_AVAILABLE:
+        sample = data[:DETECTION_SAMPLE_SIZE]
+        # A cut-off multi-byte sequence at the end of the sample must not
+        # rule out an otherwise valid encoding
+        if len(data) > DETECTION_SAMPLE_SIZE:
+            sample = sample[:sample.rfind(b'\n') + 1] or sample
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+    return FALLBACK_ENCODING
+
+
+def decode_body(data: bytes, content_type: str = "") -> Tuple[str, str]:
+    """Decode a response body, returning (text, encoding).
+
+    A byte order mark wins, then the declared charset, then strict UTF-8.
+    Only when all of these fail is the encoding guessed, from a bounded
+    prefix rather than the whole body.
+    """
+    if not data:
+        return "", declared_charset(content_type) or 'utf-8'
+
+    bom = bom_encoding(data)
+    if bom:
+        encoding, length = bom
+        return data[length:].decode(encoding, errors='replace'), encoding
+
+    encoding = declared_charset(content_type)
+    if encoding:
+        return data.decode(encoding, errors='replace'), encoding
+
+    try:
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    encoding = detect_encoding(data)
+    try:
+        return data.decode(encoding, errors='replace'), encoding
+    except LookupError:
+        return data.decode(FALLBACK_ENCODING), FALLBACK_ENCODING
@@ -19,4 +19,72 @@ BODY_BINARY = 'Binary'
 BODY_TYPES = [BODY_NONE, BODY_JSON, BODY_XML, BODY_PLAIN_TEXT, BODY_MULTIPART, BODY_BINARY]
 
 # Default environment name
-DEFAULT_ENV = 'Default'
\ No newline at end of file
+DEFAULT_ENV = 'Default'
+
+# Response highlighting limits (bytes). Bodies up to the Pygments limit are
+# lexed as a whole; larger ones use the fast line tokenizers, and bodies above
+# the highlight limit are shown without highlighting.
+HIGHLIGHT_PYGMENTS_MAX_SIZE = 256 * 1024
+HIGHLIGHT_MAX_SIZE = 16 * 1024 * 1024
+
+# Response bodies larger than this (characters) are shown raw first and
+# pretty printed in a worker thread
+FORMAT_ASYNC_THRESHOLD = 64 * 1024
+
+# JSON bodies larger than this (characters) are re-indented token by token
+# instead of being parsed into objects; below it the json module is faster,
+# above it its object graph costs many times the body size in memory
+STREAMING_FORMAT_THRESHOLD = 8 * 1024 * 1024
+
+# JSON bodies larger than this (characters) are not offered in the tree view
+JSON_TREE_MAX_SIZE = 64 * 1024 * 1024
+
+# Response bodies larger than this (bytes) are moved to a spill file while
+# their tab is hidden
+HIBERNATE_THRESHOLD = 1024 * 1024
+
+# Collections and history rows added to the sidebar per event loop turn
+LOAD_BATCH_SIZE = 200
+
+# Modules kept out of startup and imported in the background once the window
+# has loaded its data
+PRELOAD_MODULES = ('requests', 'cryptography.fernet', 'pygments.lexers')
+
+# Outbound request scheduling. Requests beyond the global or per-host limit
+# wait in a priority queue; the reserved slots can only be taken by
+# interactive sends, so background runs never block them completely.
+SCHEDULER_MAX_CONCURRENT = 16
+SCHEDULER_MAX_PER_HOST = 6
+SCHEDULER_INTERACTIVE_RESERVED = 2
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Response cache, kept in this directory next to the database. Responses
+# without an explicit lifetime but with Last-Modified stay fresh for this
+# fraction of their age when stored, up to the maximum (RFC 7234 4.2.2).
+HTTP_CACHE_DIR = "http_cache"
+CACHE_HEURISTIC_FRACTION = 0.1
+CACHE_HEURISTIC_MAX_LIFETIME = 24 * 3600
+# How a response's cache status is shown next to its status code
+CACHE_STATUS_LABELS = {'fresh': 'from cache', 'revalidated': 'revalidated, 304', 'miss': 'cache miss'}
+
+# Local mock server. Bodies are written in chunks so bandwidth limits can be
+# applied between them.
+MOCK_SERVER_PORT = 8787
+MOCK_CHUNK_SIZE = 16 * 1024
+
+# Spans kept while tracing; older ones are dropped
+TRACE_MAX_EVENTS = 100000
+
+# Event loop watchdog: a heartbeat runs every interval on the GUI thread,
+# and one running later than the stall threshold is logged with a sample of
+# the GUI thread's stack. Latency is reported over the last window beats.
+EVENT_LOOP_INTERVAL_MS = 100
+EVENT_LOOP_STALL_MS = 250
+EVENT_LOOP_WINDOW = 600
+
+# History replay. Without --parallel, this many replayed requests may be in
+# flight at once so bursts keep their timing; a request pulled later than the
+# warning threshold after it was due is reported as late.
+REPLAY_MAX_IN_FLIGHT = 32
+REPLAY_LATE_WARNING = 0.1
@@ -1,8 +1,7 @@
 import sqlite3
 import os
 import logging
-from typing import Dict, List, Optional, Any
-from cryptography.fernet import Fernet
+from typing import Dict, Iterator, List, Optional, Any
 
 
 class DatabaseManager:
@@ -11,11 +10,20 @@ class DatabaseManager:
     def __init__(self, db_path: str = "pypost.db"):
         self.db_path = db_path
         self.encryption_key_path = os.path.join(os.path.dirname(self.db_path), '.encryption_key')
-        self._init_encryption()
+        self._fernet = None
         self.init_database()
 
+    @property
+    def fernet(self):
+        """Fernet instance, created on first use so cryptography is not imported at startup"""
+        if self._fernet is None:
+            self._init_encryption()
+        return self._fernet
+
     def _init_encryption(self):
         """Initialize encryption key and Fernet instance"""
+        from cryptography.fernet import Fernet
+
         if not os.path.exists(self.encryption_key_path):
             self.encryption_key = Fernet.generate_key()
             with open(self.encryption_key_path, 'wb') as f:
@@ -23,7 +31,7 @@ class DatabaseManager:
         else:
             with open(self.encryption_key_path, 'rb') as f:
                 self.encryption_key = f.read()
-        self.fernet = Fernet(self.encryption_key)
+        self._fernet = Fernet(self.encryption_key)
 
     def init_database(self):
         """Initialize database with required tables"""
@@ -51,12 +59,15 @@ class DatabaseManager:
                 url TEXT NOT NULL,
                 request_data TEXT,
                 response_data TEXT,
+                response_body BLOB,
                 status_code INTEGER,
                 response_time INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
 
+        self._add_missing_columns(cursor, 'history', {'response_body': 'BLOB'})
+
         # Environments table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS environments (
@@ -94,6 +105,14 @@ class DatabaseManager:
         conn.commit()
         conn.close()
 
+    def _add_missing_columns(self, cursor, table: str, columns: Dict[str, str]):
+        """Add columns introduced after a database was created"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for name, column_type in columns.items():
+            if name not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
     def encrypt(self, data: str) -> str:
         """Encrypt sensitive data"""
         return self.fernet.encrypt(data.encode()).decode()
@@ -119,6 +138,34 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
+    def environment_variables(self, environment_id: int) -> Dict[str, str]:
+        """Variables of an environment as {name: value}"""
+        variables = self.execute_query(
+            "SELECT name, value FROM environment_variables WHERE environment_id = ?",
+            (environment_id,)
+        )
+        return {var['name']: var['value'] for var in variables}
+
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = 200) -> Iterator[List[Dict]]:
+        """Execute a query and yield its results in batches of dictionaries"""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            logging.error(f"Database query error: {str(e)}")
+            raise Exception(f"Database query error: {str(e)}")
+        finally:
+            if conn:
+                conn.close()
+
     def execute_update(self, query: str, params: tuple = ()) -> Optional[int]:
         """Execute an update query and return the last row ID"""
         conn = None
@@ -0,0 +1,217 @@
+import json
+import logging
+from typing import Dict, Optional, Tuple
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListView, QTableView,
+    QTabWidget, QDialogButtonBox, QHeaderView
+)
+from PySide6.QtCore import QAbstractListModel, QAbstractTableModel, QModelIndex, QObject, Qt, Signal
+from PySide6.QtGui import QColor, QFontDatabase
+
+from format_worker import format_executor
+from http_response import HttpResponse
+from response_diff import DiffRows, diff_bodies
+
+DIFF_COLORS = {
+    '-': QColor(255, 220, 220),
+    '+': QColor(220, 255, 220),
+    '@': QColor(230, 230, 245),
+}
+
+
+def response_from_history(entry: Dict) -> Tuple[str, str]:
+    """Body text and content type stored with a history entry"""
+    response = HttpResponse.from_history(entry.get('response_data'), entry.get('response_body'))
+    return response.text, response.content_type
+
+
+def describe_history(entry: Dict) -> str:
+    """Short label for a history entry"""
+    return f"#{entry.get('id')} {entry.get('method', '')} {entry.get('url', '')} ({entry.get('created_at', '')})"
+
+
+class DiffModel(QAbstractListModel):
+    """One row per diff line; rows are rendered from the opcodes when painted"""
+
+    def __init__(self, rows: Optional[DiffRows] = None, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+
+    def set_rows(self, rows: Optional[DiffRows]):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid() or self.rows is None:
+            return 0
+        return self.rows.row_count
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or self.rows is None:
+            return None
+        if role == Qt.DisplayRole:
+            kind, old_line, new_line, text = self.rows.row(index.row())
+            if kind == '@':
+                return text
+            old_number = '' if old_line is None else old_line + 1
+            new_number = '' if new_line is None else new_line + 1
+            return f"{old_number:>6} {new_number:>6} {kind} {text}"
+        if role == Qt.BackgroundRole:
+            return DIFF_COLORS.get(self.rows.row(index.row())[0])
+        return None
+
+
+class JsonChangesModel(QAbstractTableModel):
+    """Table of structural JSON changes"""
+
+    COLUMNS = ['Path', 'Change', 'Old', 'New']
+
+    def __init__(self, changes=None, parent=None):
+        super().__init__(parent)
+        self.changes = changes or []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.changes)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        path, kind, old, new = self.changes[index.row()]
+        column = index.column()
+        if column == 0:
+            return path
+        if column == 1:
+            return kind
+        value = old if column == 2 else new
+        if kind == ('added' if column == 2 else 'removed'):
+            return ''
+        text = json.dumps(value, ensure_ascii=False)
+        return text if len(text) <= 200 else text[:200] + '…'
+
+
+class DiffSignals(QObject):
+    """Signals emitted when a diff computed in the worker pool is ready"""
+
+    finished = Signal(object)
+
+
+class DiffDialog(QDialog):
+    """Side-by-side labelled diff of two response bodies"""
+
+    def __init__(self, old_label: str, old_body: Tuple[str, str], new_label: str,
+                 new_body: Tuple[str, str], parent=None):
+        super().__init__(parent)
+        self.old_body = old_body
+        self.new_body = new_body
+        self.rows = None
+        self.init_ui(old_label, new_label)
+        self.start_diff()
+
+    def init_ui(self, old_label: str, new_label: str):
+        self.setWindowTitle("Compare Responses")
+        self.resize(900, 600)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"- {old_label}"))
+        layout.addWidget(QLabel(f"+ {new_label}"))
+
+        summary_layout = QHBoxLayout()
+        self.summary_label = QLabel("Comparing…")
+        self.next_change_btn = QPushButton("Next Change")
+        self.next_change_btn.clicked.connect(self.go_to_next_change)
+        self.next_change_btn.setEnabled(False)
+        summary_layout.addWidget(self.summary_label, 1)
+        summary_layout.addWidget(self.next_change_btn)
+        layout.addLayout(summary_layout)
+
+        self.diff_tabs = QTabWidget()
+
+        self.diff_model = DiffModel(parent=self)
+        self.diff_view = QListView()
+        self.diff_view.setUniformItemSizes(True)
+        self.diff_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.diff_view.setModel(self.diff_model)
+        self.diff_tabs.addTab(self.diff_view, "Lines")
+
+        self.changes_model = JsonChangesModel(parent=self)
+        self.changes_view = QTableView()
+        self.changes_view.setModel(self.changes_model)
+        self.changes_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.changes_view.horizontalHeader().setStretchLastSection(True)
+        self.changes_view.verticalHeader().setVisible(False)
+        self.diff_tabs.addTab(self.changes_view, "JSON Changes")
+        self.diff_tabs.setTabEnabled(1, False)
+        layout.addWidget(self.diff_tabs)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        self.setLayout(layout)
+
+    def start_diff(self):
+        """Compute the diff in the worker pool"""
+        # Parented to the dialog so a closed dialog receives nothing
+        self.signals = DiffSignals(self)
+        self.signals.finished.connect(self.show_diff)
+        old_text, old_type = self.old_body
+        new_text, new_type = self.new_body
+
+        def run():
+            try:
+                result = diff_bodies(old_text, new_text, old_type, new_type)
+            except Exception as e:
+                logging.warning(f"Response diff failed: {e}")
+                result = e
+            try:
+                self.signals.finished.emit(result)
+            except RuntimeError:
+                pass  # Dialog was closed meanwhile
+
+        format_executor().submit(run)
+
+    def show_diff(self, result):
+        """Display a finished diff"""
+        if isinstance(result, Exception):
+            self.summary_label.setText(f"Comparison failed: {result}")
+            return
+        rows, changes = result
+        self.rows = rows
+        self.diff_model.set_rows(rows)
+        if changes is not None:
+            self.changes_model.beginResetModel()
+            self.changes_model.changes = changes
+            self.changes_model.endResetModel()
+            self.diff_tabs.setTabEnabled(1, True)
+
+        if rows.changed == 0:
+            self.summary_label.setText("Responses are identical" if changes is None
+                                       else "Responses are identical as JSON")
+        else:
+            summary = f"{rows.changed} lines changed"
+            if changes is not None:
+                summary += f", {len(changes)} JSON values changed"
+            self.summary_label.setText(summary)
+            self.next_change_btn.setEnabled(True)
+            self.go_to_next_change()
+
+    def go_to_next_change(self):
+        """Scroll to the next hunk, wrapping to the first"""
+        if self.rows is None:
+            return
+        current = self.diff_view.currentIndex().row() if self.diff_view.currentIndex().isValid() else -1
+        row = self.rows.next_change(current)
+        if row is None:
+            row = self.rows.next_change(-1)
+        if row is not None:
+            index = self.diff_model.index(row)
+            self.diff_view.setCurrentIndex(index)
+            self.diff_view.scrollTo(index, QListView.PositionAtTop)
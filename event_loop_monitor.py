@@ -0,0 +1,130 @@
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import QObject, Qt, QTimer
+
+from constants import EVENT_LOOP_INTERVAL_MS, EVENT_LOOP_STALL_MS, EVENT_LOOP_WINDOW
+from tracing import tracer
+
+
+class StallDetector:
+    """Measures how late a periodic heartbeat runs on a watched thread.
+
+    beat() is called from the watched thread every interval_ms; how much
+    later than that it runs is the event loop latency. A background thread
+    notices a missing heartbeat once it is threshold_ms overdue and samples
+    the watched thread's Python stack, so the stall is logged with the code
+    that caused it when the heartbeat resumes.
+    """
+
+    def __init__(self, interval_ms: int = EVENT_LOOP_INTERVAL_MS, threshold_ms: int = EVENT_LOOP_STALL_MS,
+                 window: int = EVENT_LOOP_WINDOW, thread_ident: Optional[int] = None):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.thread_ident = thread_ident or threading.main_thread().ident
+        self.stalls = 0
+        self.last_stall: Optional[Dict] = None
+        self._latencies = deque(maxlen=window)
+        self._last_beat: Optional[float] = None
+        # Stack and innermost frame sampled during the current stall, if it
+        # lasted long enough
+        self._sample: Optional[Tuple[str, str]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start sampling stalls in a background thread"""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="pypost-stall-watch", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def beat(self) -> float:
+        """Record a heartbeat; returns its latency in seconds"""
+        now = time.perf_counter()
+        with self._lock:
+            last, self._last_beat = self._last_beat, now
+            sample, self._sample = self._sample, None
+        if last is None:
+            return 0.0
+        latency = max(0.0, now - last - self.interval)
+        self._latencies.append(latency)
+        if latency >= self.threshold:
+            self.stalls += 1
+            stack, where = sample or (None, None)
+            self.last_stall = {'duration_ms': round(latency * 1000), 'where': where, 'stack': stack}
+            tracer().add_span('event_loop.stall', last + self.interval, now, 'ui', {'where': where})
+            message = f"Event loop stalled for {latency * 1000:.0f} ms"
+            if stack:
+                message += f" in {where}; stack:\n{stack}"
+            logging.warning(message)
+        return latency
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                last = self._last_beat
+                if last is None or self._sample is not None:
+                    continue
+            if time.perf_counter() - last - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self.thread_ident)
+            if frame is None:
+                continue
+            frames = traceback.extract_stack(frame)
+            innermost = frames[-1]
+            where = f"{innermost.name} ({os.path.basename(innermost.filename)}:{innermost.lineno})"
+            with self._lock:
+                # Keep it only if the same stall is still going on
+                if self._last_beat == last:
+                    self._sample = (''.join(frames.format()), where)
+
+    def metrics(self) -> Dict:
+        """Latency over the recent heartbeats in milliseconds, and the stall count"""
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return {'samples': 0, 'stalls': self.stalls}
+        return {
+            'samples': len(latencies),
+            'p50_ms': round(statistics.median(latencies) * 1000, 1),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1),
+            'recent_stalls': sum(1 for latency in latencies if latency >= self.threshold),
+            'stalls': self.stalls,
+        }
+
+
+class EventLoopMonitor(QObject):
+    """Drives a StallDetector from a timer on the Qt event loop of its thread"""
+
+    def __init__(self, parent: Optional[QObject] = None, detector: Optional[StallDetector] = None):
+        super().__init__(parent)
+        self.detector = detector or StallDetector(thread_ident=threading.get_ident())
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.detector.beat)
+
+    def start(self):
+        self.detector.start()
+        self.timer.start(round(self.detector.interval * 1000))
+
+    def stop(self):
+        self.timer.stop()
+        self.detector.stop()
+
+    def metrics(self) -> Dict:
+        return self.detector.metrics()
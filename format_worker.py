@@ -0,0 +1,130 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, Signal
+
+from json_tree_model import count_values
+from line_buffer import LineBuffer
+from response_document import ResponseDocument
+from response_formatter import format_body_chunks
+from tracing import tracer
+
+# Formatting is CPU bound and holds the GIL for most of its work, so a small
+# dedicated pool is enough to keep it off the GUI thread.
+_format_executor = None
+
+
+def format_executor() -> ThreadPoolExecutor:
+    """Worker pool shared by all response formatting tasks"""
+    global _format_executor
+    if _format_executor is None:
+        _format_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pypost-format")
+    return _format_executor
+
+
+class FormatSignals(QObject):
+    """Signals emitted by FormatTask from the worker thread"""
+
+    finished = Signal(int, object)
+
+
+class FormatTask:
+    """Pretty print a response body in the worker pool.
+
+    The result is delivered as a LineBuffer together with the generation it
+    was started for, so the receiver can drop results of superseded responses.
+    """
+
+    def __init__(self, generation: int, text: str, content_type: str):
+        self.generation = generation
+        self.text = text
+        self.content_type = content_type
+        self.signals = FormatSignals()
+        self._future = None
+        self._cancelled = False
+
+    def start(self):
+        """Queue the task in the worker pool"""
+        self._future = format_executor().submit(self.run)
+
+    def cancel(self):
+        """Cancel the task; a started task finishes but does not emit"""
+        self._cancelled = True
+        if self._future:
+            self._future.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        if self._cancelled:
+            return
+        with tracer().span('format', 'display', size=len(self.text)):
+            self._format()
+
+    def _format(self):
+        try:
+            # Encode the output piece by piece so that the formatted text is
+            # never held as one large string next to the raw body
+            data = bytearray()
+            unchanged = True
+            for piece in format_body_chunks(self.text, self.content_type):
+                if self._cancelled:
+                    return
+                unchanged = unchanged and piece is self.text
+                data += piece.encode('utf-8', errors='replace')
+            self.text = None
+            if self._cancelled or unchanged:
+                # Nothing to swap in; the raw body is already displayed
+                return
+            # The buffer takes the bytearray over; copying it would double the peak
+            buffer = LineBuffer(data)
+        except ValueError as e:
+            logging.info(f"Response body left unformatted: {e}")
+            return
+        except Exception as e:
+            logging.warning(f"Response formatting failed: {e}")
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation, buffer)
+
+
+class JsonParseTask:
+    """Decode a JSON response document in the worker pool for the tree view.
+
+    The document's values are counted there as well, so the tree can show
+    the root's total without walking the document on the GUI thread. The
+    result is delivered as (value, total) with the generation it was
+    started for.
+    """
+
+    def __init__(self, generation: int, document: ResponseDocument):
+        self.generation = generation
+        self.document = document
+        self.signals = FormatSignals()
+        self._future = None
+        self._cancelled = False
+
+    def start(self):
+        self._future = format_executor().submit(self.run)
+
+    def cancel(self):
+        self._cancelled = True
+        if self._future:
+            self._future.cancel()
+
+    def run(self):
+        if self._cancelled:
+            return
+        try:
+            with tracer().span('parse', 'display', size=len(self.document.text)):
+                # Cached on the document, so queries reuse it
+                value = self.document.parsed()
+                total = count_values([value]) - 1
+        except ValueError as e:
+            logging.info(f"Response body is not valid JSON: {e}")
+            return
+        except Exception as e:
+            logging.warning(f"Response parsing failed: {e}")
+            return
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation, (value, total))
@@ -0,0 +1,301 @@
+"""A private HTTP cache following RFC 7234.
+
+GET responses that may be stored are kept as body files in a directory,
+indexed by URL in an SQLite database next to them. A fresh entry is served
+without a request; a stale one, or one the request or response demands to
+be revalidated, is revalidated with If-None-Match / If-Modified-Since, and
+a 304 refreshes it. Unsafe methods invalidate the entry of their URL.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+from constants import CACHE_HEURISTIC_FRACTION, CACHE_HEURISTIC_MAX_LIFETIME
+from http_response import HttpResponse, header
+
+# Statuses that may be stored and given a heuristic lifetime (RFC 7231 6.1)
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 404, 405, 410, 414, 501}
+
+CACHE_FRESH = 'fresh'
+CACHE_REVALIDATED = 'revalidated'
+CACHE_MISS = 'miss'
+
+# Response headers a 304 may not replace (RFC 7232 4.1 lists what it carries)
+_KEEP_ON_REFRESH = {'content-length', 'content-encoding', 'transfer-encoding', 'content-type'}
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Directives of a Cache-Control header, with lower-case names"""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """The URL a request is sent to, with its parameters, as the cache key"""
+    # Imported on use; requests is not needed at startup
+    from requests.models import PreparedRequest
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, params)
+    return prepared.url
+
+
+class CacheEntry:
+    """A stored response with the times needed to compute its age"""
+
+    __slots__ = ('key', 'status_code', 'headers', 'body_path', 'request_time', 'response_time', 'vary')
+
+    def __init__(self, key: str, status_code: int, headers: Dict[str, str], body_path: str,
+                 request_time: float, response_time: float, vary: Dict[str, Optional[str]]):
+        self.key = key
+        self.status_code = status_code
+        self.headers = headers
+        self.body_path = body_path
+        self.request_time = request_time
+        self.response_time = response_time
+        self.vary = vary
+
+    def current_age(self, now: float) -> float:
+        """Age in seconds (RFC 7234 4.2.3)"""
+        date = _http_date(header(self.headers, 'Date')) or self.response_time
+        apparent_age = max(0.0, self.response_time - date)
+        corrected_age = (_seconds(header(self.headers, 'Age')) or 0) + (self.response_time - self.request_time)
+        return max(apparent_age, corrected_age) + (now - self.response_time)
+
+    def freshness_lifetime(self) -> float:
+        """Seconds the response stays fresh (RFC 7234 4.2.1)"""
+        directives = parse_cache_control(header(self.headers, 'Cache-Control'))
+        max_age = _seconds(directives.get('max-age'))
+        if max_age is not None:
+            return max_age
+        expires = header(self.headers, 'Expires')
+        if expires is not None:
+            date = _http_date(header(self.headers, 'Date')) or self.response_time
+            # An invalid Expires means already expired
+            return max(0.0, (_http_date(expires) or 0) - date)
+        last_modified = _http_date(header(self.headers, 'Last-Modified'))
+        if last_modified is not None and self.status_code in CACHEABLE_STATUSES:
+            date = _http_date(header(self.headers, 'Date')) or self.response_time
+            return min(CACHE_HEURISTIC_MAX_LIFETIME,
+                       max(0.0, date - last_modified) * CACHE_HEURISTIC_FRACTION)
+        return 0.0
+
+    def is_fresh(self, now: float) -> bool:
+        if 'no-cache' in parse_cache_control(header(self.headers, 'Cache-Control')):
+            return False
+        return self.current_age(now) < self.freshness_lifetime()
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating the entry"""
+        conditions = {}
+        etag = header(self.headers, 'ETag')
+        if etag:
+            conditions['If-None-Match'] = etag
+        last_modified = header(self.headers, 'Last-Modified')
+        if last_modified:
+            conditions['If-Modified-Since'] = last_modified
+        return conditions
+
+    def matches(self, request_headers: Dict[str, str]) -> bool:
+        """Whether the request selects this variant (RFC 7234 4.1)"""
+        return all(header(request_headers, name) == value for name, value in self.vary.items())
+
+
+class HttpCache:
+    """Responses stored on disk with an SQLite index.
+
+    The index is opened per statement and body files are replaced
+    atomically, so one cache may be used from several threads.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.db')
+        self._lock = threading.Lock()
+        self._execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    status_code INTEGER,
+                    headers TEXT,
+                    body_file TEXT,
+                    request_time REAL,
+                    response_time REAL,
+                    vary TEXT,
+                    size INTEGER
+                )
+            """)
+
+    def _execute(self, query: str, params: tuple = ()) -> List[tuple]:
+        """Run one statement on the index and return its rows"""
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            rows = conn.execute(query, params).fetchall()
+            conn.commit()
+            return rows
+        finally:
+            conn.close()
+
+    def lookup(self, key: str, request_headers: Dict[str, str]) -> Optional[CacheEntry]:
+        """The stored response for key if the request selects it"""
+        rows = self._execute(
+            "SELECT status_code, headers, body_file, request_time, response_time, vary FROM entries "
+            "WHERE key = ?", (key,)
+        )
+        if not rows:
+            return None
+        status_code, headers, body_file, request_time, response_time, vary = rows[0]
+        entry = CacheEntry(key, status_code, json.loads(headers), os.path.join(self.directory, body_file),
+                           request_time, response_time, json.loads(vary))
+        if not entry.matches(request_headers) or not os.path.exists(entry.body_path):
+            return None
+        return entry
+
+    def load(self, entry: CacheEntry, cache_status: str, response_time: int) -> HttpResponse:
+        """Response for an entry, as served from the cache"""
+        with open(entry.body_path, 'rb') as f:
+            content = f.read()
+        response = HttpResponse(entry.status_code, dict(entry.headers), {}, content, response_time,
+                                cache_status=cache_status)
+        response.decode()
+        return response
+
+    @staticmethod
+    def storable(request_headers: Dict[str, str], response: HttpResponse) -> bool:
+        """Whether a GET response may be stored (RFC 7234 3)"""
+        if 'no-store' in parse_cache_control(header(request_headers, 'Cache-Control')):
+            return False
+        directives = parse_cache_control(header(response.headers, 'Cache-Control'))
+        if 'no-store' in directives or header(response.headers, 'Vary') == '*':
+            return False
+        if response.status_code in CACHEABLE_STATUSES:
+            return True
+        # Other statuses only with explicit freshness
+        return 'max-age' in directives or header(response.headers, 'Expires') is not None
+
+    def store(self, key: str, request_headers: Dict[str, str], response: HttpResponse,
+              request_time: float, response_time: float):
+        """Store a response, replacing the entry for key"""
+        vary_names = [name.strip().lower() for name in (header(response.headers, 'Vary') or '').split(',')
+                      if name.strip()]
+        vary = {name: header(request_headers, name) for name in vary_names}
+        body_file = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        with self._lock:
+            temporary = os.path.join(self.directory, body_file + '.tmp')
+            with open(temporary, 'wb') as f:
+                f.write(response.content)
+            os.replace(temporary, os.path.join(self.directory, body_file))
+            self._execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.status_code, json.dumps(response.headers), body_file,
+                 request_time, response_time, json.dumps(vary), response.size)
+            )
+
+    def refresh(self, entry: CacheEntry, not_modified_headers: Dict[str, str],
+                request_time: float, response_time: float) -> CacheEntry:
+        """Update an entry from a 304 response (RFC 7234 4.3.4)"""
+        headers = dict(entry.headers)
+        for name, value in not_modified_headers.items():
+            if name.lower() in _KEEP_ON_REFRESH:
+                continue
+            for existing in [key for key in headers if key.lower() == name.lower()]:
+                del headers[existing]
+            headers[name] = value
+        entry.headers = headers
+        entry.request_time = request_time
+        entry.response_time = response_time
+        self._execute(
+            "UPDATE entries SET headers = ?, request_time = ?, response_time = ? WHERE key = ?",
+            (json.dumps(headers), request_time, response_time, entry.key)
+        )
+        return entry
+
+    def invalidate(self, key: str):
+        """Remove the entry for key"""
+        self._execute("DELETE FROM entries WHERE key = ?", (key,))
+        # The body file is left for the next store of the same key to replace
+
+    def clear(self):
+        """Remove every entry and body file"""
+        with self._lock:
+            self._execute("DELETE FROM entries")
+            for name in os.listdir(self.directory):
+                if name != 'index.db' and not name.startswith('index.db-'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def fetch(self, method: str, url: str, headers: Dict[str, str], params: Optional[Dict],
+              send: Callable[[Dict[str, str]], Optional[HttpResponse]]) -> Optional[HttpResponse]:
+        """Answer a request from the cache where allowed, otherwise through send.
+
+        send is called with the headers to send and returns the response,
+        or None if the request was cancelled. The returned response's
+        cache_status says whether it was fresh, revalidated or a miss.
+        """
+        key = cache_key(url, params)
+        if method.upper() != 'GET':
+            response = send(headers)
+            if response is not None and method.upper() not in ('HEAD', 'OPTIONS', 'TRACE') \
+                    and response.status_code < 400:
+                self.invalidate(key)
+            return response
+
+        start = time.time()
+        request_directives = parse_cache_control(header(headers, 'Cache-Control'))
+        if 'no-store' in request_directives:
+            return send(headers)
+        entry = self.lookup(key, headers)
+        revalidate = 'no-cache' in request_directives or request_directives.get('max-age') == '0' \
+            or header(headers, 'Pragma') == 'no-cache'
+        if entry is not None and not revalidate and entry.is_fresh(start):
+            return self.load(entry, CACHE_FRESH, int((time.time() - start) * 1000))
+
+        conditions = {}
+        if entry is not None:
+            # The caller's own conditions take precedence
+            conditions = {name: value for name, value in entry.validators().items()
+                          if header(headers, name) is None}
+        request_time = time.time()
+        response = send({**headers, **conditions})
+        if response is None:
+            return None
+        response_time = time.time()
+
+        if response.status_code == 304 and entry is not None and conditions:
+            entry = self.refresh(entry, response.headers, request_time, response_time)
+            return self.load(entry, CACHE_REVALIDATED, response.response_time)
+
+        response.cache_status = CACHE_MISS
+        try:
+            if self.storable(headers, response):
+                self.store(key, headers, response, request_time, response_time)
+            elif entry is not None:
+                self.invalidate(key)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Could not cache response for {key}: {e}")
+        return response
@@ -0,0 +1,276 @@
+import os
+import random
+import threading
+import time
+import logging
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import requests
+
+from http_cache import HttpCache
+from http_response import HttpResponse
+from tracing import tracer
+
+# Seconds to wait for a connection or response
+DEFAULT_TIMEOUT = 30
+
+# One session per scheduler thread; sessions are not thread safe
+_sessions = threading.local()
+
+
+class RetryPolicy:
+    """Timeouts and retry behaviour for sending a request.
+
+    A request is retried up to retries times when its method is in
+    retry_methods and it gets a status in retry_statuses or fails with an
+    exception kind in retry_on ('connect', 'timeout' or 'any'). Retries wait
+    for Retry-After when the response has one, otherwise for an exponential
+    backoff with full jitter; waits never exceed backoff_max seconds.
+    """
+
+    DEFAULTS = {
+        'connect_timeout': DEFAULT_TIMEOUT,
+        'read_timeout': DEFAULT_TIMEOUT,
+        'retries': 0,
+        'retry_statuses': [429, 502, 503, 504],
+        'retry_on': ['connect', 'timeout'],
+        'retry_methods': ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'],
+        'backoff': 0.5,
+        'backoff_max': 30.0,
+        'respect_retry_after': True,
+    }
+
+    _EXCEPTIONS = {
+        'connect': requests.exceptions.ConnectionError,
+        'timeout': requests.exceptions.Timeout,
+        'any': requests.exceptions.RequestException,
+    }
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown policy settings: {', '.join(sorted(unknown))}")
+        self.settings = {**self.DEFAULTS, **settings}
+        for key, value in self.settings.items():
+            setattr(self, key, value)
+
+    def merged(self, overrides: Optional[Dict]) -> 'RetryPolicy':
+        """This policy with settings from overrides taking precedence"""
+        return RetryPolicy(**{**self.settings, **(overrides or {})}) if overrides else self
+
+    @property
+    def timeout(self) -> Union[float, Tuple[float, float]]:
+        """Timeout argument for requests: one value, or (connect, read)"""
+        if self.connect_timeout == self.read_timeout:
+            return self.read_timeout
+        return self.connect_timeout, self.read_timeout
+
+    def retries_method(self, method: str) -> bool:
+        return method.upper() in {name.upper() for name in self.retry_methods}
+
+    def retries_status(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def retries_exception(self, error: Exception) -> bool:
+        return any(isinstance(error, self._EXCEPTIONS[kind]) for kind in self.retry_on if kind in self._EXCEPTIONS)
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None,
+              random_value: Callable[[], float] = random.random) -> float:
+        """Seconds to wait after the given zero-based attempt"""
+        if retry_after and self.respect_retry_after:
+            seconds = parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.backoff_max)
+        return random_value() * min(self.backoff_max, self.backoff * 2 ** attempt)
+
+
+def parse_retry_after(value: str) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or as an HTTP date"""
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def open_files(files: Optional[Dict]) -> Tuple[Optional[Dict], List]:
+    """Open multipart files given as paths; returns (files for requests, opened file objects)"""
+    if not files:
+        return None, []
+    processed_files = {}
+    opened_files = []
+    try:
+        for key, value in files.items():
+            if isinstance(value, str):  # File path string
+                if not os.path.exists(value):
+                    raise FileNotFoundError(f"File not found: {value}")
+                if not os.path.isfile(value):
+                    raise ValueError(f"Path is not a file: {value}")
+                # Open file in binary mode
+                file_obj = open(value, 'rb')
+                opened_files.append(file_obj)
+                # Format: (filename, file_obj, content_type) or just file_obj
+                processed_files[key] = (os.path.basename(value), file_obj)
+            elif isinstance(value, tuple):
+                # Already a tuple (filename, file_obj) or (filename, file_obj, content_type)
+                processed_files[key] = value
+                if len(value) > 1 and hasattr(value[1], 'read'):
+                    opened_files.append(value[1])
+            else:
+                # File object already
+                processed_files[key] = value
+                opened_files.append(value)
+    except Exception:
+        close_files(opened_files)
+        raise
+    return processed_files, opened_files
+
+
+def close_files(opened_files: List):
+    """Close files opened for an upload, logging failures"""
+    for file_obj in opened_files:
+        try:
+            if hasattr(file_obj, 'close'):
+                file_obj.close()
+        except Exception as e:
+            logging.warning(f"Error closing file: {e}")
+
+
+def thread_session() -> requests.Session:
+    """Session of the calling thread, kept for its connection pool.
+
+    Requests are sent from the scheduler's worker threads, so each thread
+    reuses one session instead of opening a pool per request.
+    """
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+
+def _wait(seconds: float, stopped: Callable[[], bool]) -> bool:
+    """Sleep for seconds unless stopped first; returns False if stopped"""
+    deadline = time.monotonic() + seconds
+    while not stopped():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(remaining, 0.1))
+    return False
+
+
+def _trace_network(method: str, url: str, record: Dict, started: float, elapsed=None):
+    """Record an attempt as a network span, split where the headers arrived"""
+    trace = tracer()
+    if not trace.enabled:
+        return
+    ended = time.perf_counter()
+    trace.add_span('network', started, ended, 'network', {'method': method, 'url': url, **record})
+    # requests measures the time until the headers were parsed
+    if isinstance(elapsed, timedelta):
+        headers_at = min(ended, started + elapsed.total_seconds())
+        trace.add_span('network.headers', started, headers_at, 'network')
+        trace.add_span('network.body', headers_at, ended, 'network')
+
+
+def send_request(method: str, url: str, headers: Dict, data: Optional[str] = None,
+                 params: Optional[Dict] = None, verify: bool = True, files: Optional[Dict] = None,
+                 session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT,
+                 should_stop: Optional[Callable[[], bool]] = None, policy: Optional[RetryPolicy] = None,
+                 on_attempt: Optional[Callable[[Dict], None]] = None,
+                 cache: Optional[HttpCache] = None) -> Optional[HttpResponse]:
+    """Send a request, retrying as the policy allows, and return the decoded response.
+
+    Without a policy the request is sent once with the given timeout. With a
+    cache, GET responses are answered from or stored in it. Each
+    attempt is described by a dict with its number, status_code or error,
+    response_time and the delay waited after it; they are passed to
+    on_attempt as they finish and kept on the response. Returns None if
+    should_stop reports a cancellation. Raises
+    requests.exceptions.RequestException for network errors and
+    FileNotFoundError or ValueError for unusable upload files.
+    """
+    if cache is not None:
+        return cache.fetch(method, url, headers, params, lambda request_headers: send_request(
+            method, url, request_headers, data, params, verify, files, session, timeout,
+            should_stop, policy, on_attempt))
+
+    def stopped() -> bool:
+        return should_stop is not None and should_stop()
+
+    policy = policy or RetryPolicy(connect_timeout=timeout, read_timeout=timeout)
+    retries = policy.retries if policy.retries_method(method) else 0
+    attempts = []
+    session = session or requests.Session()
+    attempt = 0
+    while True:
+        # Files are reopened for every attempt; a sent file is consumed
+        processed_files, opened_files = open_files(files)
+        record = {'attempt': attempt + 1}
+        retry_after = None
+        try:
+            if stopped():
+                return None
+
+            start_time = time.time()
+            started = time.perf_counter()
+            try:
+                response = session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    data=data,
+                    params=params,
+                    files=processed_files,
+                    timeout=policy.timeout,
+                    verify=verify
+                )
+            except requests.exceptions.RequestException as e:
+                record.update(error=str(e), response_time=int((time.time() - start_time) * 1000))
+                _trace_network(method, url, record, started)
+                if attempt >= retries or not policy.retries_exception(e):
+                    attempts.append(record)
+                    if on_attempt:
+                        on_attempt(record)
+                    raise
+            else:
+                response_time = int((time.time() - start_time) * 1000)
+                record.update(status_code=response.status_code, response_time=response_time)
+                _trace_network(method, url, record, started, response.elapsed)
+                if attempt >= retries or not policy.retries_status(response.status_code):
+                    attempts.append(record)
+                    if on_attempt:
+                        on_attempt(record)
+                    break
+                retry_after = response.headers.get('Retry-After')
+        finally:
+            close_files(opened_files)
+
+        record['delay'] = round(policy.delay(attempt, retry_after), 3)
+        attempts.append(record)
+        if on_attempt:
+            on_attempt(record)
+        logging.info(f"Retrying {method} {url} in {record['delay']} s after attempt {attempt + 1}")
+        if not _wait(record['delay'], stopped):
+            return None
+        attempt += 1
+
+    if stopped():
+        return None
+
+    result = HttpResponse(
+        response.status_code,
+        dict(response.headers),
+        dict(response.cookies),
+        response.content,
+        response_time,
+        attempts=attempts
+    )
+    # Decode here rather than on the caller's thread; requests would run
+    # charset detection over the whole body when none is declared
+    with tracer().span('decode', 'network', size=result.size):
+        result.decode()
+    return result
@@ -0,0 +1,134 @@
+import codecs
+import json
+from typing import Any, Dict, List, Optional
+
+
+def header(headers: Dict[str, str], name: str) -> Optional[str]:
+    """Header value looked up case-insensitively"""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class HttpResponse:
+    """A received response that holds the body bytes once.
+
+    The text is decoded on first use and cached. Instances are passed by
+    reference through signals, rendering and history storage. Dictionary
+    style access (response['text'], response.get('size')) is kept for code
+    written against the former result dicts.
+    """
+
+    __slots__ = ('status_code', 'headers', 'cookies', 'content', 'response_time', 'attempts', 'cache_status',
+                 '_text', '_encoding')
+
+    _FIELDS = ('status_code', 'headers', 'cookies', 'text', 'encoding', 'response_time', 'size')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], cookies: Dict[str, str],
+                 content: bytes, response_time: int, text: Optional[str] = None,
+                 encoding: Optional[str] = None, attempts: Optional[List[Dict]] = None,
+                 cache_status: Optional[str] = None):
+        self.status_code = status_code
+        self.headers = headers
+        self.cookies = cookies
+        self.content = content or b""
+        self.response_time = response_time
+        # One entry per attempt when the request was retried
+        self.attempts = attempts if attempts and len(attempts) > 1 else None
+        # 'fresh', 'revalidated' or 'miss' when sent through a response cache
+        self.cache_status = cache_status
+        self._text = text
+        self._encoding = encoding
+
+    @property
+    def content_type(self) -> str:
+        # Headers keep the server's casing
+        return header(self.headers, 'Content-Type') or ''
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    def decode(self):
+        """Decode the body now unless it already is"""
+        if self._text is None:
+            # Imported on use; charset detection is not needed at startup
+            from charset import decode_body
+            self._text, encoding = decode_body(self.content, self.content_type)
+            if self._encoding is None:
+                self._encoding = encoding
+
+    @property
+    def text(self) -> str:
+        """Decoded body, decoded on first access"""
+        self.decode()
+        return self._text
+
+    @property
+    def encoding(self) -> str:
+        """Encoding the body is, or will be, decoded with"""
+        if self._encoding is None:
+            self.decode()
+        return self._encoding
+
+    @property
+    def is_utf8(self) -> bool:
+        """Whether the raw bytes can be displayed without re-encoding"""
+        return self.encoding in ('utf-8', 'ascii') and not self.content.startswith(codecs.BOM_UTF8)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELDS and key != 'content':
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._FIELDS or key == 'content'
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dictionary style access with a default"""
+        return self[key] if key in self else default
+
+    def metadata(self) -> Dict:
+        """Everything except the body, as stored in history.response_data"""
+        metadata = {
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'cookies': self.cookies,
+            'encoding': self.encoding,
+            'response_time': self.response_time,
+            'size': self.size,
+        }
+        if self.attempts:
+            metadata['attempts'] = self.attempts
+        if self.cache_status:
+            metadata['cache_status'] = self.cache_status
+        return metadata
+
+    @classmethod
+    def from_history(cls, response_data: Optional[str], response_body: Optional[bytes] = None) -> 'HttpResponse':
+        """Rebuild a response from a history row.
+
+        Older rows keep the decoded text inside response_data instead of a
+        separate response_body column.
+        """
+        try:
+            data = json.loads(response_data or '{}')
+        except (json.JSONDecodeError, TypeError):
+            data = {}
+        text = None
+        if response_body is None:
+            text = data.get('text', '') or ''
+            response_body = text.encode('utf-8')
+        return cls(
+            data.get('status_code', 0),
+            data.get('headers', {}),
+            data.get('cookies', {}),
+            bytes(response_body),
+            data.get('response_time', 0),
+            text=text,
+            encoding=data.get('encoding') if text is None else 'utf-8',
+            attempts=data.get('attempts'),
+            cache_status=data.get('cache_status'),
+        )
@@ -0,0 +1,274 @@
+"""A small JSONPath implementation for querying decoded JSON documents.
+
+Supported syntax: $, .name, ['name'], [n], [-n], [a,b], [start:stop:step],
+* and [*], recursive descent with .., and filters such as [?(@.price < 10)],
+[?(@.name == 'x')] or [?(@.tag)].
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Iterator, List, Tuple
+
+# Number of compiled expressions kept
+COMPILED_CACHE_SIZE = 128
+
+Match = Tuple[str, Any]
+
+_NAME = re.compile(r'[A-Za-z_$][\w$-]*')
+_FILTER = re.compile(
+    r'\?\(\s*@((?:\.[A-Za-z_$][\w$-]*|\[\d+\]|\[\'[^\']*\'\]|\["[^"]*"\])*)'
+    r'\s*(?:(==|!=|<=|>=|<|>)\s*(.+?))?\s*\)$'
+)
+_FILTER_STEP = re.compile(r'\.([A-Za-z_$][\w$-]*)|\[(\d+)\]|\[\'([^\']*)\'\]|\["([^"]*)"\]')
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+
+def child_path(path: str, key: Any) -> str:
+    """Append an object key or array index to a JSONPath"""
+    if isinstance(key, int):
+        return f'{path}[{key}]'
+    if key.isidentifier():
+        return f'{path}.{key}'
+    return f'{path}[{json.dumps(key)}]'
+
+
+def _children(path: str, value: Any) -> Iterator[Match]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield child_path(path, key), child
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            yield child_path(path, index), child
+
+
+def _descendants(path: str, value: Any) -> Iterator[Match]:
+    """The value itself and everything below it, depth first"""
+    stack = [(path, value)]
+    while stack:
+        path, value = stack.pop()
+        yield path, value
+        stack.extend(reversed(list(_children(path, value))))
+
+
+def _select_key(key: str) -> Callable:
+    def select(path, value):
+        if isinstance(value, dict) and key in value:
+            yield child_path(path, key), value[key]
+    return select
+
+
+def _select_index(index: int) -> Callable:
+    def select(path, value):
+        if isinstance(value, list) and -len(value) <= index < len(value):
+            position = index % len(value)
+            yield child_path(path, position), value[position]
+    return select
+
+
+def _select_slice(start, stop, step) -> Callable:
+    if step == 0:
+        raise ValueError("Slice step cannot be zero")
+
+    def select(path, value):
+        if isinstance(value, list):
+            for position in range(*slice(start, stop, step).indices(len(value))):
+                yield child_path(path, position), value[position]
+    return select
+
+
+def _select_union(selectors: List[Callable]) -> Callable:
+    def select(path, value):
+        for selector in selectors:
+            yield from selector(path, value)
+    return select
+
+
+def _parse_literal(text: str) -> Any:
+    if text.startswith("'") and text.endswith("'") and len(text) >= 2:
+        return text[1:-1]
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise ValueError(f"Invalid literal in filter: {text}")
+
+
+def _select_filter(expression: str) -> Callable:
+    match = _FILTER.match(expression)
+    if match is None:
+        raise ValueError(f"Unsupported filter: [{expression}]")
+    steps = []
+    for step in _FILTER_STEP.finditer(match.group(1)):
+        name, index, single, double = step.groups()
+        steps.append(int(index) if index is not None else next(
+            part for part in (name, single, double) if part is not None))
+    operator = _OPERATORS.get(match.group(2)) if match.group(2) else None
+    literal = _parse_literal(match.group(3).strip()) if operator else None
+
+    def resolve(value):
+        for step in steps:
+            if isinstance(step, int):
+                if not isinstance(value, list) or step >= len(value):
+                    raise LookupError
+            elif not isinstance(value, dict) or step not in value:
+                raise LookupError
+            value = value[step]
+        return value
+
+    def test(value):
+        try:
+            found = resolve(value)
+        except LookupError:
+            return False
+        if operator is None:
+            return True
+        try:
+            return operator(found, literal)
+        except TypeError:
+            return False
+
+    def select(path, value):
+        for item_path, child in _children(path, value):
+            if test(child):
+                yield item_path, child
+    return select
+
+
+def _parse_bracket(content: str) -> Callable:
+    content = content.strip()
+    if content == '*':
+        return _children
+    if content.startswith('?'):
+        return _select_filter(content)
+
+    parts = [part.strip() for part in _split_union(content)]
+    selectors = []
+    for part in parts:
+        if part[:1] in ('"', "'"):
+            if len(part) < 2 or part[-1] != part[0]:
+                raise ValueError(f"Unterminated name: {part}")
+            selectors.append(_select_key(part[1:-1]))
+        elif ':' in part:
+            bounds = part.split(':')
+            if len(bounds) > 3:
+                raise ValueError(f"Invalid slice: {part}")
+            try:
+                numbers = [int(bound) if bound.strip() else None for bound in bounds]
+            except ValueError:
+                raise ValueError(f"Invalid slice: {part}")
+            selectors.append(_select_slice(*(numbers + [None] * (3 - len(numbers)))))
+        else:
+            try:
+                selectors.append(_select_index(int(part)))
+            except ValueError:
+                raise ValueError(f"Invalid index: {part}")
+    return selectors[0] if len(selectors) == 1 else _select_union(selectors)
+
+
+def _split_union(content: str) -> List[str]:
+    """Split a bracket selector on commas outside quotes"""
+    parts = []
+    current = []
+    quote = None
+    for char in content:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == ',':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def _find_bracket_end(expression: str, start: int) -> int:
+    """Index of the ']' closing the bracket opened at start"""
+    quote = None
+    depth = 0
+    for position in range(start, len(expression)):
+        char = expression[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ']' and depth == 0:
+            return position
+    raise ValueError("Unclosed '['")
+
+
+class JsonPath:
+    """A compiled JSONPath expression"""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        # Each step is (recursive, selector)
+        self.steps = self._parse(expression.strip())
+
+    @staticmethod
+    def _parse(expression: str) -> List[Tuple[bool, Callable]]:
+        if not expression.startswith('$'):
+            raise ValueError("JSONPath must start with '$'")
+        steps = []
+        position = 1
+        length = len(expression)
+        while position < length:
+            recursive = expression.startswith('..', position)
+            if recursive:
+                position += 2
+            elif expression[position] == '.':
+                position += 1
+            elif expression[position] != '[':
+                raise ValueError(f"Unexpected '{expression[position]}' at {position}")
+
+            if position < length and expression[position] == '[':
+                end = _find_bracket_end(expression, position + 1)
+                steps.append((recursive, _parse_bracket(expression[position + 1:end])))
+                position = end + 1
+            elif position < length and expression[position] == '*':
+                steps.append((recursive, _children))
+                position += 1
+            else:
+                name = _NAME.match(expression, position)
+                if name is None:
+                    raise ValueError(f"Expected a name at {position}")
+                steps.append((recursive, _select_key(name.group())))
+                position = name.end()
+        return steps
+
+    def iter_matches(self, document: Any) -> Iterator[Match]:
+        """Lazily yield (path, value) pairs matching the expression"""
+        matches = iter([('$', document)])
+        for recursive, selector in self.steps:
+            matches = self._apply(matches, recursive, selector)
+        return matches
+
+    @staticmethod
+    def _apply(matches: Iterator[Match], recursive: bool, selector: Callable) -> Iterator[Match]:
+        for path, value in matches:
+            if recursive:
+                for descendant_path, descendant in _descendants(path, value):
+                    yield from selector(descendant_path, descendant)
+            else:
+                yield from selector(path, value)
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_json_path(expression: str) -> JsonPath:
+    """Compile an expression, reusing earlier compilations; raises ValueError"""
+    return JsonPath(expression)
@@ -0,0 +1,260 @@
+import json
+from typing import Any, List, Optional
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+# Arrays with more elements than this are shown as groups of
+# ARRAY_PAGE_SIZE elements, indexed by offset
+ARRAY_PAGE_SIZE = 1000
+# Scalar values are cut to this many characters in the Value column
+VALUE_PREVIEW_CHARS = 200
+# Values counted for a node's total on the GUI thread before giving up
+SUBTREE_COUNT_LIMIT = 100000
+
+_UNCOUNTED = object()
+
+COLUMN_KEY = 0
+COLUMN_VALUE = 1
+COLUMN_TYPE = 2
+COLUMN_SIZE = 3
+COLUMNS = ['Key', 'Value', 'Type', 'Size']
+
+
+def count_values(values: List[Any], limit: Optional[int] = None) -> Optional[int]:
+    """Number of values in a list of values and below them; None once over limit"""
+    values = list(values)
+    total = len(values)
+    while values:
+        if limit is not None and total > limit:
+            return None
+        value = values.pop()
+        if isinstance(value, dict):
+            total += len(value)
+            values.extend(value.values())
+        elif isinstance(value, list):
+            total += len(value)
+            values.extend(value)
+    return total if limit is None or total <= limit else None
+
+
+class JsonNode:
+    """One row of the tree: a JSON value, or a range of array elements.
+
+    Children are created one row at a time when Qt asks for them, so only
+    expanded and visible parts of a document ever get a node.
+    """
+
+    __slots__ = ('parent', 'row', 'key', 'value', 'start', 'stop', '_children', '_keys', '_subtree_size')
+
+    def __init__(self, parent: Optional['JsonNode'], row: int, key: Any, value: Any,
+                 start: int = 0, stop: Optional[int] = None):
+        self.parent = parent
+        self.row = row
+        self.key = key
+        self.value = value
+        # Element range of the array shown under this node; stop is None
+        # unless the node is a page of a larger array
+        self.start = start
+        self.stop = stop
+        self._children = {}
+        self._keys = None
+        self._subtree_size = _UNCOUNTED
+
+    @property
+    def is_range(self) -> bool:
+        return self.stop is not None
+
+    @property
+    def element_count(self) -> int:
+        """Number of array elements or object members below this node"""
+        if self.is_range:
+            return self.stop - self.start
+        if isinstance(self.value, (dict, list)):
+            return len(self.value)
+        return 0
+
+    def child_count(self) -> int:
+        count = self.element_count
+        if isinstance(self.value, list) and count > ARRAY_PAGE_SIZE:
+            return (count + ARRAY_PAGE_SIZE - 1) // ARRAY_PAGE_SIZE
+        return count
+
+    def child(self, row: int) -> 'JsonNode':
+        """Return the node for a row, creating it on first use"""
+        node = self._children.get(row)
+        if node is not None:
+            return node
+
+        value = self.value
+        if isinstance(value, dict):
+            if self._keys is None:
+                self._keys = list(value)
+            key = self._keys[row]
+            node = JsonNode(self, row, key, value[key])
+        elif self.element_count > ARRAY_PAGE_SIZE:
+            # Group elements of large arrays into pages
+            start = self.start + row * ARRAY_PAGE_SIZE
+            stop = min(start + ARRAY_PAGE_SIZE, self.start + self.element_count)
+            node = JsonNode(self, row, None, value, start, stop)
+        else:
+            index = self.start + row
+            node = JsonNode(self, row, index, value[index])
+        self._children[row] = node
+        return node
+
+    def children_values(self) -> List[Any]:
+        if self.is_range:
+            return self.value[self.start:self.stop]
+        if isinstance(self.value, dict):
+            return list(self.value.values())
+        if isinstance(self.value, list):
+            return self.value
+        return []
+
+    def subtree_size(self) -> Optional[int]:
+        """Number of values below this node, counted when first shown and cached.
+
+        Counting stops after SUBTREE_COUNT_LIMIT values, so a node of a huge
+        document costs bounded time to paint; it returns None then.
+        """
+        if self._subtree_size is _UNCOUNTED:
+            self._subtree_size = count_values(self.children_values(), SUBTREE_COUNT_LIMIT)
+        return self._subtree_size
+
+    def path(self) -> str:
+        """JSONPath of the value, e.g. $.items[3].name"""
+        parts = []
+        node = self
+        # The document itself is the only child of a parentless holder node
+        while node.parent is not None and node.parent.parent is not None:
+            if node.is_range:
+                node = node.parent
+                continue
+            if isinstance(node.key, int):
+                parts.append(f'[{node.key}]')
+            elif node.key.isidentifier():
+                parts.append(f'.{node.key}')
+            else:
+                parts.append(f'[{json.dumps(node.key)}]')
+            node = node.parent
+        return '$' + ''.join(reversed(parts))
+
+
+def json_type_name(value: Any) -> str:
+    """JSON type of a decoded value"""
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, list):
+        return 'array'
+    if isinstance(value, str):
+        return 'string'
+    if isinstance(value, bool):
+        return 'boolean'
+    if value is None:
+        return 'null'
+    return 'number'
+
+
+class JsonTreeModel(QAbstractItemModel):
+    """Tree model over a decoded JSON document.
+
+    The document is shown below a single root row labelled '$'.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._root = JsonNode(None, 0, None, [])
+
+    def set_document(self, document: Any, total: Optional[int] = None):
+        """Show a decoded JSON document; total is its value count if already known"""
+        self.beginResetModel()
+        holder = JsonNode(None, 0, None, [document])
+        holder.child(0).key = '$'
+        if total is not None:
+            holder.child(0)._subtree_size = total
+        self._root = holder
+        self.endResetModel()
+
+    def clear(self):
+        """Remove the document"""
+        self.beginResetModel()
+        self._root = JsonNode(None, 0, None, [])
+        self.endResetModel()
+
+    def node(self, index: QModelIndex) -> JsonNode:
+        """Node behind an index; the hidden root for invalid indexes"""
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        return self.createIndex(row, column, self.node(parent).child(row))
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return self.node(parent).child_count()
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(COLUMNS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return self.rowCount(parent) > 0
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.ToolTipRole:
+            return node.path()
+        if role != Qt.DisplayRole:
+            return None
+
+        column = index.column()
+        if column == COLUMN_KEY:
+            if node.is_range:
+                return f'[{node.start} … {node.stop - 1}]'
+            return str(node.key)
+        if column == COLUMN_VALUE:
+            return self._preview(node)
+        if column == COLUMN_TYPE:
+            return 'range' if node.is_range else json_type_name(node.value)
+        if column == COLUMN_SIZE:
+            if node.is_range or isinstance(node.value, (dict, list)):
+                total = node.subtree_size()
+                if total is None:
+                    return f'{node.element_count} items, over {SUBTREE_COUNT_LIMIT} total'
+                return f'{node.element_count} items, {total} total'
+            return None
+        return None
+
+    @staticmethod
+    def _preview(node: JsonNode) -> str:
+        if node.is_range:
+            return ''
+        value = node.value
+        if isinstance(value, dict):
+            return '{…}' if value else '{}'
+        if isinstance(value, list):
+            return '[…]' if value else '[]'
+        text = json.dumps(value, ensure_ascii=False)
+        if len(text) > VALUE_PREVIEW_CHARS:
+            text = text[:VALUE_PREVIEW_CHARS] + '…'
+        return text
+
+    def path(self, index: QModelIndex) -> str:
+        """JSONPath of the value at an index"""
+        return self.node(index).path() if index.isValid() else '$'
+
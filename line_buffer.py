@@ -0,0 +1,192 @@
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+# Newlines are counted per chunk up front; exact line offsets are only
+# computed for the chunks that are actually displayed or searched.
+CHUNK_SIZE = 256 * 1024
+# Number of per-chunk line indexes kept in memory
+CHUNK_CACHE_SIZE = 64
+# Lines longer than this are decoded in windows instead of all at once
+LONG_LINE_BYTES = 4096
+
+
+def _needle_pattern(needle: str, case_sensitive: bool) -> re.Pattern:
+    """Bytes pattern for a search; ignoring case covers non-ASCII letters too"""
+    if case_sensitive:
+        return re.compile(re.escape(needle.encode('utf-8')))
+    if needle.isascii():
+        return re.compile(re.escape(needle.encode('utf-8')), re.IGNORECASE)
+    # re only folds ASCII in bytes patterns, so other letters match any of
+    # their single-character case variants
+    parts = []
+    for char in needle:
+        variants = sorted({variant.encode('utf-8') for variant in (char, char.lower(), char.upper())
+                           if len(variant) == 1})
+        escaped = [re.escape(variant) for variant in variants]
+        parts.append(escaped[0] if len(escaped) == 1 else b'(?:' + b'|'.join(escaped) + b')')
+    return re.compile(b''.join(parts), re.IGNORECASE)
+
+
+class LineBuffer:
+    """Read-only, line-addressable view over a UTF-8 encoded body.
+
+    The body is held once, either as bytes in memory or as a memory-mapped
+    spill file, and lines are decoded on demand.
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap], path: Optional[str] = None):
+        self._data = data
+        self._size = len(data)
+        self.path = path
+        self._newlines_before = array('q', [0])
+        for start in range(0, self._size, CHUNK_SIZE):
+            count = data[start:start + CHUNK_SIZE].count(b'\n')
+            self._newlines_before.append(self._newlines_before[-1] + count)
+        self._chunk_cache = OrderedDict()
+
+    @classmethod
+    def from_text(cls, text: str) -> 'LineBuffer':
+        """Create a buffer from decoded text"""
+        return cls((text or "").encode('utf-8', errors='replace'))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'LineBuffer':
+        """Create a buffer backed by a memory-mapped file"""
+        if os.path.getsize(path) == 0:
+            return cls(b"", path)
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data, path)
+
+    @property
+    def size(self) -> int:
+        """Size of the body in bytes"""
+        return self._size
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counting a trailing empty line after a final newline"""
+        return self._newlines_before[-1] + 1
+
+    def _chunk_newlines(self, chunk: int) -> array:
+        """Absolute positions of the newlines inside a chunk"""
+        positions = self._chunk_cache.get(chunk)
+        if positions is not None:
+            self._chunk_cache.move_to_end(chunk)
+            return positions
+
+        positions = array('q')
+        start = chunk * CHUNK_SIZE
+        end = min(start + CHUNK_SIZE, self._size)
+        find = self._data.find
+        pos = find(b'\n', start, end)
+        while pos != -1:
+            positions.append(pos)
+            pos = find(b'\n', pos + 1, end)
+
+        self._chunk_cache[chunk] = positions
+        if len(self._chunk_cache) > CHUNK_CACHE_SIZE:
+            self._chunk_cache.popitem(last=False)
+        return positions
+
+    def _newline_position(self, number: int) -> int:
+        """Absolute position of the n-th newline (1-based)"""
+        chunk = bisect_right(self._newlines_before, number - 1) - 1
+        positions = self._chunk_newlines(chunk)
+        return positions[number - 1 - self._newlines_before[chunk]]
+
+    def line_span(self, line: int) -> Tuple[int, int]:
+        """Byte range of a line, excluding the line terminator"""
+        if line < 0 or line >= self.line_count:
+            raise IndexError(f"Line {line} out of range")
+        start = 0 if line == 0 else self._newline_position(line) + 1
+        end = self._size if line == self.line_count - 1 else self._newline_position(line + 1)
+        if end > start and self._data[end - 1:end] == b'\r':
+            end -= 1
+        return start, end
+
+    def line(self, line: int, start_col: int = 0, max_chars: Optional[int] = None) -> str:
+        """Decode a line, or a column window of it for very long lines"""
+        start, end = self.line_span(line)
+        if end - start <= LONG_LINE_BYTES and start_col == 0 and max_chars is None:
+            return bytes(self._data[start:end]).decode('utf-8', errors='replace')
+
+        # Columns of long lines are approximated by bytes; partial multi-byte
+        # sequences at the window edges are dropped.
+        window_start = min(start + start_col, end)
+        window_end = end if max_chars is None else min(window_start + max_chars, end)
+        return bytes(self._data[window_start:window_end]).decode('utf-8', errors='ignore')
+
+    def line_length(self, line: int) -> int:
+        """Length of a line in bytes"""
+        start, end = self.line_span(line)
+        return end - start
+
+    def line_of_offset(self, offset: int) -> int:
+        """Line containing the given byte offset"""
+        chunk = min(offset // CHUNK_SIZE, len(self._newlines_before) - 2)
+        if chunk < 0:
+            return 0
+        positions = self._chunk_newlines(chunk)
+        return self._newlines_before[chunk] + bisect_right(positions, offset - 1)
+
+    def find(self, needle: str, offset: int = 0, case_sensitive: bool = False) -> Optional[Tuple[int, int]]:
+        """Find text from a byte offset, wrapping around once.
+
+        Returns (line, byte column) of the match or None.
+        """
+        found = self.search(needle, offset, case_sensitive)
+        return found[:2] if found else None
+
+    def search(self, needle: str, offset: int = 0,
+               case_sensitive: bool = False) -> Optional[Tuple[int, int, int]]:
+        """Like find, but returns (line, byte column, byte length) of the match.
+
+        Case is folded per character for non-ASCII text too, so the length of
+        a match may differ from the needle's.
+        """
+        if not needle or not self._size:
+            return None
+        pattern = _needle_pattern(needle, case_sensitive)
+        match = pattern.search(self._data, min(offset, self._size))
+        if match is None and offset > 0:
+            match = pattern.search(self._data, 0)
+        if match is None:
+            return None
+        line = self.line_of_offset(match.start())
+        return line, match.start() - self.line_span(line)[0], match.end() - match.start()
+
+    def char_count(self, line: int, start_col: int, end_col: int) -> int:
+        """Characters decoded from the byte columns [start_col, end_col) of a line"""
+        start, end = self.line_span(line)
+        data = self._data[start + max(0, start_col):start + min(end - start, end_col)]
+        return len(bytes(data).decode('utf-8', errors='replace'))
+
+    def offset_of(self, line: int, column: int = 0) -> int:
+        """Byte offset of a line/column position"""
+        return self.line_span(line)[0] + column
+
+    def text(self) -> str:
+        """Decode the whole body"""
+        return bytes(self._data).decode('utf-8', errors='replace')
+
+    def write_to(self, f, block_size: int = CHUNK_SIZE):
+        """Write the body to a binary file object without copying it whole"""
+        data = self._data
+        with memoryview(data) as view:
+            for start in range(0, len(view), block_size):
+                f.write(view[start:start + block_size])
+
+    def close(self):
+        """Release the underlying mapping"""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        self._size = 0
+        self._newlines_before = array('q', [0])
+        self._chunk_cache.clear()
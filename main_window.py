@@ -1,16 +1,26 @@
 import json
 import logging
+import os
+from typing import Callable, Dict, Iterator, List, Optional
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QTabWidget,
     QTreeView, QListWidget, QComboBox, QPushButton, QLabel, QInputDialog,
-    QMessageBox, QListWidgetItem, QDialog
+    QMessageBox, QListWidgetItem, QDialog, QAbstractItemView, QMenu
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QStandardItemModel, QStandardItem, QShortcut, QKeySequence, QPalette, QColor
 
 from database import DatabaseManager
+from constants import HTTP_CACHE_DIR, LOAD_BATCH_SIZE, PRELOAD_MODULES
 from request_tab import RequestTab
+from request_model import RequestModel
+from format_worker import format_executor
+from http_cache import HttpCache
+from scheduler import request_scheduler
+from tracing import tracer
+from event_loop_monitor import EventLoopMonitor
 from environments_dialog import EnvironmentsDialog
+from diff_dialog import DiffDialog, response_from_history, describe_history
 
 
 class MainWindow(QMainWindow):
@@ -19,8 +29,12 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.db_manager = DatabaseManager()
+        self._load_generations = {}
+        # Set while the response cache is enabled
+        self.http_cache: Optional[HttpCache] = None
         self.init_ui()
-        self.load_data()
+        # Data is loaded once the event loop runs, so the window appears first
+        QTimer.singleShot(0, self.load_data)
 
     def init_ui(self):
         self.setWindowTitle("pyPost - API Testing Tool")
@@ -55,6 +69,46 @@ class MainWindow(QMainWindow):
 
         # Status bar
         self.statusBar().showMessage("Ready")
+        self.queue_label = QLabel()
+        self.queue_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.queue_label)
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.update_queue_status)
+        self.responsiveness_label = QLabel()
+        self.statusBar().addPermanentWidget(self.responsiveness_label)
+        self.event_loop_monitor = EventLoopMonitor(self)
+        self.event_loop_monitor.start()
+        self.queue_timer.timeout.connect(self.update_responsiveness)
+        self.queue_timer.start(1000)
+
+    def update_queue_status(self):
+        """Show outbound requests in flight and queued, while there are any"""
+        metrics = request_scheduler().metrics()
+        busy = metrics['running'] > 0 or metrics['queued'] > 0
+        self.queue_label.setVisible(busy)
+        if busy:
+            self.queue_label.setText(f"Requests: {metrics['running']} running, {metrics['queued']} queued")
+            self.queue_label.setToolTip("\n".join(
+                f"{host}: {count} running" for host, count in sorted(metrics['running_by_host'].items())
+            ))
+
+    def update_responsiveness(self):
+        """Show event loop latency over the last minute, flagging stalls"""
+        metrics = self.event_loop_monitor.metrics()
+        if not metrics['samples']:
+            return
+        text = f"UI {metrics['p95_ms']:.0f} ms"
+        if metrics['recent_stalls']:
+            text += f", {metrics['recent_stalls']} stalled"
+        self.responsiveness_label.setText(text)
+        tooltip = (f"Event loop latency: median {metrics['p50_ms']:.0f} ms, p95 {metrics['p95_ms']:.0f} ms, "
+                   f"max {metrics['max_ms']:.0f} ms\nStalls since start: {metrics['stalls']}")
+        last_stall = self.event_loop_monitor.detector.last_stall
+        if last_stall:
+            tooltip += f"\nLast stall: {last_stall['duration_ms']} ms"
+            if last_stall['where']:
+                tooltip += f" in {last_stall['where']}"
+        self.responsiveness_label.setToolTip(tooltip)
 
     def create_sidebar(self) -> QWidget:
         """Create left sidebar with collections and history"""
@@ -69,10 +123,18 @@ class MainWindow(QMainWindow):
         self.collections_model = QStandardItemModel()
         self.collections_tree.setModel(self.collections_model)
         self.collections_tree.setHeaderHidden(True)
+        self.collections_tree.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.collections_tree.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.collections_tree.customContextMenuRequested.connect(self.show_collections_menu)
+        self.collections_tree.doubleClicked.connect(self.load_request_from_collection)
         self.sidebar_tabs.addTab(self.collections_tree, "Collections")
 
         # History tab
         self.history_list = QListWidget()
+        self.history_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.history_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.history_list.customContextMenuRequested.connect(self.show_history_menu)
+        self.history_list.doubleClicked.connect(self.load_request_from_history)
         self.sidebar_tabs.addTab(self.history_list, "History")
 
         layout.addWidget(self.sidebar_tabs)
@@ -119,7 +181,7 @@ class MainWindow(QMainWindow):
 
         new_request_action = file_menu.addAction("New Request")
         new_request_action.setShortcut(QKeySequence("Ctrl+N"))
-        new_request_action.triggered.connect(self.add_request_tab)
+        new_request_action.triggered.connect(lambda: self.add_request_tab())
 
         save_request_action = file_menu.addAction("Save Request")
         save_request_action.setShortcut(QKeySequence("Ctrl+S"))
@@ -145,17 +207,73 @@ class MainWindow(QMainWindow):
         self.dark_mode_action.setCheckable(True)
         self.dark_mode_action.triggered.connect(self.toggle_dark_mode)
 
+        view_menu.addSeparator()
+
+        self.response_cache_action = view_menu.addAction("Use Response Cache")
+        self.response_cache_action.setCheckable(True)
+        self.response_cache_action.triggered.connect(self.toggle_response_cache)
+
+        clear_cache_action = view_menu.addAction("Clear Response Cache")
+        clear_cache_action.triggered.connect(self.clear_response_cache)
+
+        view_menu.addSeparator()
+
+        self.trace_action = view_menu.addAction("Record Trace")
+        self.trace_action.setCheckable(True)
+        self.trace_action.triggered.connect(self.toggle_tracing)
+
+        export_trace_action = view_menu.addAction("Export Trace...")
+        export_trace_action.triggered.connect(self.export_trace)
+
+        view_menu.addSeparator()
+
+        compare_baseline_action = view_menu.addAction("Compare Response with Baseline")
+        compare_baseline_action.triggered.connect(self.compare_response_with_baseline)
+
         # Help menu
         help_menu = menubar.addMenu("Help")
         about_action = help_menu.addAction("About")
         about_action.triggered.connect(self.show_about)
 
     def load_data(self):
-        """Load data from database"""
+        """Load data from database; collections and history stream in afterwards"""
+        self.load_settings()
         self.load_environments()
         self.load_collections()
-        self.load_history()
-        self.load_settings()
+        self.load_history(on_finished=self.preload_modules)
+
+    def preload_modules(self):
+        """Import modules deferred at startup in the background, ahead of first use"""
+        import importlib
+        for name in PRELOAD_MODULES:
+            format_executor().submit(importlib.import_module, name)
+
+    def _stream_batches(self, name: str, batches: Iterator[List[Dict]], add_batch: Callable,
+                        on_finished: Optional[Callable] = None):
+        """Apply query results one batch per event loop turn.
+
+        Starting another stream with the same name abandons this one.
+        """
+        generation = self._load_generations.get(name, 0) + 1
+        self._load_generations[name] = generation
+
+        def step():
+            if self._load_generations.get(name) != generation:
+                batches.close()
+                return
+            try:
+                batch = next(batches, None)
+            except Exception as e:
+                logging.warning(f"Failed to load {name}: {e}")
+                return
+            if batch is None:
+                if on_finished:
+                    on_finished()
+                return
+            add_batch(batch)
+            QTimer.singleShot(0, step)
+
+        step()
 
     def load_environments(self):
         """Load environments into selector"""
@@ -166,66 +284,78 @@ class MainWindow(QMainWindow):
 
     def load_collections(self):
         """Load collections into tree view"""
-        collections = self.db_manager.execute_query(
-            "SELECT * FROM collections ORDER BY parent_id, name"
-        )
-
         self.collections_model.clear()
         self.collections_model.setHeaderData(0, Qt.Horizontal, "Collections")
 
-        # Build tree structure
+        # Children can arrive before their folder; they wait here until it does
         items = {}
-        for collection in collections:
-            item = QStandardItem(collection['name'])
-            item.setData(collection['id'], Qt.UserRole)
-            item.setData(collection, Qt.UserRole + 1)  # Store full collection data
-            items[collection['id']] = item
-
-        for collection in collections:
-            if collection['parent_id'] is None:
-                self.collections_model.appendRow(items[collection['id']])
-            else:
-                parent_item = items.get(collection['parent_id'])
-                if parent_item:
-                    parent_item.appendRow(items[collection['id']])
-
-        # Connect double-click to load request
-        self.collections_tree.doubleClicked.connect(self.load_request_from_collection)
-
-    def load_history(self):
+        orphans = {}
+
+        def add_batch(collections):
+            for collection in collections:
+                item = QStandardItem(collection['name'])
+                item.setData(collection['id'], Qt.UserRole)
+                item.setData(collection, Qt.UserRole + 1)  # Store full collection data
+                items[collection['id']] = item
+                for child in orphans.pop(collection['id'], []):
+                    item.appendRow(child)
+
+                parent_id = collection['parent_id']
+                if parent_id is None:
+                    self.collections_model.appendRow(item)
+                elif parent_id in items:
+                    items[parent_id].appendRow(item)
+                else:
+                    orphans.setdefault(parent_id, []).append(item)
+
+        self._stream_batches('collections', self.db_manager.iter_query(
+            "SELECT * FROM collections ORDER BY parent_id, name", batch_size=LOAD_BATCH_SIZE
+        ), add_batch)
+
+    def load_history(self, on_finished: Optional[Callable] = None):
         """Load history into list widget"""
-        history = self.db_manager.execute_query(
-            "SELECT * FROM history ORDER BY created_at DESC LIMIT 100"
-        )
-
         self.history_list.clear()
-        for entry in history:
-            status_code = entry.get('status_code', '-')
-            created_at = entry.get('created_at', '')
-            # Truncate URL if too long for display
-            url_display = entry['url']
-            if len(url_display) > 50:
-                url_display = url_display[:47] + "..."
-            item_text = f"{entry['method']} {url_display} - {status_code} ({created_at})"
-            item = QListWidgetItem(item_text)
-            item.setData(Qt.UserRole, entry['id'])
-            item.setData(Qt.UserRole + 1, entry)  # Store full entry data
-            self.history_list.addItem(item)
-        
-        # Connect double-click to load request
-        self.history_list.doubleClicked.connect(self.load_request_from_history)
 
-    def add_request_tab(self):
-        """Add new request tab"""
-        tab = RequestTab(self.db_manager)
-        tab_name = f"Request {self.request_tabs.count() + 1}"
+        def add_batch(history):
+            for entry in history:
+                status_code = entry.get('status_code', '-')
+                created_at = entry.get('created_at', '')
+                # Truncate URL if too long for display
+                url_display = entry['url']
+                if len(url_display) > 50:
+                    url_display = url_display[:47] + "..."
+                item_text = f"{entry['method']} {url_display} - {status_code} ({created_at})"
+                item = QListWidgetItem(item_text)
+                item.setData(Qt.UserRole, entry['id'])
+                item.setData(Qt.UserRole + 1, entry)  # Store full entry data
+                self.history_list.addItem(item)
+
+        # Bodies are left in the database until an entry is compared
+        self._stream_batches('history', self.db_manager.iter_query(
+            "SELECT id, method, url, request_data, response_data, status_code, response_time, created_at "
+            "FROM history ORDER BY created_at DESC LIMIT 100", batch_size=LOAD_BATCH_SIZE
+        ), add_batch, on_finished)
+
+    def add_request_tab(self, request: Optional[RequestModel] = None, title: Optional[str] = None,
+                        select: bool = True) -> RequestTab:
+        """Add new request tab; its widgets are built when it is first shown"""
+        tab = RequestTab(self.db_manager, request=request)
+        if self.env_selector.currentText():
+            tab.set_environment(self.env_selector.currentText())
+        tab_name = title or f"Request {self.request_tabs.count() + 1}"
         self.request_tabs.addTab(tab, tab_name)
-        self.request_tabs.setCurrentWidget(tab)
+        if select:
+            self.request_tabs.setCurrentWidget(tab)
+        return tab
 
     def close_request_tab(self, index: int):
         """Close request tab at given index"""
         if self.request_tabs.count() > 1:
+            tab = self.request_tabs.widget(index)
             self.request_tabs.removeTab(index)
+            if isinstance(tab, RequestTab):
+                tab.discard_spilled_body()
+                tab.deleteLater()
         else:
             QMessageBox.information(self, "Info", "At least one request tab must remain open")
 
@@ -233,16 +363,29 @@ class MainWindow(QMainWindow):
         """Open environments management dialog"""
         dialog = EnvironmentsDialog(self.db_manager, self)
         if dialog.exec() == QDialog.Accepted:
+            # Variables may have changed under an unchanged environment name
+            for i in range(self.request_tabs.count()):
+                tab = self.request_tabs.widget(i)
+                if isinstance(tab, RequestTab):
+                    tab.invalidate_environment_cache()
             self.load_environments()
+            self.refresh_resolved_preview()
 
     def on_environment_changed(self, environment_name: str):
         """Handle environment selection change"""
-        # Update all request tabs with new environment
+        # Templates stay untouched; substitution happens at send time, so a
+        # switch only records the new name on each tab.
         for i in range(self.request_tabs.count()):
             tab = self.request_tabs.widget(i)
             if isinstance(tab, RequestTab):
-                tab.current_environment = environment_name
-                tab.substitute_variables()
+                tab.set_environment(environment_name)
+        self.refresh_resolved_preview()
+
+    def refresh_resolved_preview(self):
+        """Recompute the resolved preview for the visible tab only"""
+        current_tab = self.request_tabs.currentWidget()
+        if isinstance(current_tab, RequestTab):
+            current_tab.update_resolved_preview()
 
     def load_request_from_collection(self, index):
         """Load request from collection into current tab"""
@@ -251,7 +394,8 @@ class MainWindow(QMainWindow):
             return
 
         collection_data = item.data(Qt.UserRole + 1)
-        if not collection_data or not collection_data.get('request_data'):
+        # Folders may hold settings for their requests, but are not requests
+        if not collection_data or collection_data.get('is_folder') or not collection_data.get('request_data'):
             return
 
         # Get current tab or create new one
@@ -264,6 +408,42 @@ class MainWindow(QMainWindow):
         request_data = json.loads(collection_data['request_data'])
         current_tab.load_request_data(request_data)
 
+    def show_collections_menu(self, position):
+        """Context menu for opening collection requests"""
+        if not self.collections_tree.selectedIndexes():
+            return
+        menu = QMenu(self)
+        open_action = menu.addAction("Open in New Tabs")
+        open_action.triggered.connect(self.open_selected_collections)
+        menu.exec(self.collections_tree.mapToGlobal(position))
+
+    def open_selected_collections(self):
+        """Open each selected request, or every request in a selected folder, in its own tab"""
+        items = [self.collections_model.itemFromIndex(index) for index in self.collections_tree.selectedIndexes()]
+        requests = []
+        seen = set()
+        stack = list(reversed(items))
+        while stack:
+            item = stack.pop()
+            if item is None or id(item) in seen:
+                continue
+            seen.add(id(item))
+            collection_data = item.data(Qt.UserRole + 1) or {}
+            if collection_data.get('request_data') and not collection_data.get('is_folder'):
+                requests.append((item.text(), collection_data['request_data']))
+            stack.extend(item.child(row) for row in reversed(range(item.rowCount())))
+
+        opened = 0
+        for name, request_data in requests:
+            try:
+                request = RequestModel.from_dict(json.loads(request_data), self.db_manager.decrypt)
+            except (json.JSONDecodeError, TypeError) as e:
+                logging.warning(f"Skipping collection entry {name}: {e}")
+                continue
+            # Only the first tab is shown, and so built, right away
+            self.add_request_tab(request, name, select=opened == 0)
+            opened += 1
+
     def save_current_request(self):
         """Save current request to collections"""
         current_tab = self.request_tabs.currentWidget()
@@ -362,6 +542,55 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logging.warning(f"Failed to save dark mode preference: {e}")
     
+    def toggle_tracing(self):
+        """Start recording spans of every send, or stop; starting drops an earlier trace"""
+        enabled = self.trace_action.isChecked()
+        if enabled:
+            tracer().clear()
+        tracer().enable(enabled)
+        self.statusBar().showMessage("Recording trace" if enabled else "Trace recording stopped", 3000)
+
+    def export_trace(self):
+        """Save the recorded spans as a Chrome trace for chrome://tracing or Perfetto"""
+        from PySide6.QtWidgets import QFileDialog
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Trace", "pypost-trace.json", "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            spans = tracer().export(file_path)
+            self.statusBar().showMessage(f"Exported {spans} spans", 3000)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to export trace: {str(e)}")
+
+    def response_cache_dir(self) -> str:
+        """Directory of the response cache, next to the database"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_manager.db_path)), HTTP_CACHE_DIR)
+
+    def toggle_response_cache(self):
+        """Answer GET requests from the response cache, or stop doing so"""
+        enabled = self.response_cache_action.isChecked()
+        try:
+            self.http_cache = HttpCache(self.response_cache_dir()) if enabled else None
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to open response cache: {str(e)}")
+            self.response_cache_action.setChecked(False)
+            return
+        try:
+            self.db_manager.execute_update(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                ('response_cache', '1' if enabled else '0')
+            )
+        except Exception as e:
+            logging.warning(f"Failed to save response cache preference: {e}")
+
+    def clear_response_cache(self):
+        """Remove every cached response"""
+        try:
+            (self.http_cache or HttpCache(self.response_cache_dir())).clear()
+            self.statusBar().showMessage("Response cache cleared", 3000)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to clear response cache: {str(e)}")
+
     def load_settings(self):
         """Load application settings from database"""
         try:
@@ -373,6 +602,14 @@ class MainWindow(QMainWindow):
             if result and result[0]['value'] == '1':
                 self.dark_mode_action.setChecked(True)
                 self.set_dark_palette()
+
+            result = self.db_manager.execute_query(
+                "SELECT value FROM settings WHERE key = ?",
+                ('response_cache',)
+            )
+            if result and result[0]['value'] == '1':
+                self.response_cache_action.setChecked(True)
+                self.http_cache = HttpCache(self.response_cache_dir())
         except Exception as e:
             logging.warning(f"Failed to load settings: {e}")
 
@@ -398,6 +635,110 @@ class MainWindow(QMainWindow):
         """Apply light palette (default)"""
         self.setPalette(self.style().standardPalette())
     
+    def show_history_menu(self, position):
+        """Context menu for comparing history entries"""
+        selected = self.history_list.selectedItems()
+        if not selected:
+            return
+        menu = QMenu(self)
+        compare_action = menu.addAction("Compare Selected")
+        compare_action.setEnabled(len(selected) == 2)
+        compare_action.triggered.connect(self.compare_selected_history)
+        baseline_action = menu.addAction("Set as Baseline")
+        baseline_action.setEnabled(len(selected) == 1)
+        baseline_action.triggered.connect(self.set_history_baseline)
+        compare_baseline_action = menu.addAction("Compare with Baseline")
+        compare_baseline_action.setEnabled(len(selected) == 1)
+        compare_baseline_action.triggered.connect(self.compare_history_with_baseline)
+        menu.exec(self.history_list.mapToGlobal(position))
+
+    def _history_entry(self, item: QListWidgetItem) -> Optional[Dict]:
+        """History entry of a list item, including its response body"""
+        history = self.db_manager.execute_query(
+            "SELECT * FROM history WHERE id = ?",
+            (item.data(Qt.UserRole),)
+        )
+        return history[0] if history else None
+
+    def compare_selected_history(self):
+        """Diff the responses of the two selected history entries, oldest first"""
+        selected = self.history_list.selectedItems()
+        if len(selected) != 2:
+            QMessageBox.information(self, "Compare", "Select two history entries to compare")
+            return
+        entries = [self._history_entry(item) for item in selected]
+        if None in entries:
+            return
+        old, new = sorted(entries, key=lambda entry: entry['id'])
+        self.show_diff(describe_history(old), response_from_history(old),
+                       describe_history(new), response_from_history(new))
+
+    def set_history_baseline(self):
+        """Remember the selected history entry as the diff baseline"""
+        selected = self.history_list.selectedItems()
+        if len(selected) != 1:
+            return
+        entry = selected[0].data(Qt.UserRole + 1)
+        try:
+            self.db_manager.execute_update(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                ('diff_baseline', str(entry['id']))
+            )
+            self.statusBar().showMessage(f"Baseline set to {describe_history(entry)}")
+        except Exception as e:
+            logging.warning(f"Failed to save diff baseline: {e}")
+
+    def load_baseline(self) -> Optional[Dict]:
+        """History entry saved as the diff baseline, if any"""
+        try:
+            result = self.db_manager.execute_query(
+                "SELECT value FROM settings WHERE key = ?",
+                ('diff_baseline',)
+            )
+            if not result:
+                return None
+            history = self.db_manager.execute_query(
+                "SELECT * FROM history WHERE id = ?",
+                (int(result[0]['value']),)
+            )
+            return history[0] if history else None
+        except Exception as e:
+            logging.warning(f"Failed to load diff baseline: {e}")
+            return None
+
+    def compare_history_with_baseline(self):
+        """Diff the selected history entry against the baseline"""
+        selected = self.history_list.selectedItems()
+        baseline = self.load_baseline()
+        if len(selected) != 1 or baseline is None:
+            QMessageBox.information(self, "Compare", "Set a baseline from the history first")
+            return
+        entry = self._history_entry(selected[0])
+        if entry is None:
+            return
+        self.show_diff(f"Baseline {describe_history(baseline)}", response_from_history(baseline),
+                       describe_history(entry), response_from_history(entry))
+
+    def compare_response_with_baseline(self):
+        """Diff the current tab's response against the baseline"""
+        baseline = self.load_baseline()
+        if baseline is None:
+            QMessageBox.information(self, "Compare", "Set a baseline from the history first")
+            return
+        tab = self.request_tabs.currentWidget()
+        document = tab.response_document if isinstance(tab, RequestTab) else None
+        if document is None:
+            QMessageBox.information(self, "Compare", "The current tab has no response")
+            return
+        self.show_diff(f"Baseline {describe_history(baseline)}", response_from_history(baseline),
+                       "Current response", (document.text, document.content_type))
+
+    def show_diff(self, old_label: str, old_body, new_label: str, new_body):
+        """Open a diff dialog; the diff is computed in the background"""
+        dialog = DiffDialog(old_label, old_body, new_label, new_body, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
     def load_request_from_history(self, item: QListWidgetItem):
         """Load request from history entry"""
         history_id = item.data(Qt.UserRole)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+pyPost mock server - serves recorded responses as stubs on a local port.
+
+    python -m mock_server --port 8787
+    python -m mock_server --collection "Users API" --latency 80 --jitter 20
+    python -m mock_server --bandwidth 256k --error-rate 0.05 --seed 1
+
+Every history entry becomes a stub matched on method, path and query; when
+the same request was sent more than once, the latest response is served.
+With --collection only the collection's requests are served, each with the
+latest response recorded for it. Hosts are ignored, so point a client's
+base URL at the mock server. Qt is never imported.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from constants import MOCK_CHUNK_SIZE, MOCK_SERVER_PORT
+from http_response import HttpResponse
+
+# Headers describing how the recorded response was transferred, not its content
+_TRANSFER_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length',
+                     'date', 'server'}
+
+StubKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def stub_key(method: str, url: str, params: Optional[Dict[str, str]] = None) -> StubKey:
+    """Method, path and sorted query pairs a stub is matched on"""
+    parts = urlsplit(url.strip())
+    query = parse_qsl(parts.query, keep_blank_values=True) + list((params or {}).items())
+    return method.upper(), parts.path or '/', tuple(sorted(query))
+
+
+class Stub:
+    """A recorded response served for one method, path and query"""
+
+    __slots__ = ('status_code', 'headers', 'body', 'source')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, source: str = ''):
+        self.status_code = status_code
+        self.headers = {name: value for name, value in headers.items() if name.lower() not in _TRANSFER_HEADERS}
+        self.body = body
+        # Where the response was recorded, such as "history #12"
+        self.source = source
+
+
+def stubs_from_history(db_manager, substitutions: Dict[str, str]) -> Dict[StubKey, Stub]:
+    """Stubs for every history entry, the latest response winning, read in batches"""
+    # Imported on use, as in pypost.main; runner imports requests
+    from runner import history_request
+
+    stubs = {}
+    query = ("SELECT id, method, url, request_data, response_data, response_body FROM history "
+             "ORDER BY created_at, id")
+    for batch in db_manager.iter_query(query):
+        for entry in batch:
+            url, _, params, _ = history_request(db_manager, entry).resolve(substitutions)
+            response = HttpResponse.from_history(entry['response_data'], entry['response_body'])
+            stubs[stub_key(entry['method'], url, params)] = Stub(
+                response.status_code, response.headers, response.content, f"history #{entry['id']}")
+    return stubs
+
+
+def stubs_for_collections(db_manager, keys: Iterable[str], substitutions: Dict[str, str],
+                          recorded: Dict[StubKey, Stub]) -> Dict[StubKey, Stub]:
+    """Stubs for the requests of collection items, from their recorded responses.
+
+    Requests that were never sent are left out with a warning. Raises
+    ValueError for an unknown collection.
+    """
+    from runner import collection_jobs
+
+    stubs = {}
+    for key in keys:
+        for job in collection_jobs(db_manager, key):
+            url, _, params, _ = job.request.resolve(substitutions)
+            request_key = stub_key(job.request.method, url, params)
+            if request_key in recorded:
+                stubs[request_key] = recorded[request_key]
+            else:
+                logging.warning(f"{job.name}: no recorded response for {job.request.method} {url}")
+    return stubs
+
+
+def parse_bandwidth(text: str) -> int:
+    """Bytes per second from "65536", "64k" or "1m" """
+    text = text.strip().lower()
+    multiplier = {'k': 1024, 'm': 1024 * 1024}.get(text[-1:], 1)
+    value = float(text[:-1] if multiplier > 1 else text) * multiplier
+    if value <= 0:
+        raise ValueError(f"Bandwidth must be positive: {text}")
+    return int(value)
+
+
+class FaultProfile:
+    """Latency, bandwidth and errors injected into every response.
+
+    A response waits latency plus a uniform jitter in milliseconds, then is
+    sent at no more than bandwidth bytes per second; error_rate of the
+    requests get error_status instead. A seed makes the sequence of delays
+    and errors repeatable.
+    """
+
+    def __init__(self, latency: float = 0, jitter: float = 0, bandwidth: Optional[int] = None,
+                 error_rate: float = 0.0, error_status: int = 503, seed: Optional[int] = None):
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f"Error rate must be between 0 and 1: {error_rate}")
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, bool]:
+        """Seconds to wait before responding and whether to inject an error"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        return max(0.0, self.latency + jitter) / 1000, failed
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; Nagle would hold the body back
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        mock = self.server.mock
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.headers.get('Transfer-Encoding'):
+            # Chunked request bodies are not read; the connection cannot be reused
+            self.close_connection = True
+
+        delay, failed = mock.faults.draw()
+        key = stub_key(self.command, self.path)
+        stub = mock.stubs.get(key)
+        if failed:
+            status, headers, body = mock.faults.error_status, {'Content-Type': 'application/json'}, \
+                json.dumps({'error': "Injected fault"}).encode('utf-8')
+        elif stub is None:
+            status, headers, body = 404, {'Content-Type': 'application/json'}, \
+                json.dumps({'error': f"No stub for {self.command} {self.path}"}).encode('utf-8')
+        else:
+            status, headers, body = stub.status_code, stub.headers, stub.body
+            if status in (204, 304) or status < 200:
+                # These responses have no body, whatever was recorded
+                body = b''
+        mock.count('faults' if failed else 'unmatched' if stub is None else 'matched')
+
+        if delay:
+            time.sleep(delay)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self._write_body(body, mock.faults.bandwidth)
+
+    def _write_body(self, body: bytes, bandwidth: Optional[int]):
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        start = time.monotonic()
+        for offset in range(0, len(body), MOCK_CHUNK_SIZE):
+            chunk = body[offset:offset + MOCK_CHUNK_SIZE]
+            # Hold each chunk back until the bytes sent with it fit the rate
+            ahead = (offset + len(chunk)) / bandwidth - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+            self.wfile.write(chunk)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _serve
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of new connections from parallel clients must not be refused
+    request_queue_size = 128
+
+
+class MockServer:
+    """Serves stubs from a background thread until stopped"""
+
+    def __init__(self, stubs: Dict[StubKey, Stub], faults: Optional[FaultProfile] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.stubs = stubs
+        self.faults = faults or FaultProfile()
+        self._counts = {'matched': 0, 'unmatched': 0, 'faults': 0}
+        self._counts_lock = threading.Lock()
+        self._server = _MockHTTPServer((host, port), _MockHandler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, outcome: str):
+        with self._counts_lock:
+            self._counts[outcome] += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """Requests answered from a stub, without one, and with an injected fault"""
+        with self._counts_lock:
+            return dict(self._counts)
+
+    def start(self) -> 'MockServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="pypost-mock-server",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m mock_server", description="Serve recorded pyPost responses")
+    parser.add_argument('--db', default="pypost.db", help="database file (default: pypost.db)")
+    parser.add_argument('--collection', action='append', default=[], metavar='NAME_OR_ID',
+                        help="serve only this collection, folder or request; may be repeated")
+    parser.add_argument('--env', help="environment for {{variables}} (default: the active one)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=MOCK_SERVER_PORT, help="port (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0, help="milliseconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0, help="random +/- milliseconds around the latency")
+    parser.add_argument('--bandwidth', help="bytes per second per response, such as 256k or 1m")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail, 0 to 1")
+    parser.add_argument('--error-status', type=int, default=503, help="status of failed requests (default: 503)")
+    parser.add_argument('--seed', type=int, help="seed for repeatable jitter and errors")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+
+    from pypost import EXIT_OK, EXIT_USAGE
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        return EXIT_USAGE
+
+    from database import DatabaseManager
+    from runner import environment_substitutions
+
+    db_manager = DatabaseManager(args.db)
+    try:
+        substitutions = environment_substitutions(db_manager, args.env)
+        stubs = stubs_from_history(db_manager, substitutions)
+        if args.collection:
+            stubs = stubs_for_collections(db_manager, args.collection, substitutions, stubs)
+        faults = FaultProfile(args.latency, args.jitter, parse_bandwidth(args.bandwidth) if args.bandwidth else None,
+                              args.error_rate, args.error_status, args.seed)
+        server = MockServer(stubs, faults, args.host, args.port)
+    except (ValueError, OSError) as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+
+    print(f"Serving {len(stubs)} stubs on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    metrics = server.metrics()
+    print(f"{metrics['matched']} matched, {metrics['unmatched']} unmatched, {metrics['faults']} faults",
+          file=sys.stderr)
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
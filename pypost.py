@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+pyPost headless runner - runs saved requests without the GUI.
+
+    python -m pypost --collection "Users API" --env Staging --parallel 4
+    python -m pypost --history 12 --format junit --output results.xml
+    python -m pypost --collection Signup --data users.csv --format jsonl --parallel 8
+    python -m pypost --replay 120-480 --speed 10x --parallel 16
+    python -m pypost --collection "Users API" --cache http_cache
+
+Requests that declare "extract" or "depends_on" are run as a dependency
+graph, each one as soon as the requests it depends on have passed.
+
+Exits 0 when every request gets a response below 400, 1 when any does not
+and 2 when nothing could be run. Qt is never imported.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import warnings
+from typing import List, Optional
+
+from constants import REPLAY_MAX_IN_FLIGHT, SCHEDULER_MAX_CONCURRENT, SCHEDULER_MAX_PER_HOST
+from http_client import DEFAULT_TIMEOUT, RetryPolicy
+
+# Suppress urllib3 SSL warning (harmless, just compatibility notice)
+warnings.filterwarnings('ignore', message='.*urllib3.*OpenSSL.*')
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m pypost", description="Run saved pyPost requests")
+    parser.add_argument('--db', default="pypost.db", help="database file (default: pypost.db)")
+    parser.add_argument('--collection', action='append', default=[], metavar='NAME_OR_ID',
+                        help="collection, folder or request to run; may be repeated")
+    parser.add_argument('--history', action='append', default=[], type=int, metavar='ID',
+                        help="history entry to replay; may be repeated")
+    parser.add_argument('--data', metavar='FILE',
+                        help="CSV or JSONL file; the requests run once per row with its values as variables")
+    parser.add_argument('--replay', metavar='FIRST-LAST',
+                        help="replay history entries with ids in the range, keeping their original timing")
+    parser.add_argument('--speed', default='1',
+                        help="replay speed factor such as 1, 10x or max (default: 1)")
+    parser.add_argument('--env', help="environment for {{variables}} (default: the active one)")
+    parser.add_argument('--parallel', type=int,
+                        help=f"requests in flight at once (default: 1, or {REPLAY_MAX_IN_FLIGHT} with --replay)")
+    parser.add_argument('--max-per-host', type=int,
+                        help=f"requests in flight to any one host (default: {SCHEDULER_MAX_PER_HOST}, "
+                             f"or --parallel with --replay)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds to wait for a response (default: %(default)s)")
+    parser.add_argument('--connect-timeout', type=float,
+                        help="seconds to wait for a connection (default: --timeout)")
+    parser.add_argument('--retries', type=int, default=0,
+                        help="retries on connection errors, timeouts and 429/502/503/504 for idempotent methods")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="answer GET requests from and store responses in an HTTP cache directory")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="write spans of every request as a Chrome trace to FILE")
+    parser.add_argument('--format', choices=['text', 'json', 'jsonl', 'junit'], default='text',
+                        help="report format; all but junit are written as results arrive")
+    parser.add_argument('--output', help="write the report to a file instead of stdout")
+    parser.add_argument('--list', action='store_true', help="list the collections and exit")
+    return parser.parse_args(argv)
+
+
+def list_collections(db_manager) -> str:
+    """Collection tree with ids, for choosing what to run"""
+    items = db_manager.execute_query("SELECT id, name, parent_id, is_folder FROM collections ORDER BY id")
+    children = {}
+    for item in items:
+        children.setdefault(item['parent_id'], []).append(item)
+    lines = []
+
+    def add(parent_id, depth):
+        for item in children.get(parent_id, []):
+            suffix = "/" if item['is_folder'] else ""
+            lines.append(f"{item['id']:>5}  {'  ' * depth}{item['name']}{suffix}")
+            add(item['id'], depth + 1)
+
+    add(None, 0)
+    return "\n".join(lines) + "\n" if lines else "No collections\n"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point; returns the exit code"""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        return EXIT_USAGE
+
+    from database import DatabaseManager
+    from http_cache import HttpCache
+    from chain import dependency_graph, is_chained, run_chains
+    from replay import history_slice, parse_id_range, parse_speed, replay_jobs
+    from run_report import REPORT_WRITERS, write_report
+    from runner import (collection_jobs, environment_substitutions, history_job, iter_data_rows,
+                        iteration_jobs, stream_jobs)
+    from scheduler import request_scheduler
+    from tracing import tracer
+
+    db_manager = DatabaseManager(args.db)
+    if args.list:
+        sys.stdout.write(list_collections(db_manager))
+        return EXIT_OK
+
+    if args.replay and (args.collection or args.history or args.data):
+        print("--replay cannot be combined with --collection, --history or --data", file=sys.stderr)
+        return EXIT_USAGE
+    # A replay keeps its recorded timing only while a burst fits in flight
+    if args.parallel is None:
+        args.parallel = REPLAY_MAX_IN_FLIGHT if args.replay else 1
+    if args.max_per_host is None:
+        args.max_per_host = args.parallel if args.replay else SCHEDULER_MAX_PER_HOST
+
+    try:
+        jobs = []
+        if args.replay:
+            first, last = parse_id_range(args.replay)
+            # Entries are read and paced as they are sent
+            jobs = replay_jobs(db_manager, history_slice(db_manager, first, last), parse_speed(args.speed))
+        for key in args.collection:
+            jobs.extend(collection_jobs(db_manager, key))
+        for history_id in args.history:
+            jobs.append(history_job(db_manager, history_id))
+        substitutions = environment_substitutions(db_manager, args.env)
+        chained = not args.replay and is_chained(jobs)
+        if chained:
+            dependency_graph(jobs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+    if not args.replay and not jobs:
+        print("Nothing to run; pass --collection, --history or --replay", file=sys.stderr)
+        return EXIT_USAGE
+
+    if args.data and not os.path.isfile(args.data):
+        print(f"Data file not found: {args.data}", file=sys.stderr)
+        return EXIT_USAGE
+    # Defaults for the run; folders and requests may override them
+    policy = RetryPolicy(connect_timeout=args.connect_timeout or args.timeout, read_timeout=args.timeout,
+                         retries=args.retries)
+    try:
+        cache = HttpCache(args.cache) if args.cache else None
+    except OSError as e:
+        print(f"Cannot open cache: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    # Rows are read as requests are sent, never all at once
+    rows = iter_data_rows(args.data) if args.data else None
+    if chained:
+        results = run_chains(jobs, substitutions, rows, args.parallel, policy, cache)
+    else:
+        if rows is not None:
+            jobs = iteration_jobs(jobs, rows)
+        results = stream_jobs(jobs, substitutions, args.parallel, policy, cache)
+
+    # Nothing interactive shares this process, so no slots are reserved
+    request_scheduler().configure(max(SCHEDULER_MAX_CONCURRENT, args.parallel), args.max_per_host, 0)
+
+    tracer().enable(bool(args.trace))
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = write_report(results, REPORT_WRITERS[args.format](output))
+    except ValueError as e:
+        # A malformed row of the data file or history timestamp
+        print(e, file=sys.stderr)
+        return EXIT_USAGE
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.trace:
+            tracer().export(args.trace)
+    if writer.total == 0:
+        # An empty replay range or data file
+        print("Nothing was run", file=sys.stderr)
+        return EXIT_USAGE
+    return EXIT_OK if writer.failed == 0 else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
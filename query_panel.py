@@ -0,0 +1,130 @@
+import logging
+from typing import Iterator, Optional
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QTableView, QHeaderView
+)
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from response_document import ResponseDocument, query_page
+
+# Query results are pulled from the lazy result iterator in pages of this size
+RESULT_PAGE_SIZE = 200
+
+
+class QueryResultModel(QAbstractTableModel):
+    """Table of query results, fetched page by page as the view scrolls"""
+
+    COLUMNS = ['Location', 'Value']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self._results = None
+        self.error = None
+
+    def set_results(self, results: Optional[Iterator]):
+        """Show a new lazy result iterator and fetch its first page"""
+        self.beginResetModel()
+        self.rows = []
+        self._results = results
+        self.error = None
+        self.endResetModel()
+        if self.canFetchMore():
+            self.fetchMore()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.COLUMNS)
+
+    def headerData(self, section: int, orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        return self.rows[index.row()][index.column()]
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._results is not None
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()):
+        if self._results is None:
+            return
+        try:
+            page = query_page(self._results, RESULT_PAGE_SIZE)
+        except ValueError as e:
+            self.error = str(e)
+            page = []
+        if len(page) < RESULT_PAGE_SIZE:
+            self._results = None  # Exhausted
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+
+
+class QueryPanel(QWidget):
+    """Query box running JSONPath or XPath against the current response"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        query_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("JSONPath, e.g. $.items[*].id")
+        self.query_input.returnPressed.connect(self.run_query)
+        self.run_button = QPushButton("Run")
+        self.run_button.clicked.connect(self.run_query)
+        self.query_status = QLabel("")
+        query_layout.addWidget(self.query_input, 1)
+        query_layout.addWidget(self.run_button)
+        query_layout.addWidget(self.query_status)
+
+        self.results_model = QueryResultModel(self)
+        self.results_model.rowsInserted.connect(self._update_status)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.results_model)
+        self.results_view.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.results_view.horizontalHeader().setStretchLastSection(True)
+        self.results_view.verticalHeader().setVisible(False)
+
+        layout.addLayout(query_layout)
+        layout.addWidget(self.results_view)
+        self.setLayout(layout)
+
+    def set_document(self, document: Optional[ResponseDocument]):
+        """Query a new response; previous results are cleared"""
+        self.document = document
+        self.results_model.set_results(None)
+        self.query_status.setText("")
+        if document is not None and document.kind == 'xml':
+            self.query_input.setPlaceholderText("XPath, e.g. //item[@id='1']")
+        else:
+            self.query_input.setPlaceholderText("JSONPath, e.g. $.items[*].id")
+
+    def run_query(self):
+        """Run the expression against the current response"""
+        expression = self.query_input.text().strip()
+        if not expression or self.document is None or self.document.kind is None:
+            self.results_model.set_results(None)
+            self.query_status.setText("" if not expression else "Response is not JSON or XML")
+            return
+        self.results_model.set_results(self.document.query(expression))
+        self._update_status()
+
+    def _update_status(self):
+        if self.results_model.error:
+            logging.info(f"Query failed: {self.results_model.error}")
+            self.query_status.setText(self.results_model.error)
+            return
+        count = self.results_model.rowCount()
+        more = "+" if self.results_model.canFetchMore() else ""
+        self.query_status.setText(f"{count}{more} matches")
@@ -0,0 +1,75 @@
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from constants import REPLAY_LATE_WARNING
+from database import DatabaseManager
+from runner import RunJob, history_request
+
+
+def parse_speed(text: str) -> Optional[float]:
+    """Speed factor from "1", "10x" or "max"; None means no waiting"""
+    text = text.strip().lower()
+    if text == 'max':
+        return None
+    speed = float(text[:-1] if text.endswith('x') else text)
+    if speed <= 0:
+        raise ValueError(f"Speed must be positive: {text}")
+    return speed
+
+
+def parse_id_range(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Inclusive history id range from "12", "12-40", "12-" or "-40" """
+    first, separator, last = text.strip().partition('-')
+    if not separator:
+        return int(first), int(first)
+    return (int(first) if first else None), (int(last) if last else None)
+
+
+def history_slice(db_manager: DatabaseManager, first: Optional[int] = None,
+                  last: Optional[int] = None) -> Iterator[Dict]:
+    """History rows with ids in [first, last] in the order they were sent, read in batches"""
+    query = ("SELECT id, method, url, request_data, status_code, response_time, created_at "
+             "FROM history WHERE id >= ? AND id <= ? ORDER BY created_at, id")
+    params = (first if first is not None else 0, last if last is not None else 2 ** 63 - 1)
+    for batch in db_manager.iter_query(query, params):
+        yield from batch
+
+
+def _sent_at(entry: Dict) -> float:
+    """Seconds since the epoch at which an entry was recorded"""
+    return datetime.fromisoformat(entry['created_at']).timestamp()
+
+
+def replay_jobs(db_manager: DatabaseManager, entries: Iterable[Dict], speed: Optional[float] = 1.0,
+                clock: Callable[[], float] = time.monotonic,
+                sleep: Callable[[float], None] = time.sleep) -> Iterator[RunJob]:
+    """Jobs for history entries, each produced when it is due.
+
+    An entry is due once the gap since the first entry, divided by speed,
+    has passed; with speed None every entry is due at once. Producing jobs
+    lazily lets stream_jobs send each one as it becomes due. It asks for the
+    next job only when a request slot is free, so entries it asks for late
+    are counted and reported in a warning once the replay ends.
+    """
+    start = None
+    first_sent = None
+    late = 0
+    latest = 0.0
+    for entry in entries:
+        if speed is not None and entry['created_at']:
+            sent = _sent_at(entry)
+            if start is None:
+                start, first_sent = clock(), sent
+            delay = start + (sent - first_sent) / speed - clock()
+            if delay > 0:
+                sleep(delay)
+            elif -delay > REPLAY_LATE_WARNING:
+                late += 1
+                latest = max(latest, -delay)
+        yield RunJob(f"history #{entry['id']}", history_request(db_manager, entry),
+                     recorded_status=entry['status_code'], recorded_time=entry['response_time'])
+    if late:
+        logging.warning(f"{late} replayed requests were sent late, up to {latest * 1000:.0f} ms after they were "
+                        f"due; raise --parallel and --max-per-host to cover the widest burst")
@@ -0,0 +1,153 @@
+import base64
+from typing import Callable, Dict, List, Optional, Tuple
+
+from constants import AUTH_BASIC, AUTH_BEARER_TOKEN, AUTH_NO_AUTH, BODY_MULTIPART, BODY_NONE
+
+
+def substitute_text(text: str, substitutions: Dict[str, str]) -> str:
+    """Apply environment variable substitutions to text"""
+    for placeholder, value in substitutions.items():
+        text = text.replace(placeholder, value)
+    return text
+
+
+def substitutions_for(variables: Dict[str, str]) -> Dict[str, str]:
+    """Map {{name}} placeholders to environment variable values"""
+    return {f"{{{{{name}}}}}": value for name, value in variables.items()}
+
+
+class RequestModel:
+    """A request as edited in a tab, independent of any widgets.
+
+    Credentials are held in plain text; to_dict/from_dict convert them to
+    and from the encrypted form stored in collections and history.
+
+    For chained runs, extract maps variable names to expressions evaluated
+    against the response (see runner.extract_value) and depends_on names the
+    requests whose extracted variables this one uses. policy holds the
+    timeout and retry settings (see http_client.RetryPolicy) this request
+    overrides.
+    """
+
+    def __init__(self, method: str = 'GET', url: str = '', headers: Optional[Dict[str, str]] = None,
+                 params: Optional[Dict[str, str]] = None, body_type: str = BODY_NONE, body: str = '',
+                 files: Optional[Dict[str, str]] = None, auth_type: str = AUTH_NO_AUTH,
+                 bearer_token: str = '', basic_username: str = '', basic_password: str = '',
+                 verify_ssl: bool = True, extract: Optional[Dict[str, str]] = None,
+                 depends_on: Optional[List[str]] = None, policy: Optional[Dict] = None):
+        self.method = method
+        self.url = url
+        self.headers = headers or {}
+        self.params = params or {}
+        self.body_type = body_type
+        self.body = body
+        self.files = files or {}
+        self.auth_type = auth_type
+        self.bearer_token = bearer_token
+        self.basic_username = basic_username
+        self.basic_password = basic_password
+        self.verify_ssl = verify_ssl
+        self.extract = extract or {}
+        self.depends_on = depends_on or []
+        self.policy = policy or {}
+
+    def request_headers(self) -> Dict[str, str]:
+        """Headers to send, including the Authorization header"""
+        headers = {key.strip(): value.strip() for key, value in self.headers.items() if key.strip()}
+        if self.auth_type == AUTH_BEARER_TOKEN and self.bearer_token.strip():
+            headers['Authorization'] = f"Bearer {self.bearer_token.strip()}"
+        elif self.auth_type == AUTH_BASIC and self.basic_username.strip() and self.basic_password.strip():
+            creds = f"{self.basic_username.strip()}:{self.basic_password.strip()}"
+            encoded = base64.b64encode(creds.encode()).decode()
+            headers['Authorization'] = f"Basic {encoded}"
+        return headers
+
+    def request_params(self) -> Dict[str, str]:
+        """URL parameters to send"""
+        return {key.strip(): value.strip() for key, value in self.params.items() if key.strip()}
+
+    def body_data(self) -> Optional[str]:
+        """Request body, or None for no body and for multipart requests"""
+        if self.body_type in (BODY_NONE, BODY_MULTIPART):
+            return None
+        if not self.body.strip():
+            return None
+        return self.body
+
+    def request_files(self) -> Optional[Dict[str, str]]:
+        """Multipart files as {field: path}, or None"""
+        if self.body_type != BODY_MULTIPART:
+            return None
+        files = {key.strip(): path.strip() for key, path in self.files.items() if key.strip() and path.strip()}
+        return files if files else None
+
+    def resolve(self, substitutions: Dict[str, str]) -> Tuple[str, Dict[str, str], Dict[str, str], Optional[str]]:
+        """URL, headers, params and body with environment variables substituted"""
+        url = self.url.strip()
+        headers = self.request_headers()
+        params = self.request_params()
+        data = self.body_data()
+        if not substitutions:
+            return url, headers, params, data
+
+        url = substitute_text(url, substitutions)
+        headers = {k: substitute_text(v, substitutions) for k, v in headers.items()}
+        params = {k: substitute_text(v, substitutions) for k, v in params.items()}
+        if data:
+            data = substitute_text(data, substitutions)
+        return url, headers, params, data
+
+    def to_dict(self, encrypt: Callable[[str], str]) -> Dict:
+        """Serializable form as stored in collections, with credentials encrypted"""
+        bearer_token = self.bearer_token if self.auth_type == AUTH_BEARER_TOKEN else None
+        basic_username = self.basic_username if self.auth_type == AUTH_BASIC else None
+        basic_password = self.basic_password if self.auth_type == AUTH_BASIC else None
+        data = {
+            'method': self.method,
+            'url': self.url,
+            'headers': self.request_headers(),
+            'params': self.request_params(),
+            'body': self.body_data(),
+            'auth_type': self.auth_type,
+            'bearer_token': encrypt(bearer_token) if bearer_token else bearer_token,
+            'basic_username': encrypt(basic_username) if basic_username else basic_username,
+            'basic_password': encrypt(basic_password) if basic_password else basic_password,
+            'body_type': self.body_type
+        }
+        # Only chained requests and those with a policy carry these keys
+        if self.extract:
+            data['extract'] = dict(self.extract)
+        if self.depends_on:
+            data['depends_on'] = list(self.depends_on)
+        if self.policy:
+            data['policy'] = dict(self.policy)
+        return data
+
+    @classmethod
+    def from_dict(cls, request_data: Dict, decrypt: Callable[[str], str]) -> 'RequestModel':
+        """Build a model from stored request data, decrypting credentials"""
+        def credential(key: str) -> str:
+            value = request_data.get(key)
+            if not value:
+                return ''
+            try:
+                return decrypt(value)
+            except Exception:
+                return ''  # Decryption failed, perhaps old data
+
+        auth_type = request_data.get('auth_type', AUTH_NO_AUTH)
+        return cls(
+            method=request_data.get('method', 'GET'),
+            url=request_data.get('url', ''),
+            headers=dict(request_data.get('headers') or {}),
+            params=dict(request_data.get('params') or {}),
+            body_type=request_data.get('body_type', BODY_NONE),
+            body=request_data.get('body') or '',
+            auth_type=auth_type,
+            bearer_token=credential('bearer_token') if auth_type == AUTH_BEARER_TOKEN else '',
+            basic_username=credential('basic_username') if auth_type == AUTH_BASIC else '',
+            basic_password=credential('basic_password') if auth_type == AUTH_BASIC else '',
+            extract=dict(request_data.get('extract') or {}),
+            depends_on=list(request_data.get('depends_on') or []),
+            policy=dict(request_data.get('policy') or {}),
+        )
@@ -3,26 +3,61 @@ import logging
 from typing import Dict, Optional
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem,
-    QLineEdit, QPushButton, QTextEdit, QLabel, QGroupBox, QMessageBox, QComboBox, QCheckBox
+    QLineEdit, QPushButton, QTextEdit, QLabel, QGroupBox, QMessageBox, QComboBox, QCheckBox, QTreeView
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QShortcut, QKeySequence
 
 from database import DatabaseManager
-from http_worker import HTTPWorker
-from syntax_highlighter import SyntaxHighlighter
+from http_response import HttpResponse
+from request_model import RequestModel, substitute_text, substitutions_for
+from line_buffer import LineBuffer
+from response_viewer import ResponseViewerPanel
+from response_formatter import format_body, looks_like_json, looks_like_xml
+from format_worker import FormatTask, JsonParseTask
+from json_tree_model import JsonTreeModel
+from query_panel import QueryPanel
+from response_document import ResponseDocument
+from response_store import SpilledBody, SpillTask, remove_spill_file
+from tracing import tracer
 from constants import *
 
 
 class RequestTab(QWidget):
-    """Individual request tab widget"""
+    """Individual request tab widget.
 
-    def __init__(self, db_manager: DatabaseManager, parent=None):
+    The request lives in a RequestModel; the widgets are only built when the
+    tab is first shown, so opening many tabs at once stays cheap.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, parent=None, request: Optional[RequestModel] = None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.request = request or RequestModel()
         self.http_worker = None
         self.current_environment = "Default"
+        self._env_vars_cache = None
+        self._preview_cache = None
+        self._sent_request = None
+        self._format_task = None
+        self._format_generation = 0
+        self._response_content_type = ""
+        self.response_document = None
+        self._response_tree_stale = False
+        self._tree_task = None
+        self._tree_generation = 0
+        self._spill_task = None
+        self._spill_generation = 0
+        self._spilled = None
+        self._ui_built = False
+
+    def ensure_ui(self):
+        """Build the widgets and show the request in them, once"""
+        if self._ui_built:
+            return
+        self._ui_built = True
         self.init_ui()
+        self._show_request(self.request)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -51,6 +86,13 @@ class RequestTab(QWidget):
         url_layout.addWidget(self.send_button)
         url_layout.addWidget(self.cancel_button)
 
+        # Read-only preview of the URL resolved against the active environment.
+        # Templates in the editable widgets are never rewritten.
+        self.resolved_preview = QLineEdit()
+        self.resolved_preview.setReadOnly(True)
+        self.resolved_preview.setPlaceholderText("Resolved URL preview")
+        self.url_input.textChanged.connect(self.update_resolved_preview)
+
         # SSL verification checkbox
         self.ssl_verify_checkbox = QCheckBox("Verify SSL")
         self.ssl_verify_checkbox.setChecked(True)
@@ -184,11 +226,24 @@ class RequestTab(QWidget):
         # Response tabs
         self.response_tabs = QTabWidget()
 
-        # Response body tab
-        self.response_body = QTextEdit()
-        self.response_body.setReadOnly(True)
-        self.response_highlighter = SyntaxHighlighter(self.response_body.document())
-        self.response_tabs.addTab(self.response_body, "Body")
+        # Response body tab: virtualized viewer, only visible lines are laid out
+        self.response_body_panel = ResponseViewerPanel()
+        self.response_body = self.response_body_panel.viewer
+        self.response_highlighter = None  # Created with the first response
+        self.response_tabs.addTab(self.response_body_panel, "Body")
+
+        # Response tree tab: JSON nodes are created only when expanded
+        self.response_tree_model = JsonTreeModel(self)
+        self.response_tree = QTreeView()
+        self.response_tree.setUniformRowHeights(True)
+        self.response_tree.setModel(self.response_tree_model)
+        self.response_tabs.addTab(self.response_tree, "Tree")
+        self.response_tabs.setTabEnabled(self.response_tabs.indexOf(self.response_tree), False)
+
+        # Response query tab: JSONPath/XPath against the parsed body
+        self.query_panel = QueryPanel()
+        self.response_tabs.addTab(self.query_panel, "Query")
+        self.response_tabs.setTabEnabled(self.response_tabs.indexOf(self.query_panel), False)
 
         # Response headers tab
         self.response_headers_table = QTableWidget()
@@ -204,18 +259,30 @@ class RequestTab(QWidget):
         self.response_cookies_table.horizontalHeader().setStretchLastSection(True)
         self.response_tabs.addTab(self.response_cookies_table, "Cookies")
 
+        self.response_tabs.currentChanged.connect(self.on_response_tab_changed)
+
         response_layout.addLayout(metadata_layout)
         response_layout.addWidget(self.response_tabs)
         response_group.setLayout(response_layout)
 
         layout.addLayout(url_layout)
+        layout.addWidget(self.resolved_preview)
         layout.addWidget(self.ssl_verify_checkbox)
         layout.addWidget(self.request_tabs)
         layout.addWidget(response_group)
         self.setLayout(layout)
 
     def _get_env_variables(self) -> Dict[str, str]:
-        """Get environment variables as substitution dict"""
+        """Get environment variables as substitution dict, cached per environment"""
+        if self._env_vars_cache and self._env_vars_cache[0] == self.current_environment:
+            return self._env_vars_cache[1]
+
+        substitutions = self._load_env_variables()
+        self._env_vars_cache = (self.current_environment, substitutions)
+        return substitutions
+
+    def _load_env_variables(self) -> Dict[str, str]:
+        """Query environment variables for the current environment"""
         env_id = None
         main_window = self.parent()
         while main_window and not hasattr(main_window, 'env_selector'):
@@ -232,17 +299,18 @@ class RequestTab(QWidget):
         if not env_id:
             return {}
 
-        variables = self.db_manager.execute_query(
-            "SELECT name, value FROM environment_variables WHERE environment_id = ?",
-            (env_id,)
-        )
-        return {f"{{{{{var['name']}}}}}": var['value'] for var in variables}
+        return substitutions_for(self.db_manager.environment_variables(env_id))
+
+    def _response_cache(self):
+        """The main window's response cache, or None when caching is off"""
+        main_window = self.parent()
+        while main_window and not hasattr(main_window, 'http_cache'):
+            main_window = main_window.parent()
+        return main_window.http_cache if main_window else None
 
     def _substitute_text(self, text: str, substitutions: Dict[str, str]) -> str:
         """Apply environment variable substitutions to text"""
-        for placeholder, value in substitutions.items():
-            text = text.replace(placeholder, value)
-        return text
+        return substitute_text(text, substitutions)
 
     def update_auth_ui(self, auth_type: str):
         """Update authorization UI based on selected type"""
@@ -273,25 +341,17 @@ class RequestTab(QWidget):
         if self.http_worker and self.http_worker.isRunning():
             return
 
-        url = self.url_input.text().strip()
+        self.ensure_ui()
+        request = self.current_request()
+        url = request.url.strip()
         if not url:
             QMessageBox.warning(self, "Error", "Please enter a URL")
             return
 
-        # Validate URL structure
-        try:
-            import urllib.parse
-            parsed = urllib.parse.urlparse(url)
-            if not parsed.scheme or not parsed.netloc:
-                raise ValueError("Invalid URL")
-        except:
-            QMessageBox.warning(self, "Error", "Please enter a valid URL")
-            return
-
         # Validate JSON body if applicable
-        body_type = self.body_type.currentText()
+        body_type = request.body_type
         if body_type == "JSON":
-            body_text = self.body_input.toPlainText().strip()
+            body_text = request.body.strip()
             if body_text:
                 try:
                     import json
@@ -302,8 +362,8 @@ class RequestTab(QWidget):
 
         # Validate files if multipart
         files = None
-        if self.body_type.currentText() == BODY_MULTIPART:
-            files = self.get_files()
+        if body_type == BODY_MULTIPART:
+            files = request.request_files()
             if files:
                 # Validate that all files exist
                 import os
@@ -316,17 +376,43 @@ class RequestTab(QWidget):
                         return
 
         # Prepare request data
-        method = self.method_selector.currentText()
-        headers = self.get_headers()
-        params = self.get_params()
-        data = self.get_body_data()
+        with tracer().span('build', 'prepare'):
+            method = request.method
+            headers = request.request_headers()
+            params = request.request_params()
+            data = request.body_data()
 
         # Apply environment variable substitutions
         if self.current_environment:
-            url, headers, params, data = self.apply_substitutions(url, headers, params, data)
+            with tracer().span('substitute', 'prepare'):
+                url, headers, params, data = self.apply_substitutions(url, headers, params, data)
 
-        # Start HTTP worker
-        self.http_worker = HTTPWorker(method, url, headers, data, params, self.ssl_verify_checkbox.isChecked(), files)
+        # Validate URL structure; templates such as {{base_url}}/users are
+        # only complete once substituted
+        try:
+            import urllib.parse
+            parsed = urllib.parse.urlparse(url)
+            if not parsed.scheme or not parsed.netloc:
+                raise ValueError("Invalid URL")
+        except:
+            QMessageBox.warning(self, "Error", "Please enter a valid URL")
+            return
+
+        # History records the request as sent, with variables resolved, so
+        # replaying it does not depend on the environment active at that time
+        self._sent_request = {
+            'method': method,
+            'url': url,
+            'headers': headers,
+            'params': params,
+            'body': data,
+            'body_type': body_type
+        }
+
+        # Start HTTP worker; requests is only imported once something is sent
+        from http_worker import HTTPWorker
+        self.http_worker = HTTPWorker(method, url, headers, data, params, request.verify_ssl, files,
+                                      policy=request.policy, cache=self._response_cache())
         self.http_worker.finished.connect(self.handle_response)
         self.http_worker.error.connect(self.handle_error)
         self.http_worker.start()
@@ -338,60 +424,20 @@ class RequestTab(QWidget):
         self.cancel_button.setEnabled(True)
 
     def get_headers(self) -> Dict[str, str]:
-        """Extract headers from headers table"""
-        headers = {}
-        for row in range(self.headers_table.rowCount()):
-            key_item = self.headers_table.item(row, 0)
-            value_item = self.headers_table.item(row, 1)
-            if key_item and value_item and key_item.text().strip():
-                headers[key_item.text().strip()] = value_item.text().strip()
-
-        # Add authorization header
-        auth_type = self.auth_type.currentText()
-        if auth_type == "Bearer Token" and self.bearer_token_input.text().strip():
-            headers['Authorization'] = f"Bearer {self.bearer_token_input.text().strip()}"
-        elif auth_type == "Basic Auth" and self.basic_username.text().strip() and self.basic_password.text().strip():
-            import base64
-            creds = f"{self.basic_username.text().strip()}:{self.basic_password.text().strip()}"
-            encoded = base64.b64encode(creds.encode()).decode()
-            headers['Authorization'] = f"Basic {encoded}"
-
-        return headers
+        """Headers to send, including the Authorization header"""
+        return self.current_request().request_headers()
 
     def get_params(self) -> Dict[str, str]:
-        """Extract URL parameters from params table"""
-        params = {}
-        for row in range(self.params_table.rowCount()):
-            key_item = self.params_table.item(row, 0)
-            value_item = self.params_table.item(row, 1)
-            if key_item and value_item and key_item.text().strip():
-                params[key_item.text().strip()] = value_item.text().strip()
-        return params
+        """URL parameters to send"""
+        return self.current_request().request_params()
 
     def get_body_data(self) -> Optional[str]:
         """Get request body data"""
-        body_type = self.body_type.currentText()
-        if body_type == BODY_NONE:
-            return None
-        elif body_type == BODY_MULTIPART:
-            # For multipart, return dict of files, but since requests expects files, handle in send_request
-            return None
-
-        body_text = self.body_input.toPlainText()
-        if not body_text.strip():
-            return None
-
-        return body_text
+        return self.current_request().body_data()
 
     def get_files(self) -> Optional[Dict[str, str]]:
         """Get multipart files dict"""
-        files = {}
-        for row in range(self.multipart_table.rowCount()):
-            key_item = self.multipart_table.item(row, 0)
-            value_item = self.multipart_table.item(row, 1)
-            if key_item and value_item and key_item.text().strip() and value_item.text().strip():
-                files[key_item.text().strip()] = value_item.text().strip()
-        return files if files else None
+        return self.current_request().request_files()
 
     def apply_substitutions(self, url: str, headers: Dict[str, str], params: Dict[str, str], data: Optional[str]):
         """Apply environment variable substitutions to request data"""
@@ -407,20 +453,26 @@ class RequestTab(QWidget):
 
         return url, headers, params, data
 
-    def handle_response(self, result: Dict):
+    def handle_response(self, result: HttpResponse):
         """Handle successful HTTP response"""
+        with tracer().span('display', 'display', status_code=result.status_code, size=result.size):
+            self._show_response(result)
+
+    def _show_response(self, result: HttpResponse):
         self.send_button.setText("Send")
         self.send_button.setEnabled(True)
         self.cancel_button.hide()
         self.cancel_button.setEnabled(False)
 
         # Format response size
-        size = result.get('size', 0)
+        size = result.size
         size_str = self.format_size(size)
 
         # Update response metadata with color coding
-        status_code = result.get('status_code', 0)
+        status_code = result.status_code
         status_text = f"Status: {status_code}"
+        if result.cache_status:
+            status_text += f" ({CACHE_STATUS_LABELS[result.cache_status]})"
         if 200 <= status_code < 300:
             status_color = "green"
         elif 400 <= status_code < 500:
@@ -431,36 +483,45 @@ class RequestTab(QWidget):
             status_color = "blue"
         
         self.status_label.setText(f'<span style="color: {status_color};">{status_text}</span>')
-        response_time = result.get('response_time', 0)
-        self.time_label.setText(f"Time: {response_time} ms")
+        response_time = result.response_time
+        if result.attempts:
+            self.time_label.setText(f"Time: {response_time} ms ({len(result.attempts)} attempts)")
+            self.time_label.setToolTip("\n".join(
+                f"#{attempt['attempt']}: {attempt.get('status_code') or attempt.get('error')} "
+                f"in {attempt['response_time']} ms" for attempt in result.attempts
+            ))
+        else:
+            self.time_label.setText(f"Time: {response_time} ms")
+            self.time_label.setToolTip("")
         self.size_label.setText(f"Size: {size_str}")
 
-        # Format and update response body
-        content_type = result.get('headers', {}).get('Content-Type', '')
-        response_text = result.get('text', '')
-        formatted_body = self.format_response_body(response_text, content_type)
-        self.response_body.setPlainText(formatted_body)
-        
-        # Set syntax highlighter based on content type
-        if hasattr(self, 'response_highlighter') and self.response_highlighter:
-            self.response_highlighter.set_lexer(content_type)
-
-        # Update response headers
-        headers = result.get('headers', {})
-        self.response_headers_table.setRowCount(len(headers))
-        for i, (key, value) in enumerate(headers.items()):
-            self.response_headers_table.setItem(i, 0, QTableWidgetItem(str(key)))
-            self.response_headers_table.setItem(i, 1, QTableWidgetItem(str(value)))
-
-        # Update response cookies
-        cookies = result.get('cookies', {})
-        self.response_cookies_table.setRowCount(len(cookies))
-        for i, (key, value) in enumerate(cookies.items()):
-            self.response_cookies_table.setItem(i, 0, QTableWidgetItem(str(key)))
-            self.response_cookies_table.setItem(i, 1, QTableWidgetItem(str(value)))
+        # Show the body; large bodies are formatted off the GUI thread
+        with tracer().span('show_body', 'display'):
+            self.show_response_body(result.text, result.content_type,
+                                    raw=result.content if result.is_utf8 else None)
+
+        with tracer().span('populate_tables', 'display'):
+            # Update response headers
+            headers = result.headers
+            self.response_headers_table.setRowCount(len(headers))
+            for i, (key, value) in enumerate(headers.items()):
+                self.response_headers_table.setItem(i, 0, QTableWidgetItem(str(key)))
+                self.response_headers_table.setItem(i, 1, QTableWidgetItem(str(value)))
+
+            # Update response cookies
+            cookies = result.cookies
+            self.response_cookies_table.setRowCount(len(cookies))
+            for i, (key, value) in enumerate(cookies.items()):
+                self.response_cookies_table.setItem(i, 0, QTableWidgetItem(str(key)))
+                self.response_cookies_table.setItem(i, 1, QTableWidgetItem(str(value)))
 
         # Log to history
-        self.log_to_history(result)
+        with tracer().span('history_write', 'display'):
+            self.log_to_history(result)
+
+        # A response arriving in a background tab goes straight to disk
+        if not self.isVisible():
+            self.hibernate()
 
     def handle_error(self, error_msg: str):
         """Handle HTTP request error"""
@@ -472,7 +533,10 @@ class RequestTab(QWidget):
         self.status_label.setText('<span style="color: red;">Status: Error</span>')
         self.time_label.setText("Time: -")
         self.size_label.setText("Size: -")
+        self._cancel_formatting()
+        self.discard_spilled_body()
         self.response_body.setPlainText(f"Error: {error_msg}")
+        self.set_response_document(None)
 
         QMessageBox.critical(self, "Request Error", f"Failed to send request:\n{error_msg}")
     
@@ -509,165 +573,353 @@ class RequestTab(QWidget):
     
     def format_response_body(self, text: str, content_type: str) -> str:
         """Format response body based on content type"""
-        if not text or not isinstance(text, str):
-            return str(text) if text is not None else ""
-        
-        content_type_lower = (content_type or "").lower()
-        
-        # Pretty print JSON
-        if 'json' in content_type_lower or (not content_type and self._looks_like_json(text)):
-            try:
-                data = json.loads(text)
-                return json.dumps(data, indent=2, ensure_ascii=False)
-            except (json.JSONDecodeError, ValueError):
-                return text  # Return as-is if invalid JSON
-        
-        # Pretty print XML
-        elif 'xml' in content_type_lower or (not content_type and self._looks_like_xml(text)):
-            try:
-                import xml.dom.minidom
-                dom = xml.dom.minidom.parseString(text)
-                return dom.toprettyxml(indent="  ")
-            except Exception:
-                return text
-        
-        return text
-    
+        return format_body(text, content_type)
+
     def _looks_like_json(self, text: str) -> bool:
         """Heuristic to check if text looks like JSON"""
-        text_stripped = text.strip()
-        return text_stripped.startswith(('{', '[')) and text_stripped.endswith(('}', ']'))
-    
+        return looks_like_json(text)
+
     def _looks_like_xml(self, text: str) -> bool:
         """Heuristic to check if text looks like XML"""
-        text_stripped = text.strip()
-        return text_stripped.startswith('<') and '>' in text_stripped
-
-    def log_to_history(self, result: Dict):
-        """Log request to history"""
-        request_data = {
-            'method': self.method_selector.currentText(),
-            'url': self.url_input.text(),
-            'headers': self.get_headers(),
-            'params': self.get_params(),
-            'body': self.get_body_data()
-        }
+        return looks_like_xml(text)
+
+    def show_response_body(self, text: str, content_type: str, raw: Optional[bytes] = None):
+        """Display a response body, swapping in the formatted version when ready.
+
+        raw is the received body when it is UTF-8; bodies that need no
+        formatting are then displayed from it without another copy.
+        """
+        self._cancel_formatting()
+        self.discard_spilled_body()
+        self._response_content_type = content_type
+        if not isinstance(text, str):
+            text = str(text) if text is not None else ""
+        document = ResponseDocument(text, content_type)
+        self.set_response_document(document)
+
+        if raw is not None and document.kind is None:
+            self.response_body.set_buffer(LineBuffer(raw))
+            self._update_response_highlighter()
+            return
+
+        if len(text) <= FORMAT_ASYNC_THRESHOLD:
+            # Small bodies are parsed once here; the tree and queries reuse it
+            with tracer().span('format', 'display', size=len(text)):
+                formatted = document.formatted()
+            self.response_body.setPlainText(formatted)
+            self._update_response_highlighter()
+            return
+
+        # Raw body first, pretty version from the worker pool later
+        self.response_body.setPlainText(text)
+        self._update_response_highlighter()
+        task = FormatTask(self._format_generation, text, content_type)
+        task.signals.finished.connect(self._on_body_formatted)
+        self._format_task = task
+        task.start()
+
+    def _cancel_formatting(self):
+        """Invalidate any pending formatting result"""
+        self._format_generation += 1
+        task = self._format_task
+        if task:
+            task.cancel()
+            self._format_task = None
+
+    def _on_body_formatted(self, generation: int, buffer):
+        """Swap in a formatted body unless a newer response arrived meanwhile"""
+        if generation != self._format_generation:
+            buffer.close()
+            return
+        self._format_task = None
+        self.response_body.set_buffer(buffer)
+        self._update_response_highlighter()
+        if not self.isVisible():
+            self.hibernate()
+
+    def hibernate(self):
+        """Move a large response body to a spill file while the tab is hidden"""
+        if not self._ui_built:
+            return
+        buffer = self.response_body.buffer
+        if (self._spilled is not None or self._spill_task is not None or self._format_task is not None
+                or buffer.path is not None or buffer.size < HIBERNATE_THRESHOLD):
+            return
+        document = self.response_document
+        # Pretty-printed bodies keep the received text for queries and diffs
+        source = document.text if document is not None and document.kind is not None else None
+        self._spill_generation += 1
+        task = SpillTask(self._spill_generation, buffer, source)
+        task.signals.finished.connect(self._on_body_spilled)
+        self._spill_task = task
+        task.start()
+
+    def _on_body_spilled(self, generation: int, result):
+        """Release the in-memory body once its spill file is written"""
+        if generation != self._spill_generation:
+            # Cancelled: the tab was shown or got a new response meanwhile
+            if result is not None:
+                remove_spill_file(result[0])
+                remove_spill_file(result[1])
+            return
+        self._spill_task = None
+        if result is None:
+            return
+        path, source_path = result
+        if self.isVisible():
+            remove_spill_file(path)
+            remove_spill_file(source_path)
+            return
+        self._spilled = SpilledBody(path, source_path, self._response_content_type,
+                                    self.response_tabs.currentIndex(),
+                                    self.response_body.verticalScrollBar().value())
+        self.response_body.clear()
+        self.set_response_document(None)
+        self._update_response_highlighter()
+
+    def wake(self):
+        """Restore a hibernated response body"""
+        self._cancel_spilling()
+        spilled = self._spilled
+        if spilled is None:
+            return
+        self._spilled = None
+        try:
+            buffer = spilled.load_buffer()
+            text = spilled.load_source(buffer)
+        except OSError as e:
+            logging.warning(f"Could not restore response body: {e}")
+            spilled.discard()
+            self.response_body.setPlainText(f"Error: response body could not be restored: {e}")
+            return
+        self.response_body.set_buffer(buffer)
+        self._update_response_highlighter()
+        self.set_response_document(ResponseDocument(text, spilled.content_type))
+        if self.response_tabs.isTabEnabled(spilled.tab_index):
+            self.response_tabs.setCurrentIndex(spilled.tab_index)
+        self.response_body.verticalScrollBar().setValue(spilled.scroll)
+
+    def _cancel_spilling(self):
+        """Invalidate any spill file still being written"""
+        self._spill_generation += 1
+        task = self._spill_task
+        if task:
+            task.cancel()
+            self._spill_task = None
+
+    def discard_spilled_body(self):
+        """Drop a hibernated body, e.g. when it is replaced or the tab closes"""
+        self._cancel_spilling()
+        if self._spilled is not None:
+            self._spilled.discard()
+            self._spilled = None
+
+    def _update_response_highlighter(self):
+        """Set syntax highlighter based on content type and current body"""
+        if not self._ui_built:
+            return
+        if self.response_highlighter is None:
+            # Pygments is only imported once there is something to highlight
+            from syntax_highlighter import SyntaxHighlighter
+            self.response_highlighter = SyntaxHighlighter(self.response_body)
+            self.response_body.set_highlighter(self.response_highlighter)
+        self.response_highlighter.set_lexer(self._response_content_type, self.response_body.buffer)
+        self.response_body.viewport().update()
+
+    def set_response_document(self, document: Optional[ResponseDocument]):
+        """Point the tree and query tabs at a new response; parsing is deferred"""
+        self.response_document = document
+        self._response_tree_stale = True
+        self._cancel_tree_parsing()
+        self.response_tree_model.clear()
+        self.query_panel.set_document(document)
+
+        kind = document.kind if document is not None else None
+        tree_enabled = kind == 'json' and len(document.text) <= JSON_TREE_MAX_SIZE
+        if not tree_enabled and self.response_tabs.currentWidget() is self.response_tree:
+            self.response_tabs.setCurrentWidget(self.response_body_panel)
+        if kind is None and self.response_tabs.currentWidget() is self.query_panel:
+            self.response_tabs.setCurrentWidget(self.response_body_panel)
+        self.response_tabs.setTabEnabled(self.response_tabs.indexOf(self.response_tree), tree_enabled)
+        self.response_tabs.setTabEnabled(self.response_tabs.indexOf(self.query_panel), kind is not None)
+        if self.response_tabs.currentWidget() is self.response_tree:
+            self.update_response_tree()
+
+    def on_response_tab_changed(self, index: int):
+        """Build the tree lazily the first time it is shown for a response"""
+        if self.response_tabs.widget(index) is self.response_tree:
+            self.update_response_tree()
+
+    def update_response_tree(self):
+        """Show the parsed JSON body in the tree model if not done yet"""
+        document = self.response_document
+        if not self._response_tree_stale or document is None or document.kind != 'json':
+            return
+        self._response_tree_stale = False
+        if not document.is_parsed and len(document.text) > FORMAT_ASYNC_THRESHOLD:
+            # Large bodies are decoded in the worker pool, not on the GUI thread
+            task = JsonParseTask(self._tree_generation, document)
+            task.signals.finished.connect(self._on_tree_parsed)
+            self._tree_task = task
+            task.start()
+            return
+        try:
+            parsed = document.parsed()
+        except ValueError as e:
+            logging.info(f"Response body is not valid JSON: {e}")
+            return
+        self._show_response_tree(parsed)
 
+    def _on_tree_parsed(self, generation: int, result):
+        """Show a document decoded by the worker pool unless the response changed meanwhile"""
+        if generation != self._tree_generation:
+            return
+        self._tree_task = None
+        self._show_response_tree(*result)
+
+    def _show_response_tree(self, parsed, total: Optional[int] = None):
+        with tracer().span('populate_tree', 'display'):
+            self.response_tree_model.set_document(parsed, total)
+            self.response_tree.expandToDepth(0)
+
+    def _cancel_tree_parsing(self):
+        """Invalidate any document still being decoded for the tree"""
+        self._tree_generation += 1
+        task = self._tree_task
+        if task:
+            task.cancel()
+            self._tree_task = None
+
+    def log_to_history(self, result: HttpResponse):
+        """Log the request as it was sent to history"""
+        request_data = self._sent_request
         self.db_manager.execute_update(
-            """INSERT INTO history (method, url, request_data, response_data, status_code, response_time)
-               VALUES (?, ?, ?, ?, ?, ?)""",
+            """INSERT INTO history (method, url, request_data, response_data, response_body, status_code, response_time)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
             (
-                self.method_selector.currentText(),
-                self.url_input.text(),
+                request_data['method'],
+                request_data['url'],
                 json.dumps(request_data),
-                json.dumps(result),
-                result['status_code'],
-                result['response_time']
+                # The body is stored as raw bytes, not as text inside JSON
+                json.dumps(result.metadata()),
+                result.content,
+                result.status_code,
+                result.response_time
             )
         )
 
     def get_request_data(self) -> Dict:
         """Get current request data as dictionary"""
-        auth_type = self.auth_type.currentText()
-        bearer_token = self.bearer_token_input.text() if auth_type == "Bearer Token" else None
-        if bearer_token:
-            bearer_token = self.db_manager.encrypt(bearer_token)
-        basic_username = self.basic_username.text() if auth_type == "Basic Auth" else None
-        if basic_username:
-            basic_username = self.db_manager.encrypt(basic_username)
-        basic_password = self.basic_password.text() if auth_type == "Basic Auth" else None
-        if basic_password:
-            basic_password = self.db_manager.encrypt(basic_password)
-
-        return {
-            'method': self.method_selector.currentText(),
-            'url': self.url_input.text(),
-            'headers': self.get_headers(),
-            'params': self.get_params(),
-            'body': self.get_body_data(),
-            'auth_type': auth_type,
-            'bearer_token': bearer_token,
-            'basic_username': basic_username,
-            'basic_password': basic_password,
-            'body_type': self.body_type.currentText()
-        }
+        return self.current_request().to_dict(self.db_manager.encrypt)
 
     def load_request_data(self, request_data: Dict):
         """Load request data from dictionary"""
-        self.method_selector.setCurrentText(request_data.get('method', 'GET'))
-        self.url_input.setText(request_data.get('url', ''))
-
-        # Load headers
-        headers = request_data.get('headers', {})
-        self.headers_table.setRowCount(len(headers))
-        for i, (key, value) in enumerate(headers.items()):
-            self.headers_table.setItem(i, 0, QTableWidgetItem(key))
-            self.headers_table.setItem(i, 1, QTableWidgetItem(value))
-
-        # Load params
-        params = request_data.get('params', {})
-        self.params_table.setRowCount(len(params))
-        for i, (key, value) in enumerate(params.items()):
-            self.params_table.setItem(i, 0, QTableWidgetItem(key))
-            self.params_table.setItem(i, 1, QTableWidgetItem(value))
-
-        # Load auth
-        auth_type = request_data.get('auth_type', 'No Auth')
-        self.auth_type.setCurrentText(auth_type)
-        if auth_type == "Bearer Token":
-            bearer_token = request_data.get('bearer_token')
-            if bearer_token:
-                try:
-                    bearer_token = self.db_manager.decrypt(bearer_token)
-                except Exception:
-                    bearer_token = ''  # Decryption failed, perhaps old data
-            self.bearer_token_input.setText(bearer_token or '')
-        elif auth_type == "Basic Auth":
-            basic_username = request_data.get('basic_username')
-            if basic_username:
-                try:
-                    basic_username = self.db_manager.decrypt(basic_username)
-                except Exception:
-                    basic_username = ''
-            self.basic_username.setText(basic_username or '')
-            basic_password = request_data.get('basic_password')
-            if basic_password:
-                try:
-                    basic_password = self.db_manager.decrypt(basic_password)
-                except Exception:
-                    basic_password = ''
-            self.basic_password.setText(basic_password or '')
-
-        # Load body
-        body_type = request_data.get('body_type', 'None')
-        self.body_type.setCurrentText(body_type)
-        self.body_input.setPlainText(request_data.get('body', ''))
-
-    def substitute_variables(self):
-        """Substitute environment variables in request data"""
-        substitutions = self._get_env_variables()
-        if not substitutions:
+        self.request = RequestModel.from_dict(request_data, self.db_manager.decrypt)
+        if self._ui_built:
+            self._show_request(self.request)
+
+    def current_request(self) -> RequestModel:
+        """The request as currently edited"""
+        if self._ui_built:
+            self.request = self._read_request()
+        return self.request
+
+    @staticmethod
+    def _table_items(table: QTableWidget) -> Dict[str, str]:
+        """Key/value pairs of a two-column table, skipping incomplete rows"""
+        items = {}
+        for row in range(table.rowCount()):
+            key_item = table.item(row, 0)
+            value_item = table.item(row, 1)
+            if key_item and value_item and key_item.text().strip():
+                items[key_item.text()] = value_item.text()
+        return items
+
+    @staticmethod
+    def _fill_table(table: QTableWidget, items: Dict[str, str]):
+        table.setRowCount(len(items))
+        for i, (key, value) in enumerate(items.items()):
+            table.setItem(i, 0, QTableWidgetItem(key))
+            table.setItem(i, 1, QTableWidgetItem(value))
+
+    def _read_request(self) -> RequestModel:
+        """Build a request model from the widgets"""
+        return RequestModel(
+            method=self.method_selector.currentText(),
+            url=self.url_input.text(),
+            headers=self._table_items(self.headers_table),
+            params=self._table_items(self.params_table),
+            body_type=self.body_type.currentText(),
+            body=self.body_input.toPlainText(),
+            files=self._table_items(self.multipart_table),
+            auth_type=self.auth_type.currentText(),
+            bearer_token=self.bearer_token_input.text(),
+            basic_username=self.basic_username.text(),
+            basic_password=self.basic_password.text(),
+            verify_ssl=self.ssl_verify_checkbox.isChecked(),
+            # Chain declarations and policies have no widgets; keep those of the loaded request
+            extract=self.request.extract,
+            depends_on=self.request.depends_on,
+            policy=self.request.policy,
+        )
+
+    def _show_request(self, request: RequestModel):
+        """Fill the widgets from a request model"""
+        self.method_selector.setCurrentText(request.method)
+        self.url_input.setText(request.url)
+        self._fill_table(self.headers_table, request.headers)
+        self._fill_table(self.params_table, request.params)
+        self.auth_type.setCurrentText(request.auth_type)
+        self.bearer_token_input.setText(request.bearer_token)
+        self.basic_username.setText(request.basic_username)
+        self.basic_password.setText(request.basic_password)
+        self.body_type.setCurrentText(request.body_type)
+        self.body_input.setPlainText(request.body)
+        self._fill_table(self.multipart_table, request.files)
+        self.ssl_verify_checkbox.setChecked(request.verify_ssl)
+
+    def showEvent(self, event):
+        """Resolve the preview lazily and restore the body when the tab becomes visible"""
+        super().showEvent(event)
+        self.ensure_ui()
+        self.wake()
+        self.update_resolved_preview()
+
+    def hideEvent(self, event):
+        """Hibernate the response body when another tab is selected"""
+        super().hideEvent(event)
+        # Minimizing the window is spontaneous and keeps the body in memory
+        if not event.spontaneous():
+            self.hibernate()
+
+    def set_environment(self, environment_name: str):
+        """Switch the active environment without touching the request templates"""
+        if environment_name == self.current_environment:
             return
+        self.current_environment = environment_name
+        self.invalidate_environment_cache()
+
+    def invalidate_environment_cache(self):
+        """Drop cached variables and the resolved preview"""
+        self._env_vars_cache = None
+        self._preview_cache = None
+
+    def update_resolved_preview(self):
+        """Refresh the resolved URL preview; only called for the visible tab"""
+        if not self._ui_built or not self.isVisible():
+            return
+
+        template = self.url_input.text()
+        key = (self.current_environment, template)
+        if self._preview_cache and self._preview_cache[0] == key:
+            resolved = self._preview_cache[1]
+        else:
+            substitutions = self._get_env_variables() if '{{' in template else {}
+            resolved = self._substitute_text(template, substitutions) if substitutions else template
+            self._preview_cache = (key, resolved)
 
-        # Apply to URL
-        self.url_input.setText(self._substitute_text(self.url_input.text(), substitutions))
-
-        # Apply to headers
-        for row in range(self.headers_table.rowCount()):
-            key_item = self.headers_table.item(row, 0)
-            value_item = self.headers_table.item(row, 1)
-            if key_item and value_item:
-                value_item.setText(self._substitute_text(value_item.text(), substitutions))
-
-        # Apply to params
-        for row in range(self.params_table.rowCount()):
-            key_item = self.params_table.item(row, 0)
-            value_item = self.params_table.item(row, 1)
-            if key_item and value_item:
-                value_item.setText(self._substitute_text(value_item.text(), substitutions))
-
-        # Apply to body
-        self.body_input.setPlainText(self._substitute_text(self.body_input.toPlainText(), substitutions))
+        # Only worth showing when the template actually resolves to something else
+        self.resolved_preview.setText(resolved if resolved != template else "")
 
     def add_param_row(self):
         """Add a new row to params table"""
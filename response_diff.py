@@ -0,0 +1,319 @@
+"""Line and JSON-structural diffs of response bodies.
+
+Lines are interned to integers so that comparisons are cheap, common
+prefixes and suffixes are trimmed, and the rest is aligned with Myers'
+linear-space O((N+M)D) algorithm, which stays close to linear for the small
+edit distances typical of two versions of the same API response.
+"""
+
+import json
+from bisect import bisect_right
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from json_path import child_path
+from response_formatter import body_kind
+
+# Regions needing more edits than this are reported as one replacement
+# instead of being aligned further
+MAX_EDIT_COST = 4096
+# Unchanged lines shown around each change
+CONTEXT_LINES = 3
+
+Opcode = Tuple[str, int, int, int, int]
+
+
+def intern_lines(a: Sequence[str], b: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """Map equal lines to equal integers"""
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _bisect(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int,
+            max_cost: int) -> Optional[Tuple[int, int]]:
+    """Find the middle of an optimal edit path, or None if it costs too much"""
+    n = ahi - alo
+    m = bhi - blo
+    max_d = min((n + m + 1) // 2, max_cost)
+    offset = max_d + 1
+    v_forward = [-1] * (2 * offset + 2)
+    v_backward = [-1] * (2 * offset + 2)
+    v_forward[offset + 1] = 0
+    v_backward[offset + 1] = 0
+    delta = n - m
+    front = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            index = offset + k1
+            if k1 == -d or (k1 != d and v_forward[index - 1] < v_forward[index + 1]):
+                x1 = v_forward[index + 1]
+            else:
+                x1 = v_forward[index - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[alo + x1] == b[blo + y1]:
+                x1 += 1
+                y1 += 1
+            v_forward[index] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_index = offset + delta - k1
+                if 0 <= k2_index < len(v_backward) and v_backward[k2_index] != -1:
+                    if x1 >= n - v_backward[k2_index]:
+                        return x1, y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            index = offset + k2
+            if k2 == -d or (k2 != d and v_backward[index - 1] < v_backward[index + 1]):
+                x2 = v_backward[index + 1]
+            else:
+                x2 = v_backward[index - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[ahi - 1 - x2] == b[bhi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v_backward[index] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_index = offset + delta - k2
+                if 0 <= k1_index < len(v_forward) and v_forward[k1_index] != -1:
+                    x1 = v_forward[k1_index]
+                    y1 = x1 - (k1_index - offset)
+                    if x1 >= n - x2:
+                        return x1, y1
+    return None
+
+
+def diff_sequences(a: Sequence, b: Sequence, max_cost: int = MAX_EDIT_COST) -> List[Opcode]:
+    """Return difflib-style opcodes turning a into b.
+
+    Items must be hashable; comparing interned integers is fastest.
+    """
+    raw = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        # Trim the common prefix and suffix
+        start_a, start_b = alo, blo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start_a:
+            raw.append(('equal', start_a, alo, start_b, blo))
+        end_a, end_b = ahi, bhi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        suffix = ('equal', ahi, end_a, bhi, end_b) if ahi < end_a else None
+
+        if alo == ahi or blo == bhi:
+            if alo < ahi:
+                raw.append(('delete', alo, ahi, blo, blo))
+            elif blo < bhi:
+                raw.append(('insert', alo, alo, blo, bhi))
+        else:
+            middle = _bisect(a, alo, ahi, b, blo, bhi, max_cost)
+            if middle is None:
+                raw.append(('replace', alo, ahi, blo, bhi))
+            else:
+                x, y = middle
+                # Pushed in reverse so the left half is processed first;
+                # the suffix is emitted after both halves
+                if suffix:
+                    stack.append(('suffix',) + suffix[1:])
+                stack.append((alo + x, ahi, blo + y, bhi))
+                stack.append((alo, alo + x, blo, blo + y))
+                continue
+        if suffix:
+            raw.append(suffix)
+
+        # Emit any suffixes whose halves are now complete
+        while stack and stack[-1][0] == 'suffix':
+            raw.append(('equal',) + stack.pop()[1:])
+
+    return _merge_opcodes(raw)
+
+
+def _merge_opcodes(raw: List[Opcode]) -> List[Opcode]:
+    """Join adjacent opcodes and turn delete+insert pairs into replacements"""
+    merged = []
+    for tag, i1, i2, j1, j2 in raw:
+        if i1 == i2 and j1 == j2:
+            continue
+        if merged:
+            last_tag, li1, li2, lj1, lj2 = merged[-1]
+            if last_tag == tag or (last_tag != 'equal' and tag != 'equal'):
+                if last_tag != tag:
+                    tag = 'replace'
+                merged[-1] = (tag, li1, i2, lj1, j2)
+                continue
+        merged.append((tag, i1, i2, j1, j2))
+    return merged
+
+
+def diff_lines(a: Sequence[str], b: Sequence[str], max_cost: int = MAX_EDIT_COST) -> List[Opcode]:
+    """Diff two lists of lines using interned line ids"""
+    a_ids, b_ids = intern_lines(a, b)
+    return diff_sequences(a_ids, b_ids, max_cost)
+
+
+def canonical_json_lines(document: Any) -> List[str]:
+    """Lines of a JSON value with sorted keys, so key order does not show as a change"""
+    return json.dumps(document, indent=2, sort_keys=True, ensure_ascii=False).split('\n')
+
+
+def json_changes(old: Any, new: Any, path: str = '$') -> Iterator[Tuple[str, str, Any, Any]]:
+    """Yield (path, kind, old, new) for each structural change.
+
+    kind is 'added', 'removed' or 'changed'. Array elements are aligned by
+    content, so an insertion reports one added element rather than a change
+    at every following index.
+    """
+    stack = [(path, old, new)]
+    while stack:
+        path, old, new = stack.pop()
+        if isinstance(old, dict) and isinstance(new, dict):
+            pending = []
+            for key in old:
+                if key not in new:
+                    yield child_path(path, key), 'removed', old[key], None
+                elif _differs(old[key], new[key]):
+                    pending.append((child_path(path, key), old[key], new[key]))
+            for key in new:
+                if key not in old:
+                    yield child_path(path, key), 'added', None, new[key]
+            stack.extend(reversed(pending))
+        elif isinstance(old, list) and isinstance(new, list):
+            old_ids, new_ids = intern_lines(
+                [json.dumps(item, sort_keys=True) for item in old],
+                [json.dumps(item, sort_keys=True) for item in new],
+            )
+            pending = []
+            for tag, i1, i2, j1, j2 in diff_sequences(old_ids, new_ids):
+                if tag == 'equal':
+                    continue
+                paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+                for offset in range(paired):
+                    pending.append((child_path(path, j1 + offset), old[i1 + offset], new[j1 + offset]))
+                for index in range(i1 + paired, i2):
+                    pending.append((child_path(path, index), old[index], _REMOVED))
+                for index in range(j1 + paired, j2):
+                    pending.append((child_path(path, index), _ADDED, new[index]))
+            stack.extend(reversed(pending))
+        elif old is _ADDED:
+            yield path, 'added', None, new
+        elif new is _REMOVED:
+            yield path, 'removed', old, None
+        elif _differs(old, new):
+            yield path, 'changed', old, new
+
+
+_ADDED = object()
+_REMOVED = object()
+
+
+def _differs(old: Any, new: Any) -> bool:
+    # 1 == True in Python, but not in JSON
+    return old != new or type(old) is not type(new)
+
+
+class DiffRows:
+    """Row-addressable unified view of a diff, with long unchanged runs folded.
+
+    Rows are produced on demand from the opcodes, so rendering never builds
+    the full diff text. Each row is (kind, old_line, new_line, text) where
+    kind is ' ', '-', '+' or '@' for a fold marker.
+    """
+
+    def __init__(self, a: Sequence[str], b: Sequence[str], opcodes: List[Opcode],
+                 context: int = CONTEXT_LINES):
+        self.a = a
+        self.b = b
+        # Segments are (kind, old_start, new_start, count); '@' segments
+        # stand for one marker row covering count folded lines
+        self.segments = []
+        last = len(opcodes) - 1
+        for number, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+            if tag == 'equal':
+                head = 0 if number == 0 else context
+                tail = 0 if number == last else context
+                if i2 - i1 > head + tail + 1:
+                    if head:
+                        self.segments.append((' ', i1, j1, head))
+                    folded = i2 - i1 - head - tail
+                    self.segments.append(('@', i1 + head, j1 + head, folded))
+                    if tail:
+                        self.segments.append((' ', i2 - tail, j2 - tail, tail))
+                else:
+                    self.segments.append((' ', i1, j1, i2 - i1))
+            else:
+                if i2 > i1:
+                    self.segments.append(('-', i1, j1, i2 - i1))
+                if j2 > j1:
+                    self.segments.append(('+', i2, j1, j2 - j1))
+
+        self._first_rows = []
+        rows = 0
+        for kind, _, _, count in self.segments:
+            self._first_rows.append(rows)
+            rows += 1 if kind == '@' else count
+        self.row_count = rows
+        self.changed = sum(count for kind, _, _, count in self.segments if kind in '-+')
+
+    def row(self, row: int) -> Tuple[str, Optional[int], Optional[int], str]:
+        """Return (kind, old line, new line, text) for a row; line numbers are 0-based"""
+        if row < 0 or row >= self.row_count:
+            raise IndexError(f"Row {row} out of range")
+        segment = bisect_right(self._first_rows, row) - 1
+        kind, old_start, new_start, count = self.segments[segment]
+        offset = row - self._first_rows[segment]
+        if kind == '@':
+            return '@', old_start, new_start, f'… {count} unchanged lines'
+        if kind == '-':
+            return '-', old_start + offset, None, self.a[old_start + offset]
+        if kind == '+':
+            return '+', None, new_start + offset, self.b[new_start + offset]
+        return ' ', old_start + offset, new_start + offset, self.a[old_start + offset]
+
+    def next_change(self, row: int) -> Optional[int]:
+        """First row of the next change after row, or None"""
+        for segment, (kind, _, _, _) in enumerate(self.segments):
+            first = self._first_rows[segment]
+            if kind in '-+' and first > row and (segment == 0 or self.segments[segment - 1][0] not in '-+'):
+                return first
+        return None
+
+
+def diff_bodies(old_text: str, new_text: str, old_content_type: str = "",
+                new_content_type: str = "", max_cost: int = MAX_EDIT_COST) -> Tuple[DiffRows, Optional[list]]:
+    """Diff two response bodies.
+
+    JSON bodies are compared on canonical, key-sorted lines and also return
+    the list of structural changes; anything else is compared line by line
+    and returns None for the changes.
+    """
+    old_text = old_text or ""
+    new_text = new_text or ""
+    if body_kind(old_text, old_content_type) == 'json' and body_kind(new_text, new_content_type) == 'json':
+        try:
+            old_document = json.loads(old_text)
+            new_document = json.loads(new_text)
+        except ValueError:
+            pass
+        else:
+            a = canonical_json_lines(old_document)
+            b = canonical_json_lines(new_document)
+            return DiffRows(a, b, diff_lines(a, b, max_cost)), list(json_changes(old_document, new_document))
+
+    a = old_text.splitlines()
+    b = new_text.splitlines()
+    return DiffRows(a, b, diff_lines(a, b, max_cost)), None
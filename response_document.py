@@ -0,0 +1,130 @@
+import json
+from itertools import islice
+from typing import Any, Iterator, List, Tuple
+from xml.etree import ElementTree
+
+from constants import STREAMING_FORMAT_THRESHOLD
+from json_path import compile_json_path
+from response_formatter import body_kind, format_body, pretty_json
+
+# Characters of a query result shown per row
+RESULT_PREVIEW_CHARS = 500
+# Containers with more children than this are summarized instead of serialized
+RESULT_PREVIEW_ITEMS = 50
+
+_UNPARSED = object()
+
+
+class ResponseDocument:
+    """A response body together with its parsed JSON value or XML tree.
+
+    The body is parsed at most once, on first use, and the result is shared
+    by formatting, the tree view and queries.
+    """
+
+    def __init__(self, text: str, content_type: str):
+        self.text = text if isinstance(text, str) else ""
+        self.content_type = content_type or ""
+        self.kind = body_kind(self.text, self.content_type) if self.text else None
+        self._parsed = _UNPARSED
+        self._error = None
+
+    @property
+    def is_parsed(self) -> bool:
+        return self._parsed is not _UNPARSED
+
+    def parsed(self) -> Any:
+        """Decoded JSON value or XML root element; raises ValueError if malformed"""
+        if self._parsed is _UNPARSED:
+            if self._error is None:
+                try:
+                    if self.kind == 'json':
+                        self._parsed = json.loads(self.text)
+                    elif self.kind == 'xml':
+                        self._parsed = ElementTree.fromstring(self.text)
+                    else:
+                        raise ValueError("Body is neither JSON nor XML")
+                except (ValueError, ElementTree.ParseError) as e:
+                    self._error = ValueError(str(e))
+            if self._error is not None:
+                raise self._error
+        return self._parsed
+
+    def formatted(self) -> str:
+        """Pretty printed body, serialized from the parsed value for JSON"""
+        if self.kind == 'json' and len(self.text) <= STREAMING_FORMAT_THRESHOLD:
+            try:
+                return pretty_json(self.parsed())
+            except ValueError:
+                return self.text  # Return as-is if invalid JSON
+        return format_body(self.text, self.content_type)
+
+    def query(self, expression: str) -> Iterator[Tuple[str, str]]:
+        """Lazily yield (location, value) pairs for a JSONPath or XPath expression.
+
+        Raises ValueError for invalid expressions or documents.
+        """
+        document = self.parsed()
+        if self.kind == 'json':
+            for path, value in compile_json_path(expression).iter_matches(document):
+                yield path, _json_preview(value)
+            return
+
+        for element in self._iter_elements(document, expression):
+            yield element.tag, _xml_preview(element)
+
+    def first_value(self, expression: str) -> str:
+        """Full value of the first match as text: JSON strings as they are,
+        other JSON values serialized, XML elements as their text content.
+
+        Raises ValueError if nothing matches or the expression or document
+        is invalid.
+        """
+        document = self.parsed()
+        if self.kind == 'json':
+            for _, value in compile_json_path(expression).iter_matches(document):
+                return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        else:
+            for element in self._iter_elements(document, expression):
+                return ''.join(element.itertext())
+        raise ValueError(f"No match for {expression}")
+
+    @staticmethod
+    def _iter_elements(document: ElementTree.Element, expression: str) -> Iterator[ElementTree.Element]:
+        # ElementTree supports a subset of XPath and caches compiled paths.
+        # Evaluate from a wrapper so absolute and relative paths both start
+        # above the root element.
+        wrapper = ElementTree.Element('document')
+        wrapper.append(document)
+        expression = expression.strip()
+        path = '.' + expression if expression.startswith('/') else './' + expression
+        try:
+            yield from wrapper.iterfind(path)
+        except (SyntaxError, KeyError, TypeError) as e:
+            # ElementPath reports unsupported syntax in several ways
+            raise ValueError(f"Invalid or unsupported XPath: {expression}") from e
+
+
+def _shorten(text: str) -> str:
+    if len(text) > RESULT_PREVIEW_CHARS:
+        return text[:RESULT_PREVIEW_CHARS] + '…'
+    return text
+
+
+def _json_preview(value: Any) -> str:
+    if isinstance(value, dict) and len(value) > RESULT_PREVIEW_ITEMS:
+        return f'{{… {len(value)} keys}}'
+    if isinstance(value, list) and len(value) > RESULT_PREVIEW_ITEMS:
+        return f'[… {len(value)} items]'
+    return _shorten(json.dumps(value, ensure_ascii=False))
+
+
+def _xml_preview(element: ElementTree.Element) -> str:
+    if len(element) > RESULT_PREVIEW_ITEMS:
+        return f'<{element.tag}> … {len(element)} children'
+    return _shorten(ElementTree.tostring(element, encoding='unicode').strip())
+
+
+def query_page(results: Iterator, count: int) -> List:
+    """Take up to count more results from a lazy query"""
+    return list(islice(results, count))
@@ -0,0 +1,394 @@
+import itertools
+import json
+import re
+from typing import IO, Iterator, Optional, Union
+from xml.parsers import expat
+
+from constants import STREAMING_FORMAT_THRESHOLD
+
+
+def looks_like_json(text: str) -> bool:
+    """Heuristic to check if text looks like JSON"""
+    text_stripped = text.strip()
+    return text_stripped.startswith(('{', '[')) and text_stripped.endswith(('}', ']'))
+
+
+def looks_like_xml(text: str) -> bool:
+    """Heuristic to check if text looks like XML"""
+    text_stripped = text.strip()
+    return text_stripped.startswith('<') and '>' in text_stripped
+
+
+def body_kind(text: str, content_type: str) -> Optional[str]:
+    """Return 'json' or 'xml' from the content type, or by sniffing when it is missing"""
+    content_type_lower = (content_type or "").lower()
+    if 'json' in content_type_lower or (not content_type and looks_like_json(text)):
+        return 'json'
+    if 'xml' in content_type_lower or (not content_type and looks_like_xml(text)):
+        return 'xml'
+    return None
+
+
+def pretty_json(data) -> str:
+    """Serialize a decoded JSON value with the standard indentation"""
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def format_body_chunks(text: str, content_type: str) -> Iterator[str]:
+    """Pretty print a response body, yielding the result in pieces.
+
+    XML is always re-indented from parser events. JSON up to
+    STREAMING_FORMAT_THRESHOLD goes through the json module, which is faster
+    for small bodies; larger JSON is re-indented token by token. Raises
+    ValueError if a streamed body turns out to be malformed.
+    """
+    if not text or not isinstance(text, str):
+        yield str(text) if text is not None else ""
+        return
+
+    kind = body_kind(text, content_type)
+
+    # Pretty print JSON
+    if kind == 'json':
+        if len(text) > STREAMING_FORMAT_THRESHOLD:
+            yield from iter_pretty_json(text)
+            return
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, ValueError):
+            yield text  # Return as-is if invalid JSON
+            return
+        yield pretty_json(data)
+
+    # Pretty print XML
+    elif kind == 'xml':
+        yield from iter_pretty_xml(text)
+
+    else:
+        yield text
+
+
+def format_body(text: str, content_type: str) -> str:
+    """Format response body based on content type"""
+    try:
+        pieces = list(format_body_chunks(text, content_type))
+    except ValueError:
+        return text  # Return as-is if malformed
+    return pieces[0] if len(pieces) == 1 else ''.join(pieces)
+
+
+# Input is consumed and output produced in pieces of roughly this size
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_JSON_TOKEN = r'\s*(?:"(?:[^"\\]|\\.)*"|[^\s{}\[\],:"]+|[{}\[\],:])'
+# Matches a run of up to 4096 contiguous tokens, so the scan never skips
+# over malformed input and each run is tokenized in one C call
+_JSON_TOKEN_RUN = re.compile(r'(?:%s){1,4096}' % _JSON_TOKEN)
+_JSON_TOKEN_ONE = re.compile(_JSON_TOKEN)
+_JSON_LITERAL = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_JSON_CLOSERS = {'}': '{', ']': '['}
+# What the JSON re-indenter accepts next
+_EXPECT_VALUE = 0
+_EXPECT_SEPARATOR = 1
+_EXPECT_KEY = 2
+_EXPECT_COLON = 3
+
+
+def _iter_chunks(source: Union[str, bytes, IO], size: int = STREAM_CHUNK_SIZE) -> Iterator:
+    """Yield pieces of a string, bytes object or readable file"""
+    if isinstance(source, (str, bytes, bytearray)):
+        for start in range(0, len(source), size):
+            yield source[start:start + size]
+        return
+    while True:
+        chunk = source.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_pretty_json(text: str, indent: int = 2) -> Iterator[str]:
+    """Re-indent JSON token by token without building an object graph.
+
+    Output matches json.dumps(indent=indent, ensure_ascii=False) apart from
+    escapes and number spellings, which are kept as written. Raises
+    ValueError on malformed input.
+    """
+    out = []
+    append = out.append
+    stack = []
+    expect = _EXPECT_VALUE
+    pending_open = False  # an opening bracket waits to see if it is empty
+    newlines = ['\n']
+    position = 0
+    tokenize = _JSON_TOKEN_ONE.findall
+
+    while True:
+        run = _JSON_TOKEN_RUN.match(text, position)
+        if run is None:
+            break
+        for token in tokenize(text, position, run.end()):
+            char = token[0]
+            if char.isspace():
+                token = token.lstrip()
+                char = token[0]
+
+            if char == '"':
+                if expect == _EXPECT_KEY:
+                    expect = _EXPECT_COLON
+                elif expect == _EXPECT_VALUE:
+                    expect = _EXPECT_SEPARATOR
+                else:
+                    raise ValueError("Unexpected string in JSON")
+                if pending_open:
+                    append(newlines[len(stack)])
+                    pending_open = False
+                append(token)
+            elif char == ',':
+                if expect != _EXPECT_SEPARATOR or not stack:
+                    raise ValueError("Unexpected ',' in JSON")
+                expect = _EXPECT_KEY if stack[-1] == '{' else _EXPECT_VALUE
+                append(',' + newlines[len(stack)])
+            elif char == ':':
+                if expect != _EXPECT_COLON:
+                    raise ValueError("Unexpected ':' in JSON")
+                expect = _EXPECT_VALUE
+                append(': ')
+            elif char == '{' or char == '[':
+                if expect != _EXPECT_VALUE:
+                    raise ValueError(f"Unexpected '{char}' in JSON")
+                expect = _EXPECT_KEY if char == '{' else _EXPECT_VALUE
+                if pending_open:
+                    append(newlines[len(stack)])
+                append(char)
+                stack.append(char)
+                pending_open = True
+                if len(stack) >= len(newlines):
+                    newlines.append('\n' + ' ' * (indent * len(newlines)))
+            elif char == '}' or char == ']':
+                if not stack or stack.pop() != _JSON_CLOSERS[char]:
+                    raise ValueError(f"Unbalanced '{char}' in JSON")
+                if pending_open:
+                    pending_open = False
+                elif expect != _EXPECT_SEPARATOR:
+                    raise ValueError(f"Unexpected '{char}' in JSON")
+                else:
+                    append(newlines[len(stack)])
+                expect = _EXPECT_SEPARATOR
+                append(char)
+            else:
+                if expect != _EXPECT_VALUE or not _JSON_LITERAL.fullmatch(token):
+                    raise ValueError(f"Invalid JSON literal: {token[:40]}")
+                expect = _EXPECT_SEPARATOR
+                if pending_open:
+                    append(newlines[len(stack)])
+                    pending_open = False
+                append(token)
+
+        position = run.end()
+        if len(out) >= 8192:
+            yield ''.join(out)
+            out.clear()
+
+    if stack or expect != _EXPECT_SEPARATOR or text[position:].strip():
+        raise ValueError("Unexpected end of JSON")
+    if out:
+        yield ''.join(out)
+
+
+def _escape(text: str) -> str:
+    """Escape character data; xml.sax.saxutils would pull urllib into startup"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _quote_attribute(value: str) -> str:
+    """Escape and quote an attribute value as xml.sax.saxutils.quoteattr does"""
+    value = _escape(value).replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;')
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return '"' + value.replace('"', '&quot;') + '"'
+
+
+class _XmlReindenter:
+    """Expat event handlers that write indented XML into an output list"""
+
+    def __init__(self, indent: int):
+        self.indent = ' ' * indent
+        self.out = []
+        self.depth = 0
+        self.open_tag = False  # start tag written without its closing '>'
+        self.has_children = []
+        self.text = []
+        self.in_cdata = False
+        self.in_subset = False  # inside the DOCTYPE's internal subset
+        self.wrote_any = False
+
+    def _line(self, depth: int):
+        if self.wrote_any:
+            self.out.append('\n')
+        self.out.append(self.indent * depth)
+        self.wrote_any = True
+
+    def _close_start_tag(self):
+        if self.open_tag:
+            self.out.append('>')
+            self.open_tag = False
+
+    def _flush_text(self):
+        """Write text collected since the last markup on its own line"""
+        text = ''.join(self.text).strip()
+        self.text.clear()
+        if text:
+            self._close_start_tag()
+            self._line(self.depth)
+            self.out.append(_escape(text))
+            if self.has_children:
+                self.has_children[-1] = True
+
+    def xml_decl(self, version, encoding, standalone):
+        decl = f'<?xml version="{version or "1.0"}"'
+        if encoding:
+            decl += f' encoding="{encoding}"'
+        if standalone != -1:
+            decl += f' standalone="{"yes" if standalone else "no"}"'
+        self._line(0)
+        self.out.append(decl + '?>')
+
+    def doctype(self, name, system_id, public_id, has_internal_subset):
+        self._line(0)
+        decl = f'<!DOCTYPE {name}'
+        if public_id:
+            decl += f' PUBLIC "{public_id}" "{system_id}"'
+        elif system_id:
+            decl += f' SYSTEM "{system_id}"'
+        if has_internal_subset:
+            # Declarations are copied as written, until end_doctype
+            self.out.append(decl + ' [')
+            self.in_subset = True
+        else:
+            self.out.append(decl + '>')
+
+    def end_doctype(self):
+        if self.in_subset:
+            self.out.append(']>')
+            self.in_subset = False
+
+    def default(self, data):
+        """Markup without its own handler; only kept inside the internal subset"""
+        if self.in_subset:
+            self.out.append(data)
+
+    def start_element(self, name, attributes):
+        self._flush_text()
+        self._close_start_tag()
+        if self.has_children:
+            self.has_children[-1] = True
+        self._line(self.depth)
+        self.out.append('<' + name)
+        for key, value in attributes.items():
+            self.out.append(f' {key}={_quote_attribute(value)}')
+        self.open_tag = True
+        self.has_children.append(False)
+        self.depth += 1
+
+    def end_element(self, name):
+        has_children = self.has_children.pop()
+        if has_children:
+            # Trailing text of mixed content belongs inside this element
+            self._flush_text()
+        self.depth -= 1
+        text = ''.join(self.text)
+        if not has_children and self.open_tag:
+            # Leaf element: keep its text inline
+            self.text.clear()
+            stripped = text.strip()
+            if stripped:
+                self.out.append('>' + _escape(stripped) + f'</{name}>')
+            else:
+                self.out.append('/>')
+            self.open_tag = False
+            return
+        self.depth += 1
+        self._flush_text()
+        self.depth -= 1
+        self._close_start_tag()
+        self._line(self.depth)
+        self.out.append(f'</{name}>')
+
+    def characters(self, data):
+        if self.in_cdata:
+            self.out.append(data)
+        else:
+            self.text.append(data)
+
+    def start_cdata(self):
+        self._flush_text()
+        self._close_start_tag()
+        if self.has_children:
+            self.has_children[-1] = True
+        self._line(self.depth)
+        self.out.append('<![CDATA[')
+        self.in_cdata = True
+
+    def end_cdata(self):
+        self.out.append(']]>')
+        self.in_cdata = False
+
+    def comment(self, data):
+        self._flush_text()
+        self._close_start_tag()
+        if self.has_children:
+            self.has_children[-1] = True
+        self._line(self.depth)
+        self.out.append(f'<!--{data}-->')
+
+    def processing_instruction(self, target, data):
+        self._flush_text()
+        self._close_start_tag()
+        if self.has_children:
+            self.has_children[-1] = True
+        self._line(self.depth)
+        self.out.append(f'<?{target} {data}?>' if data else f'<?{target}?>')
+
+
+def iter_pretty_xml(source: Union[str, bytes, IO], indent: int = 2) -> Iterator[str]:
+    """Re-indent XML from parser events without building a DOM.
+
+    Raises ValueError on malformed input.
+    """
+    chunks = _iter_chunks(source)
+    first = next(chunks, b'')
+    handler = _XmlReindenter(indent)
+    # Text is fed as UTF-8, so an encoding declaration in it must not be
+    # trusted; bytes are decoded as the document declares
+    parser = expat.ParserCreate(encoding='utf-8' if isinstance(first, str) else None)
+    parser.buffer_text = True
+    parser.ordered_attributes = False
+    parser.XmlDeclHandler = handler.xml_decl
+    parser.StartDoctypeDeclHandler = handler.doctype
+    parser.EndDoctypeDeclHandler = handler.end_doctype
+    # The expanding variant, so internal entities are still expanded in text
+    parser.DefaultHandlerExpand = handler.default
+    parser.StartElementHandler = handler.start_element
+    parser.EndElementHandler = handler.end_element
+    parser.CharacterDataHandler = handler.characters
+    parser.StartCdataSectionHandler = handler.start_cdata
+    parser.EndCdataSectionHandler = handler.end_cdata
+    parser.CommentHandler = handler.comment
+    parser.ProcessingInstructionHandler = handler.processing_instruction
+
+    try:
+        for chunk in itertools.chain([first], chunks):
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            parser.Parse(chunk, False)
+            if handler.out:
+                yield ''.join(handler.out)
+                handler.out.clear()
+        parser.Parse(b'', True)
+    except expat.ExpatError as e:
+        raise ValueError(f"Invalid XML: {e}") from e
+    handler.out.append('\n')
+    yield ''.join(handler.out)
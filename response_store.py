@@ -0,0 +1,162 @@
+"""Spill files holding the response bodies of hibernated request tabs.
+
+A hidden tab writes its body to a file here and drops it from memory. When
+the tab is shown again the file is memory-mapped, so only the pages that
+are painted or searched are read back.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
+from PySide6.QtCore import QObject, Signal
+
+from format_worker import format_executor
+from line_buffer import LineBuffer
+
+# Characters of decoded text encoded and written at a time
+SPILL_TEXT_BLOCK = 1024 * 1024
+
+_spill_directory = None
+
+
+def spill_directory() -> str:
+    """Directory for spill files, created on first use and removed at exit"""
+    global _spill_directory
+    if _spill_directory is None:
+        _spill_directory = tempfile.mkdtemp(prefix="pypost-spill-")
+        atexit.register(shutil.rmtree, _spill_directory, True)
+    return _spill_directory
+
+
+def remove_spill_file(path: Optional[str]):
+    """Delete a spill file; mapped files that cannot be deleted go at exit"""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError as e:
+        logging.info(f"Spill file {path} kept until exit: {e}")
+
+
+def _new_spill_file():
+    fd, path = tempfile.mkstemp(suffix=".body", dir=spill_directory())
+    return os.fdopen(fd, 'wb'), path
+
+
+def spill_buffer(buffer: LineBuffer) -> str:
+    """Write a line buffer to a new spill file and return its path"""
+    f, path = _new_spill_file()
+    try:
+        with f:
+            buffer.write_to(f)
+    except OSError:
+        remove_spill_file(path)
+        raise
+    return path
+
+
+def spill_text(text: str) -> str:
+    """Write text as UTF-8 to a new spill file, encoding it block by block"""
+    f, path = _new_spill_file()
+    try:
+        with f:
+            for start in range(0, len(text), SPILL_TEXT_BLOCK):
+                f.write(text[start:start + SPILL_TEXT_BLOCK].encode('utf-8', errors='replace'))
+    except OSError:
+        remove_spill_file(path)
+        raise
+    return path
+
+
+class SpilledBody:
+    """A response body moved to disk, with the view state needed to restore it.
+
+    source_path holds the undecorated body when the viewer showed a
+    pretty-printed version; otherwise the displayed body is the source.
+    """
+
+    def __init__(self, path: str, source_path: Optional[str], content_type: str,
+                 tab_index: int = 0, scroll: int = 0):
+        self.path = path
+        self.source_path = source_path
+        self.content_type = content_type
+        self.tab_index = tab_index
+        self.scroll = scroll
+
+    def load_buffer(self) -> LineBuffer:
+        """Map the displayed body back in"""
+        buffer = LineBuffer.from_file(self.path)
+        # The mapping stays valid after the name is gone on POSIX systems
+        remove_spill_file(self.path)
+        return buffer
+
+    def load_source(self, buffer: LineBuffer) -> str:
+        """Undecorated body text, read from its own file or the mapped buffer"""
+        if self.source_path is None:
+            return buffer.text()
+        with open(self.source_path, 'rb') as f:
+            text = f.read().decode('utf-8', errors='replace')
+        remove_spill_file(self.source_path)
+        self.source_path = None
+        return text
+
+    def discard(self):
+        """Delete the spill files without loading them"""
+        remove_spill_file(self.path)
+        remove_spill_file(self.source_path)
+
+
+class SpillSignals(QObject):
+    """Signals emitted by SpillTask from the worker thread"""
+
+    finished = Signal(int, object)
+
+
+class SpillTask:
+    """Write a tab's response body to spill files in the worker pool.
+
+    Emits the generation it was started for and a (path, source_path) pair,
+    or None if writing failed.
+    """
+
+    def __init__(self, generation: int, buffer: LineBuffer, source: Optional[str] = None):
+        self.generation = generation
+        self.buffer = buffer
+        self.source = source
+        self.signals = SpillSignals()
+        self._future = None
+        self._cancelled = False
+
+    def start(self):
+        """Queue the task in the worker pool"""
+        self._future = format_executor().submit(self.run)
+
+    def cancel(self):
+        """Cancel the task; a started task finishes but does not emit"""
+        self._cancelled = True
+        if self._future:
+            self._future.cancel()
+
+    def run(self):
+        if self._cancelled:
+            return
+        path = source_path = None
+        try:
+            path = spill_buffer(self.buffer)
+            if self.source is not None:
+                source_path = spill_text(self.source)
+            result = (path, source_path)
+        except OSError as e:
+            logging.warning(f"Could not spill response body to disk: {e}")
+            remove_spill_file(path)
+            result = None
+        self.buffer = self.source = None
+        if self._cancelled:
+            if result:
+                remove_spill_file(path)
+                remove_spill_file(source_path)
+            return
+        self.signals.finished.emit(self.generation, result)
@@ -0,0 +1,335 @@
+from typing import Tuple
+
+from PySide6.QtWidgets import (
+    QAbstractScrollArea, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QApplication, QMenu
+)
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QPainter, QFontDatabase, QKeySequence, QShortcut, QPalette
+
+from line_buffer import LineBuffer
+
+
+class ResponseViewer(QAbstractScrollArea):
+    """Read-only viewer that only lays out and paints the visible lines"""
+
+    GUTTER_PADDING = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.buffer = LineBuffer(b"")
+        self.highlighter = None
+        self.current_line = -1
+        self.match = None  # (line, byte column, byte length)
+        self.selection = None  # (first_line, last_line)
+        self._selection_anchor = None
+        self._max_line_length = 0
+
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    # QTextEdit-compatible API used by RequestTab
+
+    def setPlainText(self, text: str):
+        """Replace the content with decoded text"""
+        self.set_buffer(LineBuffer.from_text(text))
+
+    def toPlainText(self) -> str:
+        """Return the full content as text"""
+        return self.buffer.text()
+
+    def clear(self):
+        """Remove all content"""
+        self.set_buffer(LineBuffer(b""))
+
+    def set_buffer(self, buffer: LineBuffer):
+        """Display an existing line buffer"""
+        if buffer is not self.buffer:
+            self.buffer.close()
+        self.buffer = buffer
+        self.current_line = -1
+        self.match = None
+        self.selection = None
+        self._max_line_length = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def set_highlighter(self, highlighter):
+        """Set an object providing line_spans(line, text) for the visible lines"""
+        self.highlighter = highlighter
+        self.viewport().update()
+
+    # Navigation
+
+    def line_height(self) -> int:
+        return self.fontMetrics().height()
+
+    def char_width(self) -> int:
+        return max(1, self.fontMetrics().horizontalAdvance('M'))
+
+    def visible_line_count(self) -> int:
+        return max(1, self.viewport().height() // self.line_height())
+
+    def first_visible_line(self) -> int:
+        return self.verticalScrollBar().value()
+
+    def gutter_width(self) -> int:
+        return len(str(self.buffer.line_count)) * self.char_width() + self.GUTTER_PADDING * 2
+
+    def go_to_line(self, line: int) -> bool:
+        """Scroll to a zero-based line and mark it as current"""
+        if line < 0 or line >= self.buffer.line_count:
+            return False
+        self.current_line = line
+        self.ensure_line_visible(line)
+        self.viewport().update()
+        return True
+
+    def ensure_line_visible(self, line: int):
+        first = self.first_visible_line()
+        visible = self.visible_line_count()
+        if line < first or line >= first + visible:
+            self.verticalScrollBar().setValue(max(0, line - visible // 3))
+
+    def find(self, needle: str, case_sensitive: bool = False) -> bool:
+        """Find the next occurrence after the current match, wrapping around"""
+        if self.match:
+            line, column, length = self.match
+            offset = self.buffer.offset_of(line, column) + max(1, length)
+        elif self.current_line >= 0:
+            offset = self.buffer.offset_of(self.current_line)
+        else:
+            offset = self.buffer.offset_of(self.first_visible_line())
+
+        found = self.buffer.search(needle, offset, case_sensitive)
+        if found is None:
+            self.match = None
+            self.viewport().update()
+            return False
+
+        line, column, _ = found
+        self.match = found
+        self.current_line = line
+        self.ensure_line_visible(line)
+        hbar = self.horizontalScrollBar()
+        columns = self._visible_columns()
+        if column < hbar.value() or column >= hbar.value() + columns:
+            hbar.setValue(max(0, column - columns // 4))
+        self.viewport().update()
+        return True
+
+    # Selection and clipboard
+
+    def selected_text(self) -> str:
+        if not self.selection:
+            return ""
+        first, last = self.selection
+        return "\n".join(self.buffer.line(i) for i in range(first, last + 1))
+
+    def copy(self):
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def copy_all(self):
+        QApplication.clipboard().setText(self.toPlainText())
+
+    def show_context_menu(self, pos):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy Lines")
+        copy_action.setEnabled(bool(self.selection))
+        copy_action.triggered.connect(self.copy)
+        menu.addAction("Copy All").triggered.connect(self.copy_all)
+        menu.exec(self.mapToGlobal(pos))
+
+    def _line_at(self, y: int) -> int:
+        line = self.first_visible_line() + y // self.line_height()
+        return max(0, min(line, self.buffer.line_count - 1))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            line = self._line_at(int(event.position().y()))
+            self._selection_anchor = line
+            self.selection = (line, line)
+            self.current_line = line
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._selection_anchor is not None and event.buttons() & Qt.LeftButton:
+            line = self._line_at(int(event.position().y()))
+            self.selection = (min(line, self._selection_anchor), max(line, self._selection_anchor))
+            self.ensure_line_visible(line)
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self._selection_anchor = None
+        super().mouseReleaseEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy()
+            return
+        if event.matches(QKeySequence.SelectAll):
+            self.selection = (0, self.buffer.line_count - 1)
+            self.viewport().update()
+            return
+        bar = self.verticalScrollBar()
+        if event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            bar.setValue(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            bar.setValue(bar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    # Layout and painting
+
+    def _visible_columns(self) -> int:
+        return max(1, (self.viewport().width() - self.gutter_width()) // self.char_width())
+
+    def _update_scrollbars(self):
+        visible = self.visible_line_count()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.buffer.line_count - visible))
+        vbar.setPageStep(visible)
+        hbar = self.horizontalScrollBar()
+        columns = self._visible_columns()
+        hbar.setRange(0, max(0, self._max_line_length - columns))
+        hbar.setPageStep(columns)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def _match_cells(self, window_start: int) -> Tuple[int, int]:
+        """Character cells (start, count) of the match in text painted from a byte column"""
+        line, column, length = self.match
+        if column >= window_start:
+            start = self.buffer.char_count(line, window_start, column)
+        else:
+            start = -self.buffer.char_count(line, column, window_start)
+        return start, self.buffer.char_count(line, column, column + length)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(self.viewport().rect(), palette.color(QPalette.Base))
+
+        line_height = self.line_height()
+        char_width = self.char_width()
+        ascent = self.fontMetrics().ascent()
+        gutter = self.gutter_width()
+        first_column = self.horizontalScrollBar().value()
+        columns = self._visible_columns() + 1
+        first = self.first_visible_line()
+        last = min(self.buffer.line_count, first + self.visible_line_count() + 1)
+        text_color = palette.color(QPalette.Text)
+        longest = self._max_line_length
+
+        painter.fillRect(QRect(0, 0, gutter - self.GUTTER_PADDING // 2, self.viewport().height()),
+                         palette.color(QPalette.AlternateBase))
+
+        for index, line in enumerate(range(first, last)):
+            y = index * line_height
+            length = self.buffer.line_length(line)
+            longest = max(longest, length)
+
+            selected = self.selection and self.selection[0] <= line <= self.selection[1]
+            if selected or line == self.current_line:
+                painter.fillRect(QRect(gutter, y, self.viewport().width() - gutter, line_height),
+                                 palette.color(QPalette.Highlight if selected else QPalette.AlternateBase))
+
+            painter.setPen(palette.color(QPalette.PlaceholderText))
+            painter.drawText(QRect(0, y, gutter - self.GUTTER_PADDING, line_height),
+                             Qt.AlignRight | Qt.AlignVCenter, str(line + 1))
+
+            windowed = first_column or length > columns
+            if self.match and self.match[0] == line:
+                cell, cells = self._match_cells(first_column if windowed else 0)
+                painter.fillRect(QRect(gutter + cell * char_width, y, cells * char_width, line_height), Qt.yellow)
+
+            text = self.buffer.line(line, first_column, columns) if windowed else self.buffer.line(line)
+            text = text.replace('\t', ' ')
+            default_pen = palette.color(QPalette.HighlightedText) if selected else text_color
+            spans = []
+            if self.highlighter and not selected and not first_column:
+                spans = self.highlighter.line_spans(line, text)
+
+            # Paint the line as consecutive runs so highlighted spans are not overdrawn
+            position = 0
+            for start, span_length, fmt in spans + [(len(text), 0, None)]:
+                if start > position:
+                    painter.setPen(default_pen)
+                    painter.drawText(gutter + position * char_width, y + ascent, text[position:start])
+                if fmt is not None and span_length:
+                    font = painter.font()
+                    font.setBold(fmt.fontWeight() > 400)
+                    font.setItalic(fmt.fontItalic())
+                    painter.setFont(font)
+                    painter.setPen(fmt.foreground().color())
+                    painter.drawText(gutter + start * char_width, y + ascent, text[start:start + span_length])
+                    painter.setFont(self.font())
+                position = max(position, start + span_length)
+
+        if longest != self._max_line_length:
+            self._max_line_length = longest
+            self._update_scrollbars()
+
+
+class ResponseViewerPanel(QWidget):
+    """Response viewer with find and go-to-line controls"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        search_layout = QHBoxLayout()
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find in response")
+        self.find_input.returnPressed.connect(self.find_next)
+        self.find_button = QPushButton("Find Next")
+        self.find_button.clicked.connect(self.find_next)
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText("Line")
+        self.goto_input.setMaximumWidth(80)
+        self.goto_input.returnPressed.connect(self.go_to_line)
+        self.search_status = QLabel("")
+        search_layout.addWidget(self.find_input, 1)
+        search_layout.addWidget(self.find_button)
+        search_layout.addWidget(QLabel("Go to:"))
+        search_layout.addWidget(self.goto_input)
+        search_layout.addWidget(self.search_status)
+
+        self.viewer = ResponseViewer()
+
+        self.find_shortcut = QShortcut(QKeySequence.Find, self)
+        self.find_shortcut.activated.connect(self.find_input.setFocus)
+
+        layout.addLayout(search_layout)
+        layout.addWidget(self.viewer)
+        self.setLayout(layout)
+
+    def find_next(self):
+        """Find the next match of the search text"""
+        needle = self.find_input.text()
+        if not needle:
+            return
+        found = self.viewer.find(needle)
+        self.search_status.setText("" if found else "Not found")
+
+    def go_to_line(self):
+        """Jump to the one-based line entered by the user"""
+        try:
+            line = int(self.goto_input.text().strip())
+        except ValueError:
+            self.search_status.setText("Invalid line")
+            return
+        found = self.viewer.go_to_line(line - 1)
+        self.search_status.setText("" if found else "Line out of range")
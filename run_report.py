@@ -0,0 +1,189 @@
+import io
+import json
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, TextIO
+
+from runner import RunResult
+
+
+class ReportWriter:
+    """Writes run results as they arrive, keeping only the totals.
+
+    Subclasses write each result in add() and flush the stream so a
+    report of a long run can be followed while it is written.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.total = 0
+        self.failed = 0
+        # Comparison of replayed requests with their recordings
+        self.replayed = 0
+        self.status_changes = 0
+        self.replayed_time = 0
+        self.recorded_time = 0
+
+    def start(self):
+        pass
+
+    def add(self, result: RunResult):
+        self.total += 1
+        if not result.passed:
+            self.failed += 1
+        if result.recorded_status is not None:
+            self.replayed += 1
+            if result.status_code != result.recorded_status:
+                self.status_changes += 1
+            self.replayed_time += result.response_time
+            self.recorded_time += result.recorded_time or 0
+        self.write_result(result)
+        self.stream.flush()
+
+    def write_result(self, result: RunResult):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    @property
+    def passed(self) -> int:
+        return self.total - self.failed
+
+    def replay_totals(self) -> Dict:
+        """Status changes and mean latencies of replayed requests"""
+        return {
+            'replayed': self.replayed,
+            'status_changes': self.status_changes,
+            'mean_response_time': round(self.replayed_time / self.replayed, 1) if self.replayed else None,
+            'mean_recorded_time': round(self.recorded_time / self.replayed, 1) if self.replayed else None,
+        }
+
+
+class TextReportWriter(ReportWriter):
+    """One line per request followed by a summary"""
+
+    def write_result(self, result: RunResult):
+        outcome = "PASS" if result.passed else "FAIL"
+        name = result.name if result.iteration is None else f"{result.name} [{result.iteration}]"
+        if result.error:
+            detail = result.error
+        elif result.recorded_status is not None:
+            detail = (f"{result.status_code} (was {result.recorded_status}) "
+                      f"{result.response_time} ms (was {result.recorded_time} ms)")
+        else:
+            detail = f"{result.status_code} {result.response_time} ms {result.size} B"
+        if len(result.attempts) > 1:
+            detail += f" after {len(result.attempts)} attempts"
+        if result.cache_status:
+            detail += f" ({result.cache_status})"
+        self.stream.write(f"{outcome}  {name}  {result.method} {result.url}  {detail}\n")
+
+    def finish(self):
+        self.stream.write(f"{self.total} requests, {self.passed} passed, {self.failed} failed\n")
+        if self.replayed:
+            totals = self.replay_totals()
+            self.stream.write(f"{self.status_changes} status changes; mean latency "
+                              f"{totals['mean_response_time']} ms, recorded {totals['mean_recorded_time']} ms\n")
+
+
+class JsonReportWriter(ReportWriter):
+    """A JSON document whose results array is written element by element"""
+
+    def start(self):
+        self.stream.write('{\n  "results": [')
+
+    def write_result(self, result: RunResult):
+        separator = ',' if self.total > 1 else ''
+        self.stream.write(f"{separator}\n    {json.dumps(result.to_dict())}")
+
+    def finish(self):
+        self.stream.write(f'\n  ],\n  "total": {self.total},\n  "passed": {self.passed},\n'
+                          f'  "failed": {self.failed}')
+        if self.replayed:
+            self.stream.write(f',\n  "replay": {json.dumps(self.replay_totals())}')
+        self.stream.write("\n}\n")
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """One JSON object per result and line"""
+
+    def write_result(self, result: RunResult):
+        self.stream.write(json.dumps(result.to_dict()) + "\n")
+
+
+class JunitReportWriter(ReportWriter):
+    """JUnit XML: bad statuses are failures, requests without a response are errors.
+
+    The suite element carries the totals, so test cases are kept until
+    finish(); use the JSON Lines format for very long runs.
+    """
+
+    def __init__(self, stream: TextIO, suite_name: str = "pyPost"):
+        super().__init__(stream)
+        self.suite = ET.Element('testsuite', {'name': suite_name})
+        self.errors = 0
+        self.time = 0
+
+    def write_result(self, result: RunResult):
+        self.time += result.response_time
+        name = f"{result.name} ({result.method} {result.url})"
+        if result.iteration is not None:
+            name = f"{result.name} [{result.iteration}] ({result.method} {result.url})"
+        case = ET.SubElement(self.suite, 'testcase', {
+            'classname': self.suite.get('name'),
+            'name': name,
+            'time': f"{result.response_time / 1000:.3f}",
+        })
+        if result.error is not None:
+            self.errors += 1
+            ET.SubElement(case, 'error', {'message': result.error})
+        elif not result.passed:
+            message = f"HTTP {result.status_code}"
+            if result.recorded_status is not None:
+                message += f", recorded {result.recorded_status}"
+            ET.SubElement(case, 'failure', {'message': message})
+
+    def finish(self):
+        self.suite.set('tests', str(self.total))
+        self.suite.set('failures', str(self.failed - self.errors))
+        self.suite.set('errors', str(self.errors))
+        self.suite.set('time', f"{self.time / 1000:.3f}")
+        self.stream.write(ET.tostring(self.suite, encoding='unicode', xml_declaration=True) + "\n")
+
+
+REPORT_WRITERS = {
+    'text': TextReportWriter,
+    'json': JsonReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'junit': JunitReportWriter,
+}
+
+
+def write_report(results: Iterable[RunResult], writer: ReportWriter) -> ReportWriter:
+    """Write results with writer as they are produced"""
+    writer.start()
+    for result in results:
+        writer.add(result)
+    writer.finish()
+    return writer
+
+
+def _render(results: List[RunResult], writer_class) -> str:
+    stream = io.StringIO()
+    write_report(results, writer_class(stream))
+    return stream.getvalue()
+
+
+def text_report(results: List[RunResult]) -> str:
+    """One line per request followed by a summary"""
+    return _render(results, TextReportWriter)
+
+
+def json_report(results: List[RunResult]) -> str:
+    """Results and totals as a JSON document"""
+    return _render(results, JsonReportWriter)
+
+
+def junit_report(results: List[RunResult]) -> str:
+    """JUnit XML report"""
+    return _render(results, JunitReportWriter)
@@ -0,0 +1,345 @@
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import requests
+
+from constants import BODY_NONE, BODY_PLAIN_TEXT, PRIORITY_BATCH
+from database import DatabaseManager
+from http_cache import HttpCache
+from http_client import RetryPolicy, send_request, thread_session
+from http_response import HttpResponse
+from request_model import RequestModel, substitute_text, substitutions_for
+from response_document import ResponseDocument
+from scheduler import request_scheduler
+from tracing import tracer
+
+
+class RunJob:
+    """A saved request to run, with the name it is reported under.
+
+    variables holds the data row of an iteration; they take precedence
+    over the environment's variables.
+    """
+
+    def __init__(self, name: str, request: RequestModel, variables: Optional[Dict[str, str]] = None,
+                 iteration: Optional[int] = None, recorded_status: Optional[int] = None,
+                 recorded_time: Optional[int] = None):
+        self.name = name
+        self.request = request
+        self.variables = variables
+        self.iteration = iteration
+        # Status and milliseconds of the original send, for replays
+        self.recorded_status = recorded_status
+        self.recorded_time = recorded_time
+
+
+class RunResult:
+    """Outcome of running one request.
+
+    A replayed request passes when it gets the status it got when it was
+    recorded; any other request passes with a status below 400.
+    """
+
+    def __init__(self, name: str, method: str, url: str, status_code: Optional[int] = None,
+                 response_time: int = 0, size: int = 0, error: Optional[str] = None,
+                 iteration: Optional[int] = None, recorded_status: Optional[int] = None,
+                 recorded_time: Optional[int] = None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.response_time = response_time
+        self.size = size
+        self.error = error
+        self.iteration = iteration
+        self.recorded_status = recorded_status
+        self.recorded_time = recorded_time
+        # Variables extracted from the response; not reported, they may be secrets
+        self.extracted = {}
+        # Attempts of a retried request, see http_client.send_request
+        self.attempts = []
+        # 'fresh', 'revalidated' or 'miss' when run with a response cache
+        self.cache_status = None
+
+    @property
+    def passed(self) -> bool:
+        """Whether a response arrived with the expected status"""
+        if self.error is not None or self.status_code is None:
+            return False
+        if self.recorded_status is not None:
+            return self.status_code == self.recorded_status
+        return self.status_code < 400
+
+    def to_dict(self) -> Dict:
+        result = {
+            'name': self.name,
+            'method': self.method,
+            'url': self.url,
+            'status_code': self.status_code,
+            'response_time': self.response_time,
+            'size': self.size,
+            'error': self.error,
+            'passed': self.passed,
+            'iteration': self.iteration,
+        }
+        if self.recorded_status is not None:
+            result['recorded_status'] = self.recorded_status
+            result['recorded_time'] = self.recorded_time
+        if len(self.attempts) > 1:
+            result['attempts'] = self.attempts
+        if self.cache_status:
+            result['cache_status'] = self.cache_status
+        return result
+
+
+def _find_collection(db_manager: DatabaseManager, key: str) -> Dict:
+    """Collection item by id or by name; raises ValueError if there is none"""
+    if key.isdigit():
+        rows = db_manager.execute_query("SELECT * FROM collections WHERE id = ?", (int(key),))
+    else:
+        rows = db_manager.execute_query("SELECT * FROM collections WHERE name = ? ORDER BY id", (key,))
+    if not rows:
+        raise ValueError(f"No collection named or numbered {key!r}")
+    return rows[0]
+
+
+def _policy_of(folder: Dict) -> Dict:
+    """Policy settings a folder gives its requests"""
+    try:
+        return json.loads(folder['request_data'] or '{}').get('policy') or {}
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def _folder_policies(db_manager: DatabaseManager, folder_id: Optional[int]) -> Dict:
+    """Policy settings inherited from a folder and the folders above it"""
+    chain = []
+    while folder_id is not None:
+        rows = db_manager.execute_query("SELECT * FROM collections WHERE id = ?", (folder_id,))
+        if not rows:
+            break
+        chain.append(_policy_of(rows[0]))
+        folder_id = rows[0]['parent_id']
+    policy = {}
+    for settings in reversed(chain):
+        policy.update(settings)
+    return policy
+
+
+def collection_jobs(db_manager: DatabaseManager, key: str) -> List[RunJob]:
+    """Requests of a collection item; folders are expanded recursively"""
+    jobs = []
+    item = _find_collection(db_manager, key)
+    pending = [(item, '', _folder_policies(db_manager, item['parent_id']))]
+    while pending:
+        item, prefix, policy = pending.pop(0)
+        path = f"{prefix}{item['name']}"
+        if item['is_folder']:
+            policy = {**policy, **_policy_of(item)}
+            children = db_manager.execute_query(
+                "SELECT * FROM collections WHERE parent_id = ? ORDER BY id", (item['id'],)
+            )
+            pending[0:0] = [(child, f"{path}/", policy) for child in children]
+        elif item['request_data']:
+            request = RequestModel.from_dict(json.loads(item['request_data']), db_manager.decrypt)
+            # Settings of the request override those of its folders
+            request.policy = {**policy, **request.policy}
+            jobs.append(RunJob(path, request))
+    return jobs
+
+
+def history_request(db_manager: DatabaseManager, entry: Dict) -> RequestModel:
+    """Request recorded in a history row"""
+    try:
+        request_data = json.loads(entry['request_data'] or '{}')
+    except json.JSONDecodeError:
+        request_data = {}
+    request_data.setdefault('method', entry['method'])
+    request_data.setdefault('url', entry['url'])
+    if 'body_type' not in request_data:
+        # Entries logged before body types were recorded
+        request_data['body_type'] = BODY_PLAIN_TEXT if request_data.get('body') else BODY_NONE
+    # History stores the Authorization header itself rather than credentials
+    return RequestModel.from_dict(request_data, db_manager.decrypt)
+
+
+def history_job(db_manager: DatabaseManager, history_id: int) -> RunJob:
+    """Request of a history entry; raises ValueError if there is none"""
+    rows = db_manager.execute_query("SELECT * FROM history WHERE id = ?", (history_id,))
+    if not rows:
+        raise ValueError(f"No history entry {history_id}")
+    return RunJob(f"history #{history_id}", history_request(db_manager, rows[0]))
+
+
+def environment_substitutions(db_manager: DatabaseManager, name: Optional[str] = None) -> Dict[str, str]:
+    """Placeholders of the named environment, or of the active one"""
+    if name is None:
+        rows = db_manager.execute_query("SELECT id FROM environments WHERE is_active = 1")
+        if not rows:
+            return {}
+    else:
+        rows = db_manager.execute_query("SELECT id FROM environments WHERE name = ?", (name,))
+        if not rows:
+            raise ValueError(f"No environment named {name!r}")
+    return substitutions_for(db_manager.environment_variables(rows[0]['id']))
+
+
+def extract_value(response: HttpResponse, expression: str, document: ResponseDocument) -> str:
+    """Value of an extract expression: "status", "header:<name>", or a
+    JSONPath ($...) or XPath expression over the body.
+
+    Raises ValueError if the value is missing.
+    """
+    expression = expression.strip()
+    if expression == 'status':
+        return str(response.status_code)
+    if expression.lower().startswith('header:'):
+        name = expression[len('header:'):].strip().lower()
+        for key, value in response.headers.items():
+            if key.lower() == name:
+                return value
+        raise ValueError(f"No {name} header")
+    return document.first_value(expression)
+
+
+def run_job(job: RunJob, substitutions: Dict[str, str], policy: Optional[RetryPolicy] = None,
+            session: Optional[requests.Session] = None, cache: Optional[HttpCache] = None) -> RunResult:
+    """Send one request the way a request tab would.
+
+    policy holds the run's defaults; the request's own settings override it.
+    With a cache, GET requests may be answered from it.
+    """
+    request = job.request
+    if job.variables:
+        substitutions = {**substitutions, **substitutions_for(job.variables)}
+    with tracer().span('substitute', 'prepare', request=job.name):
+        url, headers, params, data = request.resolve(substitutions)
+    result = RunResult(job.name, request.method, url, iteration=job.iteration,
+                       recorded_status=job.recorded_status, recorded_time=job.recorded_time)
+    start_time = time.time()
+    try:
+        policy = (policy or RetryPolicy()).merged(request.policy)
+    except (TypeError, ValueError) as e:
+        result.error = f"Invalid policy: {e}"
+        logging.warning(f"{job.name}: {result.error}")
+        return result
+    try:
+        response = send_request(request.method, url, headers, data, params, request.verify_ssl,
+                                request.request_files(), session=session, policy=policy,
+                                on_attempt=result.attempts.append, cache=cache)
+    except requests.exceptions.RequestException as e:
+        result.error = f"Request failed: {e}"
+    except (FileNotFoundError, ValueError) as e:
+        result.error = f"File error: {e}"
+    else:
+        result.status_code = response.status_code
+        result.response_time = response.response_time
+        result.size = response.size
+        result.cache_status = response.cache_status
+        if not request.extract:
+            return result
+        document = ResponseDocument(response.text, response.content_type)
+        try:
+            with tracer().span('extract', 'display', request=job.name):
+                for name, expression in request.extract.items():
+                    result.extracted[name] = extract_value(response, expression, document)
+        except ValueError as e:
+            result.error = f"Extracting {name} failed: {e}"
+            logging.warning(f"{job.name}: {result.error}")
+        return result
+    result.response_time = int((time.time() - start_time) * 1000)
+    logging.warning(f"{job.name}: {result.error}")
+    return result
+
+
+def _cell(value) -> str:
+    """Variable value for a JSON value; strings are kept as they are"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ''
+    return json.dumps(value)
+
+
+def iter_data_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Variables of each row of a CSV or JSONL file, read one row at a time.
+
+    CSV files take variable names from their header row; JSONL files
+    (.jsonl, .ndjson) hold one object per line. Raises ValueError for a
+    line that is not a JSON object.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline='', encoding='utf-8') as f:
+        if extension in ('.jsonl', '.ndjson'):
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON: {e}")
+                if not isinstance(row, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object")
+                yield {str(key): _cell(value) for key, value in row.items()}
+        else:
+            for row in csv.DictReader(f):
+                yield {key: value or '' for key, value in row.items() if key is not None}
+
+
+def iteration_jobs(jobs: List[RunJob], rows: Iterable[Dict[str, str]]) -> Iterator[RunJob]:
+    """All jobs once per data row, produced as the rows are read"""
+    for iteration, row in enumerate(rows, 1):
+        for job in jobs:
+            yield RunJob(job.name, job.request, row, iteration)
+
+
+def submit_job(job: RunJob, substitutions: Dict[str, str], policy: Optional[RetryPolicy] = None,
+               priority: int = PRIORITY_BATCH, cache: Optional[HttpCache] = None) -> Future:
+    """Queue a job on the request scheduler; the future's result is a RunResult"""
+    variables = substitutions_for(job.variables) if job.variables else {}
+    url = substitute_text(job.request.url, {**substitutions, **variables})
+    return request_scheduler().submit(lambda: run_job(job, substitutions, policy, thread_session(), cache),
+                                      url, priority)
+
+
+def stream_jobs(jobs: Iterable[RunJob], substitutions: Dict[str, str], parallel: int = 1,
+                policy: Optional[RetryPolicy] = None, cache: Optional[HttpCache] = None) -> Iterator[RunResult]:
+    """Run jobs with up to parallel requests in flight, yielding results in job order.
+
+    A job is sent as soon as fewer than parallel requests are unfinished, so
+    a slow request holds back only the reporting of the results behind it.
+    Those wait in order, with at most twice parallel jobs sent but not yet
+    reported. Jobs are taken from the iterable only when they can be sent,
+    so a lazily produced sequence of any length is never held in memory. The
+    request scheduler may hold them back further to respect its limits.
+    """
+    parallel = max(1, parallel)
+    window = 2 * parallel
+    pending = deque()
+    for job in jobs:
+        while True:
+            # Report what has finished before waiting on a paced job source
+            while pending and pending[0].done():
+                yield pending.popleft().result()
+            if len(pending) >= window:
+                yield pending.popleft().result()
+                continue
+            running = [future for future in pending if not future.done()]
+            if len(running) < parallel:
+                break
+            wait(running, return_when=FIRST_COMPLETED)
+        pending.append(submit_job(job, substitutions, policy, cache=cache))
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_jobs(jobs: List[RunJob], substitutions: Dict[str, str], parallel: int = 1,
+             policy: Optional[RetryPolicy] = None, cache: Optional[HttpCache] = None) -> List[RunResult]:
+    """Run jobs with up to parallel requests in flight; results keep the job order"""
+    return list(stream_jobs(jobs, substitutions, parallel, policy, cache))
@@ -0,0 +1,165 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from constants import (PRIORITY_BATCH, PRIORITY_INTERACTIVE, SCHEDULER_INTERACTIVE_RESERVED,
+                       SCHEDULER_MAX_CONCURRENT, SCHEDULER_MAX_PER_HOST)
+from tracing import tracer
+
+
+def request_host(url: str) -> str:
+    """Host and port a request goes to, as used for per-host limits"""
+    return urlsplit(url.strip()).netloc.lower()
+
+
+class ScheduledRequest:
+    """A queued call together with what the scheduler orders it by"""
+
+    __slots__ = ('future', 'function', 'host', 'priority', 'sequence', 'queued_at')
+
+    def __init__(self, function: Callable[[], Any], host: str, priority: int, sequence: int):
+        self.future = Future()
+        self.function = function
+        self.host = host
+        self.priority = priority
+        self.sequence = sequence
+        self.queued_at = time.monotonic()
+
+
+class RequestScheduler:
+    """Runs every outbound request from one priority queue.
+
+    At most max_concurrent requests run at once and at most max_per_host
+    to any one host. Lower priority numbers run first and requests of equal
+    priority run in submission order; a request whose host is at its limit
+    is passed over, not waited for. Only interactive requests may use the
+    last reserved_interactive slots. Running requests are never interrupted.
+    """
+
+    def __init__(self, max_concurrent: int = SCHEDULER_MAX_CONCURRENT,
+                 max_per_host: int = SCHEDULER_MAX_PER_HOST,
+                 reserved_interactive: int = SCHEDULER_INTERACTIVE_RESERVED):
+        self._condition = threading.Condition()
+        self._queue: List[ScheduledRequest] = []
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._idle_threads = 0
+        self._running_by_host: Dict[str, int] = {}
+        self._running = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self.configure(max_concurrent, max_per_host, reserved_interactive)
+
+    def configure(self, max_concurrent: int, max_per_host: int, reserved_interactive: int):
+        """Change the limits; requests already running are not affected"""
+        with self._condition:
+            self.max_concurrent = max(1, max_concurrent)
+            self.max_per_host = max(1, max_per_host)
+            self.reserved_interactive = min(max(0, reserved_interactive), self.max_concurrent - 1)
+            self._condition.notify_all()
+
+    def submit(self, function: Callable[[], Any], url: str, priority: int = PRIORITY_BATCH) -> Future:
+        """Queue function, which sends a request to url, and return its future.
+
+        Cancelling the future before the request starts removes it from the
+        queue.
+        """
+        item = ScheduledRequest(function, request_host(url), priority, next(self._sequence))
+        with self._condition:
+            self._queue.append(item)
+            # Threads are started as needed, up to one per concurrent request
+            if len(self._queue) > self._idle_threads and len(self._threads) < self.max_concurrent:
+                thread = threading.Thread(target=self._work, name=f"pypost-request-{len(self._threads)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify_all()
+        return item.future
+
+    def _can_start(self, item: ScheduledRequest) -> bool:
+        if self._running_by_host.get(item.host, 0) >= self.max_per_host:
+            return False
+        limit = self.max_concurrent
+        if item.priority != PRIORITY_INTERACTIVE:
+            limit -= self.reserved_interactive
+        return self._running < limit
+
+    def _take(self) -> Optional[ScheduledRequest]:
+        """Remove and return the first request that may start now"""
+        # Cancelled requests are dropped as they are met
+        self._queue = [item for item in self._queue if not item.future.cancelled()]
+        best = None
+        for item in self._queue:
+            if (best is None or (item.priority, item.sequence) < (best.priority, best.sequence)) \
+                    and self._can_start(item):
+                best = item
+        if best is not None:
+            self._queue.remove(best)
+        return best
+
+    def _work(self):
+        while True:
+            with self._condition:
+                self._idle_threads += 1
+                item = self._take()
+                while item is None:
+                    self._condition.wait()
+                    item = self._take()
+                self._idle_threads -= 1
+                if not item.future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+                self._running_by_host[item.host] = self._running_by_host.get(item.host, 0) + 1
+                waited = time.monotonic() - item.queued_at
+                self._total_wait += waited
+
+            now = time.perf_counter()
+            tracer().add_span('scheduler.wait', now - waited, now, 'network',
+                              {'host': item.host, 'priority': item.priority})
+            try:
+                item.future.set_result(item.function())
+            except BaseException as e:
+                item.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._completed += 1
+                    self._running_by_host[item.host] -= 1
+                    if not self._running_by_host[item.host]:
+                        del self._running_by_host[item.host]
+                    self._condition.notify_all()
+
+    def metrics(self) -> Dict:
+        """Queue depth by priority, running requests by host and wait times"""
+        with self._condition:
+            now = time.monotonic()
+            queued = [item for item in self._queue if not item.future.cancelled()]
+            by_priority = {}
+            for item in queued:
+                by_priority[item.priority] = by_priority.get(item.priority, 0) + 1
+            started = self._completed + self._running
+            return {
+                'queued': len(queued),
+                'queued_by_priority': by_priority,
+                'running': self._running,
+                'running_by_host': dict(self._running_by_host),
+                'completed': self._completed,
+                'oldest_wait': max((now - item.queued_at for item in queued), default=0.0),
+                'mean_wait': self._total_wait / started if started else 0.0,
+            }
+
+
+_request_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def request_scheduler() -> RequestScheduler:
+    """Scheduler shared by request tabs and the runner"""
+    global _request_scheduler
+    with _scheduler_lock:
+        if _request_scheduler is None:
+            _request_scheduler = RequestScheduler()
+    return _request_scheduler
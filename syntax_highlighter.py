@@ -1,5 +1,14 @@
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor
 
+from constants import HIGHLIGHT_PYGMENTS_MAX_SIZE, HIGHLIGHT_MAX_SIZE
+from tracing import tracer
+from tokenizers import (
+    KIND_KEYWORD, KIND_STRING, KIND_NUMBER, KIND_COMMENT, KIND_NAME, tokenizer_for_content_type
+)
+
 try:
     from pygments import lex
     from pygments.lexers import JsonLexer, XmlLexer
@@ -8,58 +17,191 @@ try:
 except ImportError:
     PYGMENTS_AVAILABLE = False
 
+# Line states are remembered every CHECKPOINT_INTERVAL lines so that jumping
+# into the middle of a document only re-tokenizes from the nearest checkpoint.
+CHECKPOINT_INTERVAL = 256
+# Number of lines whose spans are cached
+SPAN_CACHE_SIZE = 4096
+
 
 class SyntaxHighlighter(QSyntaxHighlighter):
-    """Syntax highlighter for response body using Pygments"""
+    """Syntax highlighter for response bodies.
+
+    Small documents are lexed once as a whole with Pygments; larger ones use
+    the hand-written tokenizers with state carried between lines and are only
+    tokenized for the lines that are displayed. Above max_size highlighting
+    is switched off.
+    """
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, max_size: int = HIGHLIGHT_MAX_SIZE,
+                 pygments_max_size: int = HIGHLIGHT_PYGMENTS_MAX_SIZE):
         super().__init__(parent)
         self.lexer = None
+        self.tokenizer = None
+        self.source = None
+        self.max_size = max_size
+        self.pygments_max_size = pygments_max_size
         self.formats = {}
+        self._token_formats = {}
+        self._document_spans = None
+        self._document_revision = None
+        self._checkpoints = [0]
+        self._span_cache = OrderedDict()
+
+        self.kind_formats = {
+            KIND_KEYWORD: self._make_format("blue", bold=True),
+            KIND_STRING: self._make_format("green"),
+            KIND_NUMBER: self._make_format("orange"),
+            KIND_COMMENT: self._make_format("gray", italic=True),
+            KIND_NAME: self._make_format("black"),
+        }
 
         if PYGMENTS_AVAILABLE:
             # Define formats for token types
-            self.formats[Token.Keyword] = QTextCharFormat()
-            self.formats[Token.Keyword].setForeground(QColor("blue"))
-            self.formats[Token.Keyword].setFontWeight(700)
+            self.formats[Token.Keyword] = self.kind_formats[KIND_KEYWORD]
+            self.formats[Token.String] = self.kind_formats[KIND_STRING]
+            self.formats[Token.Number] = self.kind_formats[KIND_NUMBER]
+            self.formats[Token.Comment] = self.kind_formats[KIND_COMMENT]
+            self.formats[Token.Name] = self.kind_formats[KIND_NAME]
 
-            self.formats[Token.String] = QTextCharFormat()
-            self.formats[Token.String].setForeground(QColor("green"))
+    @staticmethod
+    def _make_format(color: str, bold: bool = False, italic: bool = False) -> QTextCharFormat:
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(color))
+        if bold:
+            fmt.setFontWeight(700)
+        if italic:
+            fmt.setFontItalic(True)
+        return fmt
 
-            self.formats[Token.Number] = QTextCharFormat()
-            self.formats[Token.Number].setForeground(QColor("orange"))
+    def _format_for_token(self, token_type) -> Optional[QTextCharFormat]:
+        """Find the format for a token type or its closest parent type"""
+        if token_type in self._token_formats:
+            return self._token_formats[token_type]
+        current = token_type
+        while current is not None and current not in self.formats:
+            current = getattr(current, 'parent', None)
+        fmt = self.formats.get(current) if current is not None else None
+        self._token_formats[token_type] = fmt
+        return fmt
 
-            self.formats[Token.Comment] = QTextCharFormat()
-            self.formats[Token.Comment].setForeground(QColor("gray"))
-            self.formats[Token.Comment].setFontItalic(True)
+    def set_lexer(self, content_type: str, source=None):
+        """Choose a highlighting strategy for a content type and document size.
 
-            self.formats[Token.Name] = QTextCharFormat()
-            self.formats[Token.Name].setForeground(QColor("black"))
+        source is an optional LineBuffer holding the whole document.
+        """
+        self.lexer = None
+        self.tokenizer = None
+        self.source = source
+        self._reset_cache()
 
-    def highlightBlock(self, text: str):
-        if not PYGMENTS_AVAILABLE or not self.lexer:
+        size = source.size if source is not None else 0
+        if size > self.max_size:
             return
 
+        content_type = (content_type or "").lower()
+        if PYGMENTS_AVAILABLE and size <= self.pygments_max_size:
+            if 'json' in content_type:
+                self.lexer = JsonLexer(stripnl=False, ensurenl=False)
+            elif 'xml' in content_type:
+                self.lexer = XmlLexer(stripnl=False, ensurenl=False)
+        if self.lexer is None:
+            self.tokenizer = tokenizer_for_content_type(content_type)
+
+    def _reset_cache(self):
+        self._document_spans = None
+        self._document_revision = None
+        self._checkpoints = [0]
+        self._span_cache.clear()
+
+    def _lex_document(self, text: str) -> List[List[Tuple[int, int, QTextCharFormat]]]:
+        """Lex a whole document once and split the tokens into per-line spans"""
+        with tracer().span('highlight.lex', 'display', size=len(text)):
+            return self._lex_spans(text)
+
+    def _lex_spans(self, text: str) -> List[List[Tuple[int, int, QTextCharFormat]]]:
+        lines = [[]]
+        column = 0
         try:
-            tokens = self.lexer.get_tokens(text)
-            start = 0
-            for token_type, value in tokens:
-                length = len(value)
-                if token_type in self.formats:
-                    self.setFormat(start, length, self.formats[token_type])
-                start += length
-        except Exception:
-            pass
-
-    def set_lexer(self, content_type: str):
-        """Set the appropriate lexer based on content type"""
-        if not PYGMENTS_AVAILABLE:
-            return
+            for token_type, value in self.lexer.get_tokens(text):
+                fmt = self._format_for_token(token_type)
+                for index, part in enumerate(value.split('\n')):
+                    if index:
+                        lines.append([])
+                        column = 0
+                    if part and fmt is not None:
+                        lines[-1].append((column, len(part), fmt))
+                    column += len(part)
+        except Exception as e:
+            # Lines lexed so far keep their highlighting; the rest stays plain
+            logging.warning(f"Syntax highlighting stopped at line {len(lines)}: {e}")
+        return lines
 
-        content_type = content_type.lower()
-        if 'json' in content_type:
-            self.lexer = JsonLexer()
-        elif 'xml' in content_type:
-            self.lexer = XmlLexer()
+    def _tokenize(self, text: str, state: int):
+        """Run the hand-written tokenizer and map kinds to formats"""
+        spans, state = self.tokenizer(text, state)
+        return [(start, length, self.kind_formats[kind]) for start, length, kind in spans], state
+
+    def _state_at(self, line: int) -> int:
+        """State at the start of a source line, using and extending the checkpoints"""
+        cached = self._span_cache.get(line - 1)
+        if cached is not None:
+            return cached[1]
+
+        checkpoint = line // CHECKPOINT_INTERVAL
+        if len(self._checkpoints) <= checkpoint:
+            with tracer().span('highlight.checkpoints', 'display', line=line):
+                while len(self._checkpoints) <= checkpoint:
+                    state = self._checkpoints[-1]
+                    first = (len(self._checkpoints) - 1) * CHECKPOINT_INTERVAL
+                    for number in range(first, first + CHECKPOINT_INTERVAL):
+                        state = self.tokenizer(self.source.line(number), state)[1]
+                    self._checkpoints.append(state)
+
+        state = self._checkpoints[checkpoint]
+        for number in range(checkpoint * CHECKPOINT_INTERVAL, line):
+            state = self.tokenizer(self.source.line(number), state)[1]
+        return state
+
+    def line_spans(self, line: int, text: str) -> List[Tuple[int, int, QTextCharFormat]]:
+        """Return (start, length, format) spans for one displayed line"""
+        if self.lexer is not None:
+            if self.source is None:
+                # No document to lex as a whole; fall back to the line alone
+                return self._lex_document(text)[0]
+            if self._document_spans is None:
+                self._document_spans = self._lex_document(self.source.text())
+            return self._document_spans[line] if line < len(self._document_spans) else []
+
+        if self.tokenizer is None:
+            return []
+
+        cached = self._span_cache.get(line)
+        if cached is not None:
+            self._span_cache.move_to_end(line)
+            return cached[0]
+
+        state = self._state_at(line) if self.source is not None else 0
+        spans, state = self._tokenize(text, state)
+        self._span_cache[line] = (spans, state)
+        if len(self._span_cache) > SPAN_CACHE_SIZE:
+            self._span_cache.popitem(last=False)
+        return spans
+
+    def highlightBlock(self, text: str):
+        document = self.document()
+        if self.lexer is not None and document is not None:
+            # Lex the whole document once per revision instead of per block
+            if self._document_revision != document.revision():
+                self._document_spans = self._lex_document(document.toPlainText())
+                self._document_revision = document.revision()
+            number = self.currentBlock().blockNumber()
+            spans = self._document_spans[number] if number < len(self._document_spans) else []
+        elif self.tokenizer is not None:
+            spans, state = self._tokenize(text, max(self.previousBlockState(), 0))
+            self.setCurrentBlockState(state)
         else:
-            self.lexer = None
\ No newline at end of file
+            spans = []
+
+        for start, length, fmt in spans:
+            self.setFormat(start, length, fmt)
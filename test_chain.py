@@ -0,0 +1,80 @@
+import threading
+import pytest
+from unittest.mock import patch
+
+from chain import dependency_graph, is_chained, run_chain, run_chains
+from http_response import HttpResponse
+from request_model import RequestModel
+from runner import RunJob
+
+
+def job(name, url, extract=None, depends_on=None):
+    return RunJob(name, RequestModel(url=url, extract=extract, depends_on=depends_on))
+
+
+def test_dependency_graph():
+    """Test dependencies resolve by full name or by last path component"""
+    jobs = [job("API/Login", "https://a"), job("API/Users", "https://b", depends_on=["Login"]),
+            job("API/Orders", "https://c", depends_on=["API/Login", "Users"])]
+    assert dependency_graph(jobs) == [[], [0], [0, 1]]
+    assert is_chained(jobs)
+    assert not is_chained([job("Ping", "https://a")])
+
+
+def test_dependency_graph_errors():
+    """Test unknown and ambiguous names and cycles are rejected"""
+    with pytest.raises(ValueError, match="Unknown"):
+        dependency_graph([job("A", "https://a", depends_on=["B"])])
+    with pytest.raises(ValueError, match="Ambiguous"):
+        dependency_graph([job("x/A", "https://a"), job("y/A", "https://a"), job("B", "https://b", depends_on=["A"])])
+    with pytest.raises(ValueError, match="cycle"):
+        dependency_graph([job("A", "https://a", depends_on=["B"]), job("B", "https://b", depends_on=["A"]),
+                          job("C", "https://c")])
+
+
+@patch('runner.send_request')
+def test_run_chain_passes_extracted_variables(mock_send):
+    """Test independent branches run concurrently and see their ancestors' variables"""
+    both_branches = threading.Barrier(2, timeout=5)
+
+    def send(method, url, headers, *args, **kwargs):
+        if url.endswith('/login'):
+            return HttpResponse(200, {}, {}, b'{"token": "t1"}', 1)
+        if '/users?' in url or '/orders?' in url:
+            both_branches.wait()  # Fails unless both branches are in flight together
+            return HttpResponse(200, {}, {}, b'{"id": "u1"}', 1)
+        return HttpResponse(200, {}, {}, url.encode(), 1)
+
+    mock_send.side_effect = send
+    jobs = [
+        job("Login", "https://api.test/login", extract={'token': '$.token'}),
+        job("Users", "https://api.test/users?t={{token}}", extract={'user': '$.id'}, depends_on=["Login"]),
+        job("Orders", "https://api.test/orders?t={{token}}", depends_on=["Login"]),
+        job("Profile", "https://api.test/{{user}}/{{token}}", depends_on=["Users"]),
+    ]
+    results = {result.name: result for result in run_chain(jobs, {}, parallel=2)}
+    assert all(result.passed for result in results.values())
+    assert results["Users"].url == "https://api.test/users?t=t1"
+    assert results["Profile"].url == "https://api.test/u1/t1"
+
+
+@patch('runner.send_request')
+def test_run_chain_skips_after_failure(mock_send):
+    """Test requests depending on a failed one are not sent"""
+    mock_send.return_value = HttpResponse(401, {}, {}, b'', 1)
+    jobs = [job("Login", "https://a"), job("Users", "https://b", depends_on=["Login"]),
+            job("Profile", "https://c", depends_on=["Users"])]
+    results = list(run_chain(jobs, {}))
+    assert mock_send.call_count == 1
+    assert [result.error for result in results[1:]] == ["Skipped: Login failed", "Skipped: Users failed"]
+
+
+@patch('runner.send_request')
+def test_run_chains_per_row(mock_send):
+    """Test the graph runs once per data row"""
+    mock_send.side_effect = lambda method, url, *args, **kwargs: HttpResponse(200, {}, {}, b'{"v": "x"}', 1)
+    jobs = [job("A", "https://a/{{n}}", extract={'v': '$.v'}), job("B", "https://b/{{n}}/{{v}}", depends_on=["A"])]
+    results = list(run_chains(jobs, {}, [{'n': '1'}, {'n': '2'}]))
+    assert [(result.iteration, result.url) for result in results] == [
+        (1, "https://a/1"), (1, "https://b/1/x"), (2, "https://a/2"), (2, "https://b/2/x")
+    ]
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+import charset
+from charset import bom_encoding, declared_charset, decode_body
+
+
+def test_declared_charset():
+    """Test charset parameters are parsed and normalized"""
+    assert declared_charset('text/html; charset=ISO-8859-1') == 'iso8859-1'
+    assert declared_charset('application/json; charset="utf-8"') == 'utf-8'
+    assert declared_charset('application/json') is None
+    assert declared_charset('text/plain; charset=no-such-charset') is None
+
+
+def test_bom_wins_over_declared_charset():
+    """Test a byte order mark decides the encoding"""
+    data = 'héllo'.encode('utf-16-le')
+    assert bom_encoding(b'\xff\xfe' + data) == ('utf-16-le', 2)
+    assert decode_body(b'\xff\xfe' + data, 'text/plain; charset=latin-1') == ('héllo', 'utf-16-le')
+    assert decode_body(b'\xef\xbb\xbf{}', '') == ('{}', 'utf-8')
+
+
+def test_declared_charset_used():
+    """Test the declared charset is honoured"""
+    assert decode_body('café'.encode('cp1252'), 'text/plain; charset=windows-1252') == ('café', 'cp1252')
+
+
+def test_strict_utf8_skips_detection():
+    """Test valid UTF-8 is decoded without running detection"""
+    with patch('charset.from_bytes') as detector:
+        assert decode_body('naïve ✓'.encode('utf-8'), 'application/json') == ('naïve ✓', 'utf-8')
+        detector.assert_not_called()
+
+
+def test_detection_uses_bounded_prefix(monkeypatch):
+    """Test only a prefix is sampled when the encoding has to be guessed"""
+    monkeypatch.setattr(charset, 'DETECTION_SAMPLE_SIZE', 16)
+    data = ('prix: 10 €\n' * 50).encode('cp1252')
+    with patch('charset.from_bytes', wraps=charset.from_bytes) as detector:
+        text, encoding = decode_body(data, 'text/plain')
+        assert len(detector.call_args[0][0]) <= 16
+    assert text.startswith('prix: 10 ')
+    assert len(text) == len(data)
+
+
+def test_fallback_without_detector(monkeypatch):
+    """Test undecodable bodies fall back to latin-1 when detection is unavailable"""
+    monkeypatch.setattr(charset, 'CHARSET_DETECTION_AVAILABLE', False)
+    assert decode_body(b'\xe9t\xe9', '') == ('été', 'latin-1')
+    assert decode_body(b'', 'text/plain; charset=utf-16') == ('', 'utf-16')
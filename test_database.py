@@ -1,5 +1,6 @@
 import pytest
 import os
+import sqlite3
 from database import DatabaseManager
 
 
@@ -118,6 +119,34 @@ def test_history_operations(db_manager):
     assert result[0]['status_code'] == 200
 
 
+def test_history_body_column_added_to_old_database(tmp_path):
+    """Test databases created before response_body existed are migrated"""
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            method TEXT NOT NULL,
+            url TEXT NOT NULL,
+            request_data TEXT,
+            response_data TEXT,
+            status_code INTEGER,
+            response_time INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(db_path)
+    hist_id = db.execute_update(
+        "INSERT INTO history (method, url, response_body) VALUES (?, ?, ?)",
+        ("GET", "https://example.com", b"\x00\xffbody")
+    )
+    result = db.execute_query("SELECT response_body FROM history WHERE id = ?", (hist_id,))
+    assert result[0]['response_body'] == b"\x00\xffbody"
+
+
 def test_environment_variables(db_manager):
     """Test environment variables operations"""
     # Create environment
@@ -136,4 +165,22 @@ def test_environment_variables(db_manager):
         (env_id,)
     )
     assert len(result) == 1
-    assert result[0]['name'] == "API_KEY"
\ No newline at end of file
+    assert result[0]['name'] == "API_KEY"
+
+
+def test_iter_query_batches(db_manager):
+    """Test query results are returned in batches"""
+    for i in range(5):
+        db_manager.execute_update("INSERT INTO history (method, url) VALUES (?, ?)", ("GET", f"https://example.com/{i}"))
+
+    batches = list(db_manager.iter_query("SELECT url FROM history ORDER BY id", batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[2][0]['url'] == "https://example.com/4"
+
+
+def test_encryption_initialized_on_first_use(db_manager):
+    """Test the key is only loaded when something is encrypted"""
+    assert db_manager._fernet is None
+    db_manager.encrypt("secret")
+    assert db_manager._fernet is not None
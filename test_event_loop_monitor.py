@@ -0,0 +1,42 @@
+import logging
+import time
+from unittest.mock import patch
+
+from event_loop_monitor import StallDetector
+
+
+def test_latency_is_lateness_over_interval():
+    """Test a heartbeat's latency is how much later than the interval it ran"""
+    detector = StallDetector(interval_ms=100, threshold_ms=250)
+    with patch('event_loop_monitor.time.perf_counter', side_effect=[10.0, 10.1, 10.23]):
+        assert detector.beat() == 0.0
+        assert detector.beat() == 0.0
+        assert round(detector.beat(), 3) == 0.03
+    metrics = detector.metrics()
+    assert (metrics['samples'], metrics['max_ms'], metrics['stalls']) == (2, 30.0, 0)
+
+
+def test_no_metrics_before_second_beat():
+    """Test metrics are empty until a latency was measured"""
+    detector = StallDetector()
+    detector.beat()
+    assert detector.metrics() == {'samples': 0, 'stalls': 0}
+
+
+def test_stall_logged_with_stack_sample(caplog):
+    """Test a stall over the threshold is logged with the blocked thread's stack"""
+    detector = StallDetector(interval_ms=10, threshold_ms=50)
+    detector.start()
+    try:
+        detector.beat()
+        time.sleep(0.3)
+        with caplog.at_level(logging.WARNING):
+            latency = detector.beat()
+    finally:
+        detector.stop()
+    assert latency >= 0.05
+    assert detector.stalls == 1
+    assert detector.metrics()['recent_stalls'] == 1
+    assert detector.last_stall['where'].startswith('test_stall_logged_with_stack_sample (test_event_loop_monitor.py:')
+    assert 'Event loop stalled' in caplog.text
+    assert 'time.sleep(0.3)' in caplog.text
@@ -0,0 +1,66 @@
+from unittest.mock import Mock
+from format_worker import FormatTask, JsonParseTask
+from response_document import ResponseDocument
+
+
+def test_format_task_emits_buffer():
+    """Test the task emits the formatted body with its generation"""
+    task = FormatTask(3, '{"a": 1}', 'application/json')
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.run()
+
+    receiver.assert_called_once()
+    generation, buffer = receiver.call_args[0]
+    assert generation == 3
+    assert buffer.text() == '{\n  "a": 1\n}'
+
+
+def test_format_task_cancelled_does_not_emit():
+    """Test a cancelled task never delivers a result"""
+    task = FormatTask(1, '{"a": 1}', 'application/json')
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.cancel()
+    task.run()
+
+    assert task.is_cancelled()
+    receiver.assert_not_called()
+
+
+def test_format_task_unchanged_body_does_not_emit():
+    """Test bodies that need no formatting are not sent back"""
+    task = FormatTask(1, 'plain text', 'text/plain')
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.run()
+
+    receiver.assert_not_called()
+
+
+def test_json_parse_task_emits_value_and_total():
+    """Test the tree's document is decoded and counted in the worker"""
+    document = ResponseDocument('{"a": [1, 2], "b": null}', 'application/json')
+    task = JsonParseTask(2, document)
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.run()
+
+    receiver.assert_called_once_with(2, ({'a': [1, 2], 'b': None}, 4))
+    assert document.is_parsed
+
+
+def test_json_parse_task_invalid_does_not_emit():
+    """Test malformed JSON leaves the tree empty"""
+    task = JsonParseTask(1, ResponseDocument('{"a": ', 'application/json'))
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.run()
+
+    receiver.assert_not_called()
+
@@ -1,6 +1,6 @@
 import pytest
 import os
-from unittest.mock import Mock, patch, mock_open
+from unittest.mock import Mock, PropertyMock, patch, mock_open
 from http_worker import HTTPWorker
 
 
@@ -19,7 +19,7 @@ def http_worker_with_files():
     return HTTPWorker('POST', 'https://httpbin.org/post', {}, None, None, True, {'file': 'path/to/file'})
 
 
-@patch('http_worker.requests.Session')
+@patch('http_worker.thread_session')
 def test_http_worker_success(mock_session_class, http_worker):
     mock_response = Mock()
     mock_response.status_code = 200
@@ -45,7 +45,7 @@ def test_http_worker_success(mock_session_class, http_worker):
     http_worker.error.emit.assert_not_called()
 
 
-@patch('http_worker.requests.Session')
+@patch('http_worker.thread_session')
 def test_http_worker_with_data(mock_session_class, http_worker_with_data):
     mock_response = Mock()
     mock_response.status_code = 201
@@ -80,10 +80,10 @@ def test_http_worker_with_data(mock_session_class, http_worker_with_data):
     assert 'session' in result['cookies']
 
 
-@patch('http_worker.open', create=True)
-@patch('http_worker.os.path.isfile')
-@patch('http_worker.os.path.exists')
-@patch('http_worker.requests.Session')
+@patch('http_client.open', create=True)
+@patch('http_client.os.path.isfile')
+@patch('http_client.os.path.exists')
+@patch('http_worker.thread_session')
 def test_http_worker_with_files(mock_session_class, mock_exists, mock_isfile, mock_open, http_worker_with_files):
     # Setup file mocks
     mock_exists.return_value = True
@@ -118,7 +118,7 @@ def test_http_worker_with_files(mock_session_class, mock_exists, mock_isfile, mo
     http_worker_with_files.finished.emit.assert_called_once()
 
 
-@patch('http_worker.requests.Session')
+@patch('http_worker.thread_session')
 def test_http_worker_error(mock_session_class, http_worker):
     import requests
     mock_session = Mock()
@@ -135,7 +135,7 @@ def test_http_worker_error(mock_session_class, http_worker):
     http_worker.finished.emit.assert_not_called()
 
 
-@patch('http_worker.requests.Session')
+@patch('http_worker.thread_session')
 def test_http_worker_timeout_error(mock_session_class, http_worker):
     import requests
     mock_session = Mock()
@@ -151,7 +151,7 @@ def test_http_worker_timeout_error(mock_session_class, http_worker):
     assert "timed out" in http_worker.error.emit.call_args[0][0].lower()
 
 
-@patch('http_worker.requests.Session')
+@patch('http_worker.thread_session')
 def test_http_worker_connection_error(mock_session_class, http_worker):
     import requests
     mock_session = Mock()
@@ -167,6 +167,22 @@ def test_http_worker_connection_error(mock_session_class, http_worker):
     assert "connection" in http_worker.error.emit.call_args[0][0].lower()
 
 
+@patch('http_worker.thread_session')
+def test_http_worker_unexpected_error(mock_session_class, http_worker):
+    """Test any other failure is reported instead of ending the thread silently"""
+    mock_session = Mock()
+    mock_session.request.side_effect = RuntimeError("boom")
+    mock_session_class.return_value = mock_session
+
+    http_worker.finished = Mock()
+    http_worker.error = Mock()
+
+    http_worker.run()
+
+    http_worker.error.emit.assert_called_once_with("Unexpected error: boom")
+    http_worker.finished.emit.assert_not_called()
+
+
 def test_http_worker_init(http_worker):
     """Test HTTPWorker initialization"""
     assert http_worker.method == 'GET'
@@ -180,4 +196,28 @@ def test_http_worker_init(http_worker):
 
 def test_http_worker_init_with_files(http_worker_with_files):
     """Test HTTPWorker initialization with files"""
-    assert http_worker_with_files.files == {'file': 'path/to/file'}
\ No newline at end of file
+    assert http_worker_with_files.files == {'file': 'path/to/file'}
+
+@patch('http_worker.thread_session')
+def test_http_worker_decodes_raw_bytes_once(mock_session_class, http_worker):
+    """Test the body is decoded from the raw bytes without using response.text"""
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.headers = {'Content-Type': 'text/plain; charset=utf-16'}
+    mock_response.cookies = {}
+    type(mock_response).text = PropertyMock(side_effect=AssertionError("response.text used"))
+    mock_response.content = 'héllo'.encode('utf-16')
+
+    mock_session = Mock()
+    mock_session.request.return_value = mock_response
+    mock_session_class.return_value = mock_session
+
+    http_worker.finished = Mock()
+    http_worker.error = Mock()
+
+    http_worker.run()
+
+    result = http_worker.finished.emit.call_args[0][0]
+    assert result['text'] == 'héllo'
+    assert result['encoding'] == 'utf-16-le'
+    assert result['content'] == mock_response.content
@@ -0,0 +1,142 @@
+import os
+import time
+from email.utils import formatdate
+from unittest.mock import Mock
+
+import pytest
+
+from http_cache import CacheEntry, HttpCache, cache_key, parse_cache_control
+from http_client import send_request
+from http_response import HttpResponse
+
+
+def response(status_code=200, headers=None, content=b'cached body'):
+    return HttpResponse(status_code, headers or {}, {}, content, 12)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / 'cache'))
+
+
+def sender(*responses):
+    """A send function returning responses in turn and recording the headers sent"""
+    return Mock(side_effect=list(responses))
+
+
+def test_parse_cache_control():
+    """Test directive names are lower-cased and quoted arguments unquoted"""
+    assert parse_cache_control('Max-Age=60, no-cache="Set-Cookie", private') == {
+        'max-age': '60', 'no-cache': 'Set-Cookie', 'private': None}
+    assert parse_cache_control(None) == {}
+
+
+def test_cache_key_includes_params():
+    """Test the key is the URL with its query parameters"""
+    assert cache_key('https://example.com/a', {'q': 'x'}) == 'https://example.com/a?q=x'
+
+
+def test_freshness_lifetime():
+    """Test max-age, Expires and the Last-Modified heuristic"""
+    now = time.time()
+    date = formatdate(now, usegmt=True)
+
+    def entry(headers):
+        return CacheEntry('k', 200, {'Date': date, **headers}, '', now, now, {})
+
+    assert entry({'Cache-Control': 'max-age=60'}).freshness_lifetime() == 60
+    assert entry({'Expires': formatdate(now + 120, usegmt=True)}).freshness_lifetime() == pytest.approx(120, abs=1)
+    assert entry({'Expires': '0'}).freshness_lifetime() == 0
+    assert entry({'Last-Modified': formatdate(now - 1000, usegmt=True)}).freshness_lifetime() == \
+        pytest.approx(100, abs=1)
+    assert entry({}).freshness_lifetime() == 0
+    assert not entry({'Cache-Control': 'max-age=60, no-cache'}).is_fresh(now)
+
+
+def test_age_counts_age_header_and_residence():
+    """Test the Age header and time since storing add to the age"""
+    now = time.time()
+    entry = CacheEntry('k', 200, {'Age': '50', 'Cache-Control': 'max-age=60'}, '', now - 10, now - 10, {})
+    assert entry.current_age(now) == pytest.approx(60)
+    assert not entry.is_fresh(now)
+
+
+def test_fresh_response_served_without_sending(cache):
+    """Test a fresh stored response is served from the cache"""
+    send = sender(response(headers={'Cache-Control': 'max-age=60'}))
+    first = cache.fetch('GET', 'https://example.com/a', {}, None, send)
+    second = cache.fetch('GET', 'https://example.com/a', {}, None, send)
+    assert first.cache_status == 'miss'
+    assert second.cache_status == 'fresh'
+    assert second.content == b'cached body'
+    assert second.text == 'cached body'
+    assert send.call_count == 1
+
+
+def test_stale_response_revalidated(cache):
+    """Test a stale response is revalidated with its validators and refreshed by a 304"""
+    stored = response(headers={'Cache-Control': 'max-age=0', 'ETag': '"v1"',
+                               'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT', 'Content-Type': 'text/plain'})
+    not_modified = response(304, {'Cache-Control': 'max-age=60', 'Content-Type': 'application/json'}, b'')
+    send = sender(stored, not_modified)
+    cache.fetch('GET', 'https://example.com/a', {'Accept': '*/*'}, None, send)
+    result = cache.fetch('GET', 'https://example.com/a', {'Accept': '*/*'}, None, send)
+
+    assert send.call_args_list[1][0][0] == {'Accept': '*/*', 'If-None-Match': '"v1"',
+                                            'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    assert result.cache_status == 'revalidated'
+    assert result.status_code == 200
+    assert result.content == b'cached body'
+    assert result.headers['Content-Type'] == 'text/plain'
+    # The 304's max-age now applies
+    assert cache.fetch('GET', 'https://example.com/a', {'Accept': '*/*'}, None, send).cache_status == 'fresh'
+
+
+def test_request_no_cache_forces_revalidation(cache):
+    """Test Cache-Control: no-cache on the request bypasses a fresh entry"""
+    send = sender(response(headers={'Cache-Control': 'max-age=60'}), response(content=b'new'))
+    cache.fetch('GET', 'https://example.com/a', {}, None, send)
+    result = cache.fetch('GET', 'https://example.com/a', {'Cache-Control': 'no-cache'}, None, send)
+    assert result.cache_status == 'miss'
+    assert result.content == b'new'
+
+
+def test_no_store_and_vary(cache):
+    """Test no-store responses are not kept and Vary selects variants"""
+    send = sender(response(headers={'Cache-Control': 'no-store, max-age=60'}))
+    cache.fetch('GET', 'https://example.com/a', {}, None, send)
+    assert cache.lookup('https://example.com/a', {}) is None
+
+    send = sender(response(headers={'Cache-Control': 'max-age=60', 'Vary': 'Accept'}))
+    cache.fetch('GET', 'https://example.com/b', {'Accept': 'application/json'}, None, send)
+    assert cache.lookup('https://example.com/b', {'accept': 'application/json'}) is not None
+    assert cache.lookup('https://example.com/b', {'Accept': 'text/html'}) is None
+
+
+def test_unsafe_method_invalidates(cache):
+    """Test a successful POST removes the stored response for its URL"""
+    send = sender(response(headers={'Cache-Control': 'max-age=60'}), response(201))
+    cache.fetch('GET', 'https://example.com/a', {}, None, send)
+    cache.fetch('POST', 'https://example.com/a', {}, None, send)
+    assert cache.lookup('https://example.com/a', {}) is None
+
+
+def test_clear(cache):
+    """Test clearing removes entries and body files"""
+    cache.fetch('GET', 'https://example.com/a', {}, None, sender(response(headers={'Cache-Control': 'max-age=60'})))
+    cache.clear()
+    assert cache.lookup('https://example.com/a', {}) is None
+    assert os.listdir(cache.directory) == ['index.db']
+
+
+def test_send_request_through_cache(cache):
+    """Test send_request answers a repeated GET from the cache"""
+    session = Mock()
+    network_response = Mock(status_code=200, headers={'Cache-Control': 'max-age=60'}, cookies={},
+                            content=b'{"a": 1}')
+    session.request.return_value = network_response
+    first = send_request('GET', 'https://example.com/a', {}, params={'q': '1'}, session=session, cache=cache)
+    second = send_request('GET', 'https://example.com/a', {}, params={'q': '1'}, session=session, cache=cache)
+    assert (first.cache_status, second.cache_status) == ('miss', 'fresh')
+    assert second.metadata()['cache_status'] == 'fresh'
+    assert session.request.call_count == 1
@@ -0,0 +1,87 @@
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from http_client import RetryPolicy, parse_retry_after, send_request
+
+
+def response(status_code, headers=None, content=b'ok'):
+    mock_response = Mock()
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    mock_response.cookies = {}
+    mock_response.content = content
+    return mock_response
+
+
+def test_default_policy_single_timeout():
+    """Test equal timeouts are passed as one value and unequal ones as a pair"""
+    assert RetryPolicy().timeout == 30
+    assert RetryPolicy(connect_timeout=3, read_timeout=60).timeout == (3, 60)
+    with pytest.raises(ValueError):
+        RetryPolicy(retry=3)
+
+
+def test_policy_merged():
+    """Test overrides take precedence and an empty override keeps the policy"""
+    policy = RetryPolicy(retries=2)
+    assert policy.merged({}) is policy
+    merged = policy.merged({'read_timeout': 5})
+    assert (merged.retries, merged.read_timeout, merged.connect_timeout) == (2, 5, 30)
+
+
+def test_delay_backoff_and_retry_after():
+    """Test exponential backoff with jitter, capped, and Retry-After"""
+    policy = RetryPolicy(backoff=0.5, backoff_max=3)
+    assert policy.delay(0, random_value=lambda: 1.0) == 0.5
+    assert policy.delay(2, random_value=lambda: 0.5) == 1.0
+    assert policy.delay(5, random_value=lambda: 1.0) == 3
+    assert policy.delay(0, "2") == 2
+    assert policy.delay(0, "120") == 3
+    assert RetryPolicy(respect_retry_after=False).delay(0, "2", random_value=lambda: 0.0) == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+
+
+@patch('http_client._wait', return_value=True)
+def test_send_request_retries_statuses(mock_wait):
+    """Test retryable statuses are retried and every attempt is recorded"""
+    session = Mock()
+    session.request.side_effect = [response(503, {'Retry-After': '1'}), response(429), response(200)]
+    attempts = []
+    policy = RetryPolicy(retries=3, backoff=0.01)
+    result = send_request('GET', 'https://example.com', {}, session=session, policy=policy,
+                          on_attempt=attempts.append)
+    assert result.status_code == 200
+    assert [attempt.get('status_code') for attempt in attempts] == [503, 429, 200]
+    assert attempts[0]['delay'] == 1
+    assert mock_wait.call_args_list[0][0][0] == 1
+    assert result.attempts == attempts
+    assert result.metadata()['attempts'] == attempts
+
+
+@patch('http_client._wait', return_value=True)
+def test_send_request_retries_exceptions(mock_wait):
+    """Test connection errors are retried until the retries run out"""
+    session = Mock()
+    session.request.side_effect = requests.exceptions.ConnectionError("refused")
+    attempts = []
+    with pytest.raises(requests.exceptions.ConnectionError):
+        send_request('GET', 'https://example.com', {}, session=session,
+                     policy=RetryPolicy(retries=2, backoff=0.01), on_attempt=attempts.append)
+    assert session.request.call_count == 3
+    assert [attempt['attempt'] for attempt in attempts] == [1, 2, 3]
+    assert all('refused' in attempt['error'] for attempt in attempts)
+
+
+def test_send_request_no_retry_for_post_or_other_statuses():
+    """Test non-idempotent methods and unlisted statuses are sent once"""
+    session = Mock()
+    session.request.return_value = response(503)
+    result = send_request('POST', 'https://example.com', {}, session=session, policy=RetryPolicy(retries=3))
+    assert result.status_code == 503
+    assert result.attempts is None
+
+    session.request.return_value = response(500)
+    send_request('GET', 'https://example.com', {}, session=session, policy=RetryPolicy(retries=3))
+    assert session.request.call_count == 2
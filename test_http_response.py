@@ -0,0 +1,63 @@
+import json
+from unittest.mock import patch
+from http_response import HttpResponse
+
+
+def make_response(content=b'{"a": 1}', content_type='application/json'):
+    return HttpResponse(200, {'Content-Type': content_type}, {'session': 'abc'}, content, 42)
+
+
+def test_text_decoded_once():
+    """Test the body is decoded lazily and only once"""
+    response = make_response()
+    with patch('charset.decode_body', return_value=('{"a": 1}', 'utf-8')) as decode:
+        assert response.text == '{"a": 1}'
+        assert response.text == '{"a": 1}'
+        assert response.encoding == 'utf-8'
+        decode.assert_called_once()
+
+
+def test_charset_from_lowercase_header():
+    """Test the declared charset is used whatever casing the server gives the header"""
+    response = HttpResponse(200, {'content-type': 'text/plain; charset=koi8-r'}, {},
+                            'привет'.encode('koi8-r'), 5)
+    assert response.content_type == 'text/plain; charset=koi8-r'
+    assert response.text == 'привет'
+
+
+def test_dict_style_access():
+    """Test the former result-dict keys still work"""
+    response = make_response()
+    assert response['status_code'] == 200
+    assert response['text'] == '{"a": 1}'
+    assert response['size'] == 8
+    assert 'session' in response['cookies']
+    assert response.get('missing', 'default') == 'default'
+
+
+def test_slots_prevent_extra_attributes():
+    """Test instances carry no per-instance dict"""
+    response = make_response()
+    assert not hasattr(response, '__dict__')
+
+
+def test_utf8_body_can_be_shown_raw():
+    """Test only BOM-less UTF-8 bodies are displayed from the raw bytes"""
+    assert make_response('é'.encode('utf-8'), 'text/plain').is_utf8
+    assert not make_response(b'\xef\xbb\xbfx', 'text/plain').is_utf8
+    assert not make_response('é'.encode('latin-1'), 'text/plain; charset=latin-1').is_utf8
+
+
+def test_history_round_trip():
+    """Test responses rebuilt from new and old style history rows"""
+    response = make_response('é'.encode('latin-1'), 'text/plain; charset=latin-1')
+    metadata = json.dumps(response.metadata())
+    assert 'text' not in json.loads(metadata)
+
+    restored = HttpResponse.from_history(metadata, response.content)
+    assert restored.text == 'é'
+    assert restored.status_code == 200
+
+    legacy = HttpResponse.from_history(json.dumps({'status_code': 404, 'text': 'gone', 'headers': {}}))
+    assert legacy.text == 'gone'
+    assert legacy.status_code == 404
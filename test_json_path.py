@@ -0,0 +1,73 @@
+import pytest
+from json_path import compile_json_path
+
+STORE = {
+    "store": {
+        "book": [
+            {"title": "A", "price": 8, "tags": ["x"]},
+            {"title": "B", "price": 12},
+            {"title": "C", "price": 5, "isbn": "1"},
+        ],
+        "odd key": True,
+    }
+}
+
+
+def values(expression, document=STORE):
+    return [value for _, value in compile_json_path(expression).iter_matches(document)]
+
+
+def test_child_and_index():
+    """Test dotted names, bracket names and indexes"""
+    assert values('$.store.book[0].title') == ["A"]
+    assert values("$['store']['odd key']") == [True]
+    assert values('$.store.book[-1].title') == ["C"]
+    assert values('$.store.book[7]') == []
+
+
+def test_wildcards_slices_and_unions():
+    """Test *, slices and unions"""
+    assert values('$.store.book[*].price') == [8, 12, 5]
+    assert values('$.store.book[1:].title') == ["B", "C"]
+    assert values('$.store.book[::-2].title') == ["C", "A"]
+    assert values('$.store.book[0,2].title') == ["A", "C"]
+
+
+def test_recursive_descent():
+    """Test .. finds values at any depth with their paths"""
+    matches = list(compile_json_path('$..price').iter_matches(STORE))
+    assert matches == [
+        ('$.store.book[0].price', 8),
+        ('$.store.book[1].price', 12),
+        ('$.store.book[2].price', 5),
+    ]
+    assert values('$..tags[0]') == ["x"]
+
+
+def test_filters():
+    """Test comparison and existence filters"""
+    assert values('$.store.book[?(@.price < 10)].title') == ["A", "C"]
+    assert values("$.store.book[?(@.title == 'B')].price") == [12]
+    assert values('$.store.book[?(@.isbn)].title') == ["C"]
+    assert values('$.store.book[?(@.title > 3)]') == []
+
+
+def test_matches_are_lazy():
+    """Test results are produced on demand"""
+    document = [{"id": 0}, "not an object"]
+    matches = compile_json_path('$[*].id').iter_matches(document)
+    assert next(matches) == ('$[0].id', 0)
+    document[1] = {"id": 1}
+    assert next(matches) == ('$[1].id', 1)
+
+
+def test_compiled_expressions_are_cached():
+    """Test compiling the same expression twice returns the same object"""
+    assert compile_json_path('$.a.b') is compile_json_path('$.a.b')
+
+
+@pytest.mark.parametrize('expression', ['store', '$.', '$[', '$.a[1:2:0]', '$[?(@.a ~ 1)]', '$.a b'])
+def test_invalid_expressions(expression):
+    """Test malformed expressions raise ValueError"""
+    with pytest.raises(ValueError):
+        compile_json_path(expression)
@@ -0,0 +1,85 @@
+import pytest
+from PySide6.QtCore import QModelIndex, Qt
+import json_tree_model
+from json_tree_model import JsonTreeModel, COLUMN_KEY, COLUMN_VALUE, COLUMN_TYPE, COLUMN_SIZE
+
+
+@pytest.fixture
+def model():
+    return JsonTreeModel()
+
+
+def test_root_row(model):
+    """Test the document is shown below a single '$' row"""
+    model.set_document({"a": 1, "b": [1, 2]})
+    assert model.rowCount() == 1
+    root = model.index(0, COLUMN_KEY)
+    assert root.data() == '$'
+    assert model.rowCount(root) == 2
+    assert model.index(0, COLUMN_TYPE).data() == 'object'
+    assert model.index(0, COLUMN_SIZE).data() == '2 items, 4 total'
+
+
+def test_children_created_on_demand(model):
+    """Test only requested rows get nodes"""
+    model.set_document(list(range(50)))
+    root = model.index(0, COLUMN_KEY)
+    assert model.node(root)._children == {}
+
+    child = model.index(7, COLUMN_VALUE, root)
+    assert child.data() == '7'
+    assert list(model.node(root)._children) == [7]
+    assert model.parent(child) == root
+    assert model.parent(root) == QModelIndex()
+
+
+def test_large_array_paged_by_offset(model, monkeypatch):
+    """Test large arrays are grouped into offset ranges"""
+    monkeypatch.setattr(json_tree_model, 'ARRAY_PAGE_SIZE', 10)
+    model.set_document([{"id": i} for i in range(25)])
+    root = model.index(0, COLUMN_KEY)
+
+    assert model.rowCount(root) == 3
+    last_page = model.index(2, COLUMN_KEY, root)
+    assert last_page.data() == '[20 … 24]'
+    assert model.rowCount(last_page) == 5
+    assert model.index(2, COLUMN_SIZE, root).data() == '5 items, 10 total'
+
+    element = model.index(3, COLUMN_KEY, last_page)
+    assert element.data() == '23'
+    assert model.path(model.index(0, COLUMN_KEY, element)) == '$[23].id'
+
+
+def test_paths_and_previews(model, monkeypatch):
+    """Test tooltips show JSONPath and long values are shortened"""
+    monkeypatch.setattr(json_tree_model, 'VALUE_PREVIEW_CHARS', 5)
+    model.set_document({"odd key": {"name": "abcdefgh"}})
+    root = model.index(0, COLUMN_KEY)
+    outer = model.index(0, COLUMN_KEY, root)
+    name = model.index(0, COLUMN_VALUE, outer)
+
+    assert name.data() == '"abcd…'
+    assert name.data(Qt.ToolTipRole) == '$["odd key"].name'
+    assert model.path(root) == '$'
+
+
+def test_scalar_document_and_clear(model):
+    """Test scalar documents and clearing the model"""
+    model.set_document(None)
+    assert model.index(0, COLUMN_TYPE).data() == 'null'
+    assert not model.hasChildren(model.index(0, COLUMN_KEY))
+
+    model.clear()
+    assert model.rowCount() == 0
+
+
+def test_total_counted_up_to_limit(model, monkeypatch):
+    """Test totals over the limit are not counted on the GUI thread, unless given"""
+    monkeypatch.setattr(json_tree_model, 'SUBTREE_COUNT_LIMIT', 10)
+    document = [[1, 2]] * 10
+    model.set_document(document)
+    assert model.index(0, COLUMN_SIZE).data() == '10 items, over 10 total'
+    assert model.index(0, COLUMN_SIZE, model.index(0, COLUMN_KEY)).data() == '2 items, 2 total'
+    model.set_document(document, 30)
+    assert model.index(0, COLUMN_SIZE).data() == '10 items, 30 total'
+
@@ -0,0 +1,103 @@
+import io
+import pytest
+import line_buffer
+from line_buffer import LineBuffer
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Force several chunks even for tiny inputs"""
+    monkeypatch.setattr(line_buffer, 'CHUNK_SIZE', 7)
+
+
+def test_lines_match_split(small_chunks):
+    """Test line access across chunk boundaries"""
+    text = "first\nsecond é\r\n\nfourth line is longer\nlast"
+    buffer = LineBuffer.from_text(text)
+
+    expected = [line.rstrip('\r') for line in text.split('\n')]
+    assert buffer.line_count == len(expected)
+    assert [buffer.line(i) for i in range(buffer.line_count)] == expected
+
+
+def test_trailing_newline_adds_empty_line():
+    """Test a final newline produces an empty last line"""
+    buffer = LineBuffer.from_text("a\nb\n")
+    assert buffer.line_count == 3
+    assert buffer.line(2) == ""
+
+
+def test_empty_buffer():
+    """Test empty content"""
+    buffer = LineBuffer.from_text("")
+    assert buffer.line_count == 1
+    assert buffer.line(0) == ""
+    assert buffer.find("x") is None
+
+
+def test_line_out_of_range():
+    """Test invalid line numbers raise IndexError"""
+    buffer = LineBuffer.from_text("a\nb")
+    with pytest.raises(IndexError):
+        buffer.line(2)
+
+
+def test_line_of_offset(small_chunks):
+    """Test mapping byte offsets back to lines"""
+    data = b"ab\ncdef\n\nghijklmnop\nq"
+    buffer = LineBuffer(data)
+    for offset in range(len(data) + 1):
+        assert buffer.line_of_offset(offset) == data[:offset].count(b'\n')
+
+
+def test_find_wraps_and_ignores_case(small_chunks):
+    """Test search returns line and column, wrapping to the start"""
+    buffer = LineBuffer.from_text("alpha\nbeta\nGamma beta")
+
+    assert buffer.find("gamma") == (2, 0)
+    assert buffer.find("beta", buffer.offset_of(1, 1)) == (2, 6)
+    assert buffer.find("alpha", buffer.offset_of(2)) == (0, 0)
+    assert buffer.find("gamma", case_sensitive=True) is None
+
+
+def test_search_folds_non_ascii_case():
+    """Test matches report their byte length and non-ASCII letters ignore case"""
+    buffer = LineBuffer.from_text("naïve\nCAFÉ crème")
+    assert buffer.search("café") == (1, 0, 5)
+    assert buffer.search("CRÈME", case_sensitive=False) == (1, 6, 6)
+    assert buffer.search("café", case_sensitive=True) is None
+
+
+def test_char_count_of_byte_columns():
+    """Test byte columns of a line convert to character counts"""
+    buffer = LineBuffer.from_text("é=ü\nx")
+    assert buffer.char_count(0, 0, 2) == 1
+    assert buffer.char_count(0, 2, 5) == 2
+    assert buffer.char_count(0, 0, 99) == 3
+
+
+def test_long_line_window(monkeypatch):
+    """Test windowed decoding of long lines"""
+    monkeypatch.setattr(line_buffer, 'LONG_LINE_BYTES', 4)
+    buffer = LineBuffer.from_text("0123456789")
+    assert buffer.line(0, 3, 4) == "3456"
+
+
+def test_from_file(tmp_path):
+    """Test memory-mapped file backing"""
+    path = tmp_path / "body.txt"
+    path.write_bytes(b"one\ntwo\nthree")
+
+    buffer = LineBuffer.from_file(str(path))
+    assert buffer.line_count == 3
+    assert buffer.line(1) == "two"
+    assert buffer.text() == "one\ntwo\nthree"
+    buffer.close()
+    assert buffer.line_count == 1
+
+
+def test_write_to_in_blocks():
+    """Test the body is written out unchanged in several blocks"""
+    out = io.BytesIO()
+    LineBuffer.from_text("abc\ndéf").write_to(out, block_size=2)
+    assert out.getvalue() == "abc\ndéf".encode('utf-8')
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 import pytest
 from unittest.mock import Mock, patch
 import main
@@ -37,4 +40,16 @@ def test_main_logging_setup(mock_logging):
     mock_logging.basicConfig.assert_called_once()
     args = mock_logging.basicConfig.call_args
     assert args[1]['level'] == mock_logging.INFO
-    assert 'format' in args[1]
\ No newline at end of file
+    assert 'format' in args[1]
+
+def test_heavy_modules_not_imported_at_startup():
+    """Test requests, cryptography, pygments and charset detection stay out of startup"""
+    code = (
+        "import sys, main_window; "
+        "print(','.join(m for m in ('requests', 'cryptography', 'pygments', 'charset_normalizer') "
+        "if m in sys.modules))"
+    )
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from main_window import MainWindow
+from request_tab import RequestTab
 
 
 @pytest.fixture
@@ -129,9 +130,9 @@ def test_load_environments(main_window, db_manager_mock):
 
 def test_load_collections(main_window, db_manager_mock):
     """Test loading collections"""
-    db_manager_mock.execute_query.return_value = [
+    db_manager_mock.iter_query.return_value = iter([[
         {"id": 1, "name": "Test Collection", "parent_id": None, "request_data": '{"method": "GET"}'}
-    ]
+    ]])
 
     main_window.load_collections()
 
@@ -141,9 +142,9 @@ def test_load_collections(main_window, db_manager_mock):
 
 def test_load_history(main_window, db_manager_mock):
     """Test loading history"""
-    db_manager_mock.execute_query.return_value = [
+    db_manager_mock.iter_query.return_value = iter([[
         {"id": 1, "method": "GET", "url": "https://example.com", "status_code": 200, "created_at": "2023-01-01"}
-    ]
+    ]])
 
     main_window.load_history()
 
@@ -174,16 +175,20 @@ def test_manage_environments(mock_msgbox, main_window):
 def test_on_environment_changed(main_window):
     """Test environment change handling"""
     # Add mock tabs
-    mock_tab1 = Mock()
-    mock_tab2 = Mock()
-    main_window.request_tabs.widget.side_effect = [mock_tab1, mock_tab2]
-
-    main_window.on_environment_changed("TestEnv")
-
-    mock_tab1.current_environment = "TestEnv"
-    mock_tab1.substitute_variables.assert_called_once()
-    mock_tab2.current_environment = "TestEnv"
-    mock_tab2.substitute_variables.assert_called_once()
+    mock_tab1 = Mock(spec=RequestTab)
+    mock_tab2 = Mock(spec=RequestTab)
+    tabs = main_window.request_tabs
+    with patch.object(tabs, 'count', return_value=2), \
+            patch.object(tabs, 'widget', side_effect=[mock_tab1, mock_tab2]), \
+            patch.object(tabs, 'currentWidget', return_value=mock_tab1):
+        main_window.on_environment_changed("TestEnv")
+
+    # Tabs only record the new environment; templates are not rewritten
+    mock_tab1.set_environment.assert_called_once_with("TestEnv")
+    mock_tab2.set_environment.assert_called_once_with("TestEnv")
+    # Only the visible tab recomputes its resolved preview
+    mock_tab1.update_resolved_preview.assert_called_once()
+    mock_tab2.update_resolved_preview.assert_not_called()
 
 
 @patch('main_window.QMessageBox')
@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+import requests
+
+from database import DatabaseManager
+from mock_server import (FaultProfile, MockServer, Stub, parse_bandwidth, stub_key, stubs_for_collections,
+                         stubs_from_history)
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    return DatabaseManager(str(tmp_path / "test.db"))
+
+
+def add_history(db_manager, method, url, params, status_code, body, headers=None):
+    db_manager.execute_update(
+        "INSERT INTO history (method, url, request_data, response_data, response_body, status_code, "
+        "response_time) VALUES (?, ?, ?, ?, ?, ?, 5)",
+        (method, url, json.dumps({'method': method, 'url': url, 'params': params}),
+         json.dumps({'status_code': status_code, 'headers': headers or {}}), body, status_code)
+    )
+
+
+def test_stub_key_normalizes_query():
+    """Test hosts are ignored and query pairs match in any order, from the URL or params"""
+    assert stub_key('get', 'https://api.example.com/users?b=2&a=1') == \
+        stub_key('GET', 'http://127.0.0.1:8787/users', {'a': '1', 'b': '2'})
+    assert stub_key('GET', 'https://example.com') == ('GET', '/', ())
+
+
+def test_parse_bandwidth():
+    """Test plain, k and m bandwidths"""
+    assert parse_bandwidth("1000") == 1000
+    assert parse_bandwidth("64k") == 65536
+    assert parse_bandwidth("1.5M") == 1572864
+    with pytest.raises(ValueError):
+        parse_bandwidth("0")
+
+
+def test_stubs_from_history_latest_wins(db_manager):
+    """Test history entries become stubs, later responses replacing earlier ones"""
+    add_history(db_manager, 'GET', '{{base}}/users', {'page': '1'}, 500, b'old')
+    add_history(db_manager, 'GET', '{{base}}/users', {'page': '1'}, 200, b'new',
+                {'Content-Type': 'application/json', 'Content-Length': '3', 'Content-Encoding': 'gzip'})
+    add_history(db_manager, 'POST', 'https://example.com/users', {}, 201, b'created')
+    stubs = stubs_from_history(db_manager, {'{{base}}': 'https://example.com'})
+
+    stub = stubs[('GET', '/users', (('page', '1'),))]
+    assert (stub.status_code, stub.body) == (200, b'new')
+    assert stub.headers == {'Content-Type': 'application/json'}
+    assert stubs[('POST', '/users', ())].status_code == 201
+
+
+def test_stubs_for_collections(db_manager):
+    """Test only a collection's requests are served, skipping unrecorded ones"""
+    for name, url in (('List', 'https://example.com/users'), ('Never sent', 'https://example.com/other')):
+        db_manager.execute_update(
+            "INSERT INTO collections (name, is_folder, request_data) VALUES (?, 0, ?)",
+            (name, json.dumps({'method': 'GET', 'url': url}))
+        )
+    add_history(db_manager, 'GET', 'https://example.com/users', {}, 200, b'[]')
+    add_history(db_manager, 'GET', 'https://example.com/admin', {}, 200, b'{}')
+    recorded = stubs_from_history(db_manager, {})
+    stubs = stubs_for_collections(db_manager, ['List', 'Never sent'], {}, recorded)
+    assert list(stubs) == [('GET', '/users', ())]
+    with pytest.raises(ValueError):
+        stubs_for_collections(db_manager, ['Missing'], {}, recorded)
+
+
+def test_server_serves_stubs():
+    """Test matching requests get their stub, others a 404, over one connection"""
+    stubs = {stub_key('GET', '/users?page=1'): Stub(200, {'Content-Type': 'application/json'}, b'[1]')}
+    with MockServer(stubs) as server, requests.Session() as session:
+        response = session.get(f"{server.url}/users", params={'page': '1'})
+        assert (response.status_code, response.json()) == (200, [1])
+        assert session.get(f"{server.url}/users").status_code == 404
+        assert session.post(f"{server.url}/users?page=1", data="x").status_code == 404
+        assert server.metrics() == {'matched': 1, 'unmatched': 2, 'faults': 0}
+
+
+def test_server_injects_latency_and_errors():
+    """Test latency delays responses and an error rate of 1 fails every request"""
+    stubs = {stub_key('GET', '/'): Stub(200, {}, b'ok')}
+    with MockServer(stubs, FaultProfile(latency=100)) as server:
+        start = time.monotonic()
+        assert requests.get(server.url).status_code == 200
+        assert time.monotonic() - start >= 0.1
+    with MockServer(stubs, FaultProfile(error_rate=1, error_status=502)) as server:
+        assert requests.get(server.url).status_code == 502
+        assert server.metrics()['faults'] == 1
+
+
+def test_fault_profile_seeded():
+    """Test the same seed gives the same delays and errors"""
+    draws = [[FaultProfile(latency=50, jitter=20, error_rate=0.5, seed=7).draw() for _ in range(3)]
+             for _ in range(2)]
+    assert draws[0] == draws[1]
+    assert all(0.03 <= delay <= 0.07 for delay, _ in draws[0])
+
+
+def test_server_limits_bandwidth():
+    """Test bodies are sent no faster than the bandwidth"""
+    stubs = {stub_key('GET', '/big'): Stub(200, {}, b'x' * 64 * 1024)}
+    with MockServer(stubs, FaultProfile(bandwidth=256 * 1024)) as server:
+        start = time.monotonic()
+        assert len(requests.get(f"{server.url}/big").content) == 64 * 1024
+        assert time.monotonic() - start >= 0.2
@@ -0,0 +1,93 @@
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from database import DatabaseManager
+from http_response import HttpResponse
+from pypost import EXIT_FAILED, EXIT_OK, EXIT_USAGE, main
+
+
+def make_db(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    db_manager = DatabaseManager(db_path)
+    db_manager.execute_update(
+        "INSERT INTO collections (name, is_folder, request_data) VALUES ('Ping', 0, ?)",
+        (json.dumps({'method': 'GET', 'url': 'https://example.com/ping'}),)
+    )
+    return db_path
+
+
+@patch('runner.send_request')
+def test_main_runs_collection(mock_send, tmp_path, capsys):
+    """Test a passing collection run exits 0"""
+    mock_send.return_value = HttpResponse(200, {}, {}, b"pong", 3)
+    assert main(['--db', make_db(tmp_path), '--collection', 'Ping', '--format', 'json']) == EXIT_OK
+    report = json.loads(capsys.readouterr().out)
+    assert report['results'][0]['url'] == 'https://example.com/ping'
+
+
+@patch('runner.send_request')
+def test_main_failure_writes_output(mock_send, tmp_path):
+    """Test a failing run exits 1 and writes the report file"""
+    mock_send.return_value = HttpResponse(503, {}, {}, b"", 3)
+    output = str(tmp_path / "results.xml")
+    code = main(['--db', make_db(tmp_path), '--collection', 'Ping', '--format', 'junit', '--output', output])
+    assert code == EXIT_FAILED
+    with open(output, encoding='utf-8') as f:
+        assert 'HTTP 503' in f.read()
+
+
+@patch('runner.send_request')
+def test_main_data_file(mock_send, tmp_path, capsys):
+    """Test --data runs the requests once per row"""
+    mock_send.return_value = HttpResponse(200, {}, {}, b"", 3)
+    data = tmp_path / "rows.csv"
+    data.write_text("id\n1\n2\n3\n", encoding='utf-8')
+    db_path = make_db(tmp_path)
+    assert main(['--db', db_path, '--collection', 'Ping', '--data', str(data), '--format', 'jsonl']) == EXIT_OK
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['iteration'] for line in lines] == [1, 2, 3]
+    assert main(['--db', db_path, '--collection', 'Ping', '--data', str(tmp_path / "no.csv")]) == EXIT_USAGE
+
+
+def test_main_usage_errors(tmp_path):
+    """Test missing databases, unknown collections and empty runs exit 2"""
+    assert main(['--db', str(tmp_path / "missing.db"), '--collection', 'Ping']) == EXIT_USAGE
+    db_path = make_db(tmp_path)
+    assert main(['--db', db_path, '--collection', 'Missing']) == EXIT_USAGE
+    assert main(['--db', db_path]) == EXIT_USAGE
+
+
+def test_main_lists_collections(tmp_path, capsys):
+    """Test --list prints collections with their ids"""
+    assert main(['--db', make_db(tmp_path), '--list']) == EXIT_OK
+    assert "Ping" in capsys.readouterr().out
+
+
+def test_qt_not_imported(tmp_path):
+    """Test the runner never imports Qt"""
+    db_path = make_db(tmp_path)
+    code = (f"import sys, pypost; pypost.main(['--db', {db_path!r}, '--collection', 'Missing']); "
+            "print('PySide6' in sys.modules)")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=str(tmp_path), env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+@patch('runner.send_request')
+def test_main_replay(mock_send, tmp_path, capsys):
+    """Test --replay re-sends history entries and compares their statuses"""
+    db_path = make_db(tmp_path)
+    db_manager = DatabaseManager(db_path)
+    db_manager.execute_update(
+        "INSERT INTO history (method, url, request_data, status_code, response_time) "
+        "VALUES ('GET', 'https://example.com/x', '{}', 200, 40)"
+    )
+    mock_send.return_value = HttpResponse(200, {}, {}, b"", 3)
+    assert main(['--db', db_path, '--replay', '1-', '--speed', 'max', '--format', 'json']) == EXIT_OK
+    assert json.loads(capsys.readouterr().out)['replay']['status_changes'] == 0
+    assert main(['--db', db_path, '--replay', '5-9']) == EXIT_USAGE
+    assert main(['--db', db_path, '--replay', '1', '--collection', 'Ping']) == EXIT_USAGE
@@ -0,0 +1,37 @@
+import query_panel
+from query_panel import QueryResultModel
+
+
+def test_results_fetched_in_pages(monkeypatch):
+    """Test only one page is pulled until the view asks for more"""
+    monkeypatch.setattr(query_panel, 'RESULT_PAGE_SIZE', 10)
+    model = QueryResultModel()
+    pulled = []
+
+    def results():
+        for number in range(25):
+            pulled.append(number)
+            yield f'$[{number}]', str(number)
+
+    model.set_results(results())
+    assert model.rowCount() == 10
+    assert model.canFetchMore()
+
+    model.fetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 25
+    assert not model.canFetchMore()
+    assert model.index(24, 1).data() == '24'
+
+
+def test_query_error_recorded():
+    """Test errors raised while iterating are kept for display"""
+    def results():
+        raise ValueError("Invalid JSONPath")
+        yield
+
+    model = QueryResultModel()
+    model.set_results(results())
+    assert model.rowCount() == 0
+    assert model.error == "Invalid JSONPath"
+    assert not model.canFetchMore()
@@ -0,0 +1,89 @@
+import json
+import logging
+import pytest
+
+from database import DatabaseManager
+from replay import history_slice, parse_id_range, parse_speed, replay_jobs
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to create a DatabaseManager with temporary database"""
+    db = DatabaseManager(str(tmp_path / "test.db"))
+    for url, created_at, status in [("https://a", "2024-01-01 10:00:00", 200),
+                                    ("https://b", "2024-01-01 10:00:04", 404),
+                                    ("https://c", "2024-01-01 10:00:10", 200)]:
+        db.execute_update(
+            "INSERT INTO history (method, url, request_data, status_code, response_time, created_at) "
+            "VALUES ('GET', ?, ?, ?, 25, ?)",
+            (url, json.dumps({'method': 'GET', 'url': url}), status, created_at)
+        )
+    return db
+
+
+class FakeClock:
+    """Clock that only advances when slept on"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_parse_speed():
+    """Test speed factors and max"""
+    assert parse_speed("1") == 1.0
+    assert parse_speed("10x") == 10.0
+    assert parse_speed("MAX") is None
+    with pytest.raises(ValueError):
+        parse_speed("0")
+
+
+def test_parse_id_range():
+    """Test single ids and open and closed ranges"""
+    assert parse_id_range("7") == (7, 7)
+    assert parse_id_range("2-9") == (2, 9)
+    assert parse_id_range("3-") == (3, None)
+    assert parse_id_range("-4") == (None, 4)
+
+
+def test_history_slice(db_manager):
+    """Test entries in the id range are read in send order"""
+    assert [entry['url'] for entry in history_slice(db_manager, 2)] == ["https://b", "https://c"]
+    assert [entry['id'] for entry in history_slice(db_manager, None, 1)] == [1]
+
+
+def test_replay_keeps_scaled_gaps(db_manager):
+    """Test jobs are produced after the recorded gaps divided by the speed"""
+    clock = FakeClock()
+    jobs = list(replay_jobs(db_manager, history_slice(db_manager), 2.0, clock, clock.sleep))
+    assert clock.sleeps == [2.0, 3.0]
+    assert [(job.request.url, job.recorded_status, job.recorded_time) for job in jobs] == [
+        ("https://a", 200, 25), ("https://b", 404, 25), ("https://c", 200, 25)
+    ]
+
+
+def test_replay_at_max_speed(db_manager):
+    """Test max speed never waits"""
+    clock = FakeClock()
+    assert len(list(replay_jobs(db_manager, history_slice(db_manager), None, clock, clock.sleep))) == 3
+    assert clock.sleeps == []
+
+
+def test_replay_warns_about_late_entries(db_manager, caplog):
+    """Test entries asked for after they were due are reported when the replay ends"""
+    clock = FakeClock()
+    jobs = replay_jobs(db_manager, history_slice(db_manager), 1.0, clock, clock.sleep)
+    next(jobs)
+    # The consumer waited on a response past the second entry's due time
+    clock.now += 7.0
+    with caplog.at_level(logging.WARNING):
+        assert len(list(jobs)) == 2
+    assert clock.sleeps == [3.0]
+    assert "1 replayed requests were sent late, up to 3000 ms" in caplog.text
@@ -0,0 +1,72 @@
+from request_model import RequestModel, substitute_text
+
+
+def test_request_headers_add_auth():
+    """Test bearer and basic auth become an Authorization header"""
+    request = RequestModel(headers={' Accept ': ' application/json ', ' ': 'x'},
+                           auth_type='Bearer Token', bearer_token='abc')
+    assert request.request_headers() == {'Accept': 'application/json', 'Authorization': 'Bearer abc'}
+
+    request = RequestModel(auth_type='Basic Auth', basic_username='user', basic_password='pass')
+    assert request.request_headers() == {'Authorization': 'Basic dXNlcjpwYXNz'}
+
+
+def test_body_data():
+    """Test bodies are only sent for body types that have one"""
+    assert RequestModel(body_type='JSON', body='{"a": 1}').body_data() == '{"a": 1}'
+    assert RequestModel(body_type='JSON', body='   ').body_data() is None
+    assert RequestModel(body_type='None', body='ignored').body_data() is None
+    multipart = RequestModel(body_type='Multipart Form-Data', files={'file': '/tmp/a.txt', 'empty': ''})
+    assert multipart.body_data() is None
+    assert multipart.request_files() == {'file': '/tmp/a.txt'}
+
+
+def test_resolve_substitutes_variables():
+    """Test environment variables are applied to every part of the request"""
+    request = RequestModel(url='{{HOST}}/items', headers={'X-Host': '{{HOST}}'},
+                           params={'q': '{{HOST}}'}, body_type='JSON', body='"{{HOST}}"')
+    url, headers, params, data = request.resolve({'{{HOST}}': 'https://api'})
+    assert url == 'https://api/items'
+    assert headers == {'X-Host': 'https://api'}
+    assert params == {'q': 'https://api'}
+    assert data == '"https://api"'
+    assert request.url == '{{HOST}}/items'
+
+
+def test_dict_round_trip_encrypts_credentials():
+    """Test stored request data keeps credentials encrypted"""
+    request = RequestModel(method='POST', url='https://example.com', auth_type='Basic Auth',
+                           basic_username='user', basic_password='secret', body_type='JSON', body='{}')
+    data = request.to_dict(lambda value: value[::-1])
+    assert data['basic_password'] == 'terces'
+    assert data['bearer_token'] is None
+
+    restored = RequestModel.from_dict(data, lambda value: value[::-1])
+    assert restored.basic_password == 'secret'
+    assert restored.method == 'POST'
+    assert restored.body == '{}'
+
+
+def test_dict_round_trip_keeps_chain_declarations():
+    """Test extract, depends_on and policy are stored only when declared"""
+    assert 'extract' not in RequestModel(url='https://example.com').to_dict(str)
+    request = RequestModel(url='https://example.com', extract={'token': '$.token'}, depends_on=['Login'],
+                           policy={'retries': 2})
+    restored = RequestModel.from_dict(request.to_dict(str), str)
+    assert restored.extract == {'token': '$.token'}
+    assert restored.depends_on == ['Login']
+    assert restored.policy == {'retries': 2}
+
+
+def test_from_dict_tolerates_undecryptable_credentials():
+    """Test credentials that cannot be decrypted are dropped"""
+    def fail(value):
+        raise ValueError("bad token")
+
+    restored = RequestModel.from_dict({'auth_type': 'Bearer Token', 'bearer_token': 'x'}, fail)
+    assert restored.bearer_token == ''
+
+
+def test_substitute_text():
+    """Test every placeholder occurrence is replaced"""
+    assert substitute_text('{{A}}-{{A}}', {'{{A}}': '1'}) == '1-1'
@@ -12,9 +12,27 @@ def db_manager_mock():
 def request_tab(db_manager_mock):
     with patch('request_tab.DatabaseManager', return_value=db_manager_mock):
         tab = RequestTab(db_manager_mock)
+        tab.ensure_ui()
         yield tab
 
 
+def test_widgets_built_on_demand(db_manager_mock):
+    """Test a new tab keeps its request in the model until it is shown"""
+    tab = RequestTab(db_manager_mock)
+    assert not hasattr(tab, 'url_input')
+
+    db_manager_mock.decrypt.return_value = "token"
+    tab.load_request_data({'method': 'PUT', 'url': 'https://example.com',
+                           'auth_type': 'Bearer Token', 'bearer_token': 'encrypted'})
+    assert not hasattr(tab, 'url_input')
+    assert tab.get_headers() == {'Authorization': 'Bearer token'}
+
+    tab.ensure_ui()
+    assert tab.method_selector.currentText() == "PUT"
+    assert tab.url_input.text() == "https://example.com"
+    assert tab.bearer_token_input.text() == "token"
+
+
 def test_request_tab_init(request_tab, db_manager_mock):
     """Test RequestTab initialization"""
     assert request_tab.db_manager == db_manager_mock
@@ -114,7 +132,7 @@ def test_send_request_invalid_url(mock_msgbox, request_tab):
     mock_msgbox.warning.assert_called_once()
 
 
-@patch('request_tab.HTTPWorker')
+@patch('http_worker.HTTPWorker')
 def test_send_request_success(mock_worker, request_tab, db_manager_mock):
     """Test successful request send"""
     request_tab.url_input.text.return_value = "https://example.com"
@@ -210,26 +228,27 @@ def test_apply_substitutions(request_tab, db_manager_mock):
     assert result_data == '{"base": "https://api.example.com"}'
 
 
-def test_substitute_variables(request_tab):
-    """Test substituting variables in UI"""
-    request_tab._get_env_variables.return_value = {"{{NAME}}": "John"}
+def test_set_environment_keeps_templates(request_tab):
+    """Test switching environment leaves templates untouched"""
+    request_tab.url_input.setText("https://example.com/{{NAME}}")
 
-    # Mock table items
-    mock_key = Mock()
-    mock_key.text.return_value = "greeting"
-    mock_value = Mock()
-    mock_value.text.return_value = "Hello {{NAME}}"
+    request_tab.set_environment("Production")
+
+    assert request_tab.current_environment == "Production"
+    assert request_tab.url_input.text() == "https://example.com/{{NAME}}"
 
-    request_tab.params_table.rowCount.return_value = 1
-    request_tab.params_table.item.side_effect = lambda row, col: [mock_key, mock_value][col]
 
-    request_tab.url_input.text.return_value = "https://example.com/{{NAME}}"
-    request_tab.body_input.toPlainText.return_value = '{"name": "{{NAME}}"}'
+def test_get_env_variables_cached(request_tab):
+    """Test environment variables are cached per environment"""
+    request_tab._load_env_variables = Mock(return_value={"{{NAME}}": "John"})
 
-    request_tab.substitute_variables()
+    assert request_tab._get_env_variables() == {"{{NAME}}": "John"}
+    assert request_tab._get_env_variables() == {"{{NAME}}": "John"}
+    request_tab._load_env_variables.assert_called_once()
 
-    assert request_tab.url_input.text() == "https://example.com/John"
-    mock_value.setText.assert_called_once_with("Hello John")
+    request_tab.set_environment("Other")
+    request_tab._get_env_variables()
+    assert request_tab._load_env_variables.call_count == 2
 
 
 def test_add_remove_param_row(request_tab):
@@ -0,0 +1,102 @@
+import random
+import pytest
+from response_diff import DiffRows, diff_bodies, diff_lines, diff_sequences, json_changes
+
+
+def apply_opcodes(a, b, opcodes):
+    """Rebuild b from a and the opcodes, checking they are contiguous"""
+    result = []
+    position_a = position_b = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (position_a, position_b)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+        position_a, position_b = i2, j2
+    assert (position_a, position_b) == (len(a), len(b))
+    return result
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for item in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if item == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def test_diff_is_minimal():
+    """Test random sequences give valid, minimal edit scripts"""
+    rng = random.Random(7)
+    for _ in range(500):
+        a = [rng.randint(0, 3) for _ in range(rng.randint(0, 15))]
+        b = [rng.randint(0, 3) for _ in range(rng.randint(0, 15))]
+        opcodes = diff_sequences(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        equal = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag == 'equal')
+        assert equal == lcs_length(a, b)
+
+
+def test_cost_limit_falls_back_to_replace():
+    """Test regions above the edit budget become one replacement"""
+    a = list(range(100))
+    b = list(range(100, 200))
+    assert diff_sequences(a, b, max_cost=5) == [('replace', 0, 100, 0, 100)]
+
+
+def test_diff_lines_groups_changes():
+    """Test line diffs report replacements between equal runs"""
+    a = ['a', 'b', 'c', 'd']
+    b = ['a', 'x', 'c', 'd', 'e']
+    assert diff_lines(a, b) == [
+        ('equal', 0, 1, 0, 1), ('replace', 1, 2, 1, 2), ('equal', 2, 4, 2, 4), ('insert', 4, 4, 4, 5)
+    ]
+
+
+def test_rows_fold_unchanged_runs(monkeypatch):
+    """Test long unchanged runs are folded around changes"""
+    a = [str(number) for number in range(20)]
+    b = list(a)
+    b[10] = 'ten'
+    rows = DiffRows(a, b, diff_lines(a, b), context=2)
+
+    rendered = [rows.row(row) for row in range(rows.row_count)]
+    assert rendered[0] == ('@', 0, 0, '… 8 unchanged lines')
+    assert rendered[1:5] == [(' ', 8, 8, '8'), (' ', 9, 9, '9'), ('-', 10, None, '10'), ('+', None, 10, 'ten')]
+    assert rendered[-1] == ('@', 13, 13, '… 7 unchanged lines')
+    assert rows.changed == 2
+    assert rows.next_change(-1) == 3
+    assert rows.next_change(3) is None
+    with pytest.raises(IndexError):
+        rows.row(rows.row_count)
+
+
+def test_json_changes_align_arrays():
+    """Test structural changes with array elements aligned by content"""
+    old = {"a": [1, 2, 3], "b": {"c": 1}, "d": 1, "f": 1}
+    new = {"a": [1, 5, 2, 3], "b": {"c": 2}, "e": True, "f": True}
+    assert sorted(json_changes(old, new)) == [
+        ('$.a[1]', 'added', None, 5),
+        ('$.b.c', 'changed', 1, 2),
+        ('$.d', 'removed', 1, None),
+        ('$.e', 'added', None, True),
+        ('$.f', 'changed', 1, True),
+    ]
+
+
+def test_diff_bodies_json_ignores_key_order():
+    """Test JSON bodies are compared structurally"""
+    rows, changes = diff_bodies('{"b": 1, "a": 2}', '{"a":2,"b":1}', 'application/json', 'application/json')
+    assert rows.changed == 0
+    assert changes == []
+
+
+def test_diff_bodies_text():
+    """Test other bodies are compared line by line"""
+    rows, changes = diff_bodies('one\ntwo', 'one\nthree', 'text/plain', 'text/plain')
+    assert changes is None
+    assert rows.changed == 2
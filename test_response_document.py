@@ -0,0 +1,57 @@
+from unittest.mock import patch
+import pytest
+from response_document import ResponseDocument
+
+
+def test_json_parsed_once():
+    """Test the body is parsed only once across formatting and queries"""
+    document = ResponseDocument('{"a": [1, 2]}', 'application/json')
+    assert not document.is_parsed
+    with patch('response_document.json.loads', wraps=__import__('json').loads) as loads:
+        assert document.formatted() == '{\n  "a": [\n    1,\n    2\n  ]\n}'
+        assert list(document.query('$.a[*]')) == [('$.a[0]', '1'), ('$.a[1]', '2')]
+        assert loads.call_count == 1
+
+
+def test_invalid_json_error_cached():
+    """Test malformed bodies raise ValueError and are shown unformatted"""
+    document = ResponseDocument('{"a": ', 'application/json')
+    assert document.formatted() == '{"a": '
+    with pytest.raises(ValueError):
+        list(document.query('$.a'))
+
+
+def test_xpath_query():
+    """Test absolute, descendant and predicate XPath queries"""
+    document = ResponseDocument('<?xml version="1.0"?><a><b id="1">x</b><b/></a>', 'application/xml')
+    assert list(document.query('/a/b')) == [('b', '<b id="1">x</b>'), ('b', '<b />')]
+    assert list(document.query("//b[@id='1']")) == [('b', '<b id="1">x</b>')]
+    with pytest.raises(ValueError):
+        list(document.query('/a/['))
+
+
+def test_large_results_summarized():
+    """Test big containers are summarized instead of serialized"""
+    document = ResponseDocument('{"items": [' + ','.join(['1'] * 1000) + ']}', 'application/json')
+    assert list(document.query('$.items')) == [('$.items', '[… 1000 items]')]
+
+
+def test_plain_text_not_queryable():
+    """Test bodies that are neither JSON nor XML"""
+    document = ResponseDocument('hello', 'text/plain')
+    assert document.kind is None
+    assert document.formatted() == 'hello'
+    with pytest.raises(ValueError):
+        document.parsed()
+
+
+def test_first_value():
+    """Test the first match is returned in full, strings unquoted"""
+    document = ResponseDocument('{"token": "abc", "user": {"id": 7}}', 'application/json')
+    assert document.first_value('$.token') == 'abc'
+    assert document.first_value('$.user') == '{"id": 7}'
+    with pytest.raises(ValueError):
+        document.first_value('$.missing')
+
+    xml = ResponseDocument('<auth><token>x<b>y</b></token></auth>', 'application/xml')
+    assert xml.first_value('/auth/token') == 'xy'
@@ -0,0 +1,110 @@
+import json
+import pytest
+import response_formatter
+from response_formatter import format_body, iter_pretty_json, iter_pretty_xml, looks_like_json, looks_like_xml
+
+
+def test_format_json():
+    """Test JSON is pretty printed"""
+    assert format_body('{"a": [1, 2]}', 'application/json') == '{\n  "a": [\n    1,\n    2\n  ]\n}'
+
+
+def test_format_invalid_json_returned_as_is():
+    """Test invalid JSON is returned unchanged"""
+    assert format_body('{"a": ', 'application/json') == '{"a": '
+
+
+def test_format_xml():
+    """Test XML is pretty printed"""
+    formatted = format_body('<a><b>x</b></a>', 'application/xml')
+    assert '<a>\n  <b>x</b>\n</a>' in formatted
+
+
+def test_format_detects_json_without_content_type():
+    """Test JSON is detected when no content type is given"""
+    assert format_body('[1]', '') == '[\n  1\n]'
+
+
+def test_format_plain_text_unchanged():
+    """Test other content types are not modified"""
+    text = '{"a": 1}'
+    assert format_body(text, 'text/plain') is text
+
+
+def test_format_empty_and_none():
+    """Test empty and missing bodies"""
+    assert format_body('', 'application/json') == ''
+    assert format_body(None, 'application/json') == ''
+
+
+def test_looks_like_helpers():
+    """Test content sniffing heuristics"""
+    assert looks_like_json(' {"a": 1} ')
+    assert not looks_like_json('hello')
+    assert looks_like_xml('<a/>')
+    assert not looks_like_xml('a < b')
+
+
+def test_streamed_json_matches_json_module():
+    """Test token-by-token re-indenting matches json.dumps"""
+    data = {"a": [1, -2.5e3, True, None, {}, []], "b": {"c": 'x " y \\ z', "d": [[]]}, "é": "ü"}
+    text = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    streamed = ''.join(iter_pretty_json(text))
+    assert streamed == json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def test_streamed_json_rejects_malformed():
+    """Test malformed JSON raises ValueError while streaming"""
+    for text in ['{"a": 1', '[1, 2]]', '{"a" 1}', '[1,, 2]', '[tru]', '[1] x', '{1: 2}']:
+        with pytest.raises(ValueError):
+            ''.join(iter_pretty_json(text))
+
+
+def test_large_json_is_streamed(monkeypatch):
+    """Test bodies over the threshold use the streaming formatter"""
+    monkeypatch.setattr(response_formatter, 'STREAMING_FORMAT_THRESHOLD', 4)
+    assert format_body('{"a": [1, 2]}', 'application/json') == '{\n  "a": [\n    1,\n    2\n  ]\n}'
+    assert format_body('{"a": ', 'application/json') == '{"a": '
+
+
+def test_streamed_xml_mixed_content():
+    """Test XML re-indenting keeps comments, CDATA and mixed text in place"""
+    text = '<?xml version="1.0"?><a x="1"><!--c--><b>t &amp; u</b>tail<c/><![CDATA[<raw>]]></a>'
+    assert ''.join(iter_pretty_xml(text)) == (
+        '<?xml version="1.0"?>\n'
+        '<a x="1">\n'
+        '  <!--c-->\n'
+        '  <b>t &amp; u</b>\n'
+        '  tail\n'
+        '  <c/>\n'
+        '  <![CDATA[<raw>]]>\n'
+        '</a>\n'
+    )
+
+
+def test_streamed_xml_from_file(tmp_path):
+    """Test XML can be re-indented from a file in chunks"""
+    path = tmp_path / "body.xml"
+    path.write_bytes(b'<a>' + b'<b>1</b>' * 20000 + b'</a>')
+    with open(path, 'rb') as f:
+        lines = ''.join(iter_pretty_xml(f)).splitlines()
+    assert len(lines) == 20002
+    assert lines[1] == '  <b>1</b>'
+
+
+def test_xml_text_ignores_declared_encoding():
+    """Test decoded text is formatted whatever encoding its declaration names"""
+    for encoding in ('ISO-8859-1', 'UTF-16'):
+        text = f'<?xml version="1.0" encoding="{encoding}"?><a><b>café</b></a>'
+        assert format_body(text, 'application/xml').splitlines()[2] == '  <b>café</b>'
+
+
+def test_streamed_xml_keeps_internal_subset():
+    """Test a DOCTYPE's internal subset is written as it was declared"""
+    text = '<!DOCTYPE a [<!ENTITY e "ent">]><a>x &e;</a>'
+    assert ''.join(iter_pretty_xml(text)) == '<!DOCTYPE a [<!ENTITY e "ent">]>\n<a>x ent</a>\n'
+
+
+def test_invalid_xml_returned_as_is():
+    """Test malformed XML is returned unchanged"""
+    assert format_body('<a><b></a>', 'application/xml') == '<a><b></a>'
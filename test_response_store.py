@@ -0,0 +1,61 @@
+import os
+from unittest.mock import Mock
+import pytest
+import response_store
+from line_buffer import LineBuffer
+from response_store import SpilledBody, SpillTask, spill_buffer, spill_text
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    """Keep spill files inside the test's temporary directory"""
+    monkeypatch.setattr(response_store, '_spill_directory', str(tmp_path))
+    return tmp_path
+
+
+def test_spilled_body_round_trip(spill_dir):
+    """Test a spilled body maps back and its files are removed"""
+    buffer = LineBuffer.from_text('{\n  "a": "é"\n}')
+    spilled = SpilledBody(spill_buffer(buffer), spill_text('{"a": "é"}'), 'application/json')
+
+    restored = spilled.load_buffer()
+    assert restored.text() == '{\n  "a": "é"\n}'
+    assert restored.path is not None
+    assert spilled.load_source(restored) == '{"a": "é"}'
+    restored.close()
+    assert os.listdir(spill_dir) == []
+
+
+def test_source_defaults_to_displayed_body():
+    """Test bodies shown unformatted are spilled once"""
+    spilled = SpilledBody(spill_buffer(LineBuffer.from_text("plain")), None, 'text/plain')
+    buffer = spilled.load_buffer()
+    assert spilled.load_source(buffer) == "plain"
+    buffer.close()
+
+
+def test_spill_task_emits_paths():
+    """Test the task reports the files it wrote with its generation"""
+    task = SpillTask(4, LineBuffer.from_text("body"), "source")
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.run()
+
+    generation, (path, source_path) = receiver.call_args[0]
+    assert generation == 4
+    assert open(path, 'rb').read() == b"body"
+    assert open(source_path, 'rb').read() == b"source"
+
+
+def test_cancelled_spill_task_leaves_no_files(spill_dir):
+    """Test a cancelled task neither emits nor leaves files behind"""
+    task = SpillTask(1, LineBuffer.from_text("body"))
+    receiver = Mock()
+    task.signals.finished.connect(receiver)
+
+    task.cancel()
+    task.run()
+
+    receiver.assert_not_called()
+    assert os.listdir(spill_dir) == []
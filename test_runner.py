@@ -0,0 +1,293 @@
+import io
+import itertools
+import json
+import threading
+import xml.etree.ElementTree as ET
+import pytest
+import requests
+from unittest.mock import patch
+
+from constants import AUTH_BEARER_TOKEN, BODY_JSON, BODY_PLAIN_TEXT
+from database import DatabaseManager
+from http_client import RetryPolicy
+from http_response import HttpResponse
+from request_model import RequestModel
+from response_document import ResponseDocument
+from run_report import JsonLinesReportWriter, json_report, junit_report, text_report
+from runner import (RunJob, RunResult, collection_jobs, environment_substitutions, extract_value,
+                    history_job, iter_data_rows, iteration_jobs, run_job, run_jobs, stream_jobs)
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to create a DatabaseManager with temporary database"""
+    return DatabaseManager(str(tmp_path / "test.db"))
+
+
+def add_request(db_manager, name, request, parent_id=None):
+    return db_manager.execute_update(
+        "INSERT INTO collections (name, parent_id, is_folder, request_data) VALUES (?, ?, 0, ?)",
+        (name, parent_id, json.dumps(request.to_dict(db_manager.encrypt)))
+    )
+
+
+def test_collection_jobs_expand_folders(db_manager):
+    """Test a folder runs its requests and those of nested folders in order"""
+    folder_id = db_manager.execute_update("INSERT INTO collections (name, is_folder) VALUES ('API', 1)")
+    add_request(db_manager, "List", RequestModel(url="https://example.com/a"), folder_id)
+    sub_id = db_manager.execute_update(
+        "INSERT INTO collections (name, parent_id, is_folder) VALUES ('Users', ?, 1)", (folder_id,)
+    )
+    add_request(db_manager, "Get", RequestModel(url="https://example.com/b"), sub_id)
+    add_request(db_manager, "Create", RequestModel(method="POST", url="https://example.com/c"), folder_id)
+
+    jobs = collection_jobs(db_manager, "API")
+    assert [job.name for job in jobs] == ["API/List", "API/Users/Get", "API/Create"]
+    assert collection_jobs(db_manager, str(sub_id))[0].request.url == "https://example.com/b"
+
+
+def test_collection_jobs_inherit_folder_policies(db_manager):
+    """Test requests inherit folder policies, nearest folder and request winning"""
+    outer = db_manager.execute_update(
+        "INSERT INTO collections (name, is_folder, request_data) VALUES ('API', 1, ?)",
+        (json.dumps({'policy': {'retries': 2, 'read_timeout': 10}}),)
+    )
+    inner = db_manager.execute_update(
+        "INSERT INTO collections (name, parent_id, is_folder, request_data) VALUES ('Slow', ?, 1, ?)",
+        (outer, json.dumps({'policy': {'read_timeout': 60}}))
+    )
+    add_request(db_manager, "Report", RequestModel(url="https://example.com", policy={'retries': 0}), inner)
+    add_request(db_manager, "Export", RequestModel(url="https://example.com"), inner)
+
+    for key in ("API", "Slow"):
+        policies = [job.request.policy for job in collection_jobs(db_manager, key)]
+        assert policies == [{'retries': 0, 'read_timeout': 60}, {'retries': 2, 'read_timeout': 60}]
+
+
+def test_collection_jobs_decrypt_credentials(db_manager):
+    """Test saved credentials are decrypted into the Authorization header"""
+    request = RequestModel(url="https://example.com", auth_type=AUTH_BEARER_TOKEN, bearer_token="secret")
+    add_request(db_manager, "Private", request)
+    job = collection_jobs(db_manager, "Private")[0]
+    assert job.request.request_headers()['Authorization'] == "Bearer secret"
+
+
+def test_collection_jobs_unknown(db_manager):
+    """Test an unknown collection is reported"""
+    with pytest.raises(ValueError):
+        collection_jobs(db_manager, "Missing")
+
+
+def test_history_job_without_body_type(db_manager):
+    """Test entries logged without a body type still send their body"""
+    request_data = {'method': 'POST', 'url': 'https://example.com', 'headers': {}, 'params': {}, 'body': 'hi'}
+    history_id = db_manager.execute_update(
+        "INSERT INTO history (method, url, request_data) VALUES ('POST', 'https://example.com', ?)",
+        (json.dumps(request_data),)
+    )
+    job = history_job(db_manager, history_id)
+    assert job.request.body_type == BODY_PLAIN_TEXT
+    assert job.request.body_data() == 'hi'
+    with pytest.raises(ValueError):
+        history_job(db_manager, history_id + 1)
+
+
+def test_environment_substitutions(db_manager):
+    """Test variables of the named or active environment become placeholders"""
+    env_id = db_manager.execute_update("INSERT INTO environments (name) VALUES ('Staging')")
+    db_manager.execute_update(
+        "INSERT INTO environment_variables (environment_id, name, value) VALUES (?, 'host', 'staging.test')",
+        (env_id,)
+    )
+    assert environment_substitutions(db_manager, "Staging") == {"{{host}}": "staging.test"}
+    assert environment_substitutions(db_manager) == {}
+    with pytest.raises(ValueError):
+        environment_substitutions(db_manager, "Production")
+
+
+@patch('runner.send_request')
+def test_run_job_substitutes(mock_send):
+    """Test a job is sent with variables substituted"""
+    mock_send.return_value = HttpResponse(201, {}, {}, b"done", 12)
+    request = RequestModel(method="POST", url="https://{{host}}/items", body_type=BODY_JSON, body='{"a": "{{v}}"}')
+    result = run_job(RunJob("Create", request), {"{{host}}": "api.test", "{{v}}": "1"})
+
+    args = mock_send.call_args[0]
+    assert args[:2] == ("POST", "https://api.test/items")
+    assert args[3] == '{"a": "1"}'
+    assert result.passed
+    assert (result.status_code, result.size) == (201, 4)
+
+
+@patch('runner.send_request')
+def test_run_job_errors(mock_send):
+    """Test error statuses fail and network errors are recorded"""
+    mock_send.return_value = HttpResponse(500, {}, {}, b"", 5)
+    assert not run_job(RunJob("Bad", RequestModel(url="https://example.com")), {}).passed
+
+    mock_send.side_effect = requests.exceptions.ConnectionError("refused")
+    result = run_job(RunJob("Down", RequestModel(url="https://example.com")), {})
+    assert not result.passed
+    assert result.status_code is None
+    assert "refused" in result.error
+
+
+@patch('runner.send_request')
+def test_run_jobs_keeps_order(mock_send):
+    """Test parallel runs report results in job order"""
+    mock_send.side_effect = lambda method, url, *args, **kwargs: HttpResponse(200, {}, {}, url.encode(), 1)
+    jobs = [RunJob(str(i), RequestModel(url=f"https://example.com/{i}")) for i in range(10)]
+    results = run_jobs(jobs, {}, parallel=4)
+    assert [result.name for result in results] == [str(i) for i in range(10)]
+    assert all(result.passed for result in results)
+
+
+def test_iter_data_rows_csv(tmp_path):
+    """Test CSV rows use the header row as variable names"""
+    path = tmp_path / "users.csv"
+    path.write_text("name,id\nada,1\nbob\n", encoding='utf-8')
+    assert list(iter_data_rows(str(path))) == [{'name': 'ada', 'id': '1'}, {'name': 'bob', 'id': ''}]
+
+
+def test_iter_data_rows_jsonl(tmp_path):
+    """Test JSONL rows become string variables and bad lines are reported"""
+    path = tmp_path / "users.jsonl"
+    path.write_text('{"name": "ada", "id": 1, "tags": ["x"], "note": null}\n\n[1]\n', encoding='utf-8')
+    rows = iter_data_rows(str(path))
+    assert next(rows) == {'name': 'ada', 'id': '1', 'tags': '["x"]', 'note': ''}
+    with pytest.raises(ValueError, match=":3:"):
+        next(rows)
+
+
+@patch('runner.send_request')
+def test_iterations_substitute_row_variables(mock_send):
+    """Test each row runs every job with its values overriding the environment"""
+    mock_send.side_effect = lambda method, url, *args, **kwargs: HttpResponse(200, {}, {}, b"", 1)
+    jobs = [RunJob("Get", RequestModel(url="https://{{host}}/users/{{id}}")),
+            RunJob("Delete", RequestModel(method="DELETE", url="https://{{host}}/users/{{id}}"))]
+    rows = [{'id': '1'}, {'id': '2', 'host': 'other.test'}]
+    results = list(stream_jobs(iteration_jobs(jobs, rows), {"{{host}}": "api.test"}, parallel=2))
+    assert [(result.iteration, result.url) for result in results] == [
+        (1, "https://api.test/users/1"), (1, "https://api.test/users/1"),
+        (2, "https://other.test/users/2"), (2, "https://other.test/users/2"),
+    ]
+
+
+@patch('runner.send_request')
+def test_stream_jobs_reads_lazily(mock_send):
+    """Test jobs are drawn from an endless source only as results are consumed"""
+    mock_send.return_value = HttpResponse(200, {}, {}, b"", 1)
+    drawn = itertools.count()
+    rows = ({'n': str(next(drawn))} for _ in itertools.count())
+    results = stream_jobs(iteration_jobs([RunJob("Get", RequestModel(url="https://example.com"))], rows),
+                          {}, parallel=3)
+    assert len(list(itertools.islice(results, 5))) == 5
+    results.close()
+    assert next(drawn) <= 5 + 3 * 2
+
+
+@patch('runner.send_request')
+def test_stream_jobs_sends_past_a_slow_request(mock_send):
+    """Test a slow first request holds back only the reporting of later results"""
+    sent = []
+    released = threading.Event()
+    waited = []
+
+    def send(method, url, *args, **kwargs):
+        sent.append(url)
+        if url.endswith('/0'):
+            waited.append(released.wait(5))
+        elif len(sent) == 4:
+            # Only reached if later jobs are sent while the first is in flight
+            released.set()
+        return HttpResponse(200, {}, {}, b"", 1)
+
+    mock_send.side_effect = send
+    jobs = [RunJob(str(i), RequestModel(url=f"https://example.com/{i}")) for i in range(6)]
+    results = list(stream_jobs(jobs, {}, parallel=2))
+    assert waited == [True]
+    assert [result.name for result in results] == [str(i) for i in range(6)]
+
+
+def test_reports():
+    """Test the text, JSON and JUnit reports"""
+    results = [
+        RunResult("ok", "GET", "https://a", 200, 10, 3),
+        RunResult("bad", "GET", "https://b", 404, 20, 0),
+        RunResult("down", "GET", "https://c", error="Request failed: refused"),
+    ]
+    assert text_report(results).endswith("3 requests, 1 passed, 2 failed\n")
+    assert json.loads(json_report(results))['failed'] == 2
+
+    suite = ET.fromstring(junit_report(results))
+    assert (suite.get('tests'), suite.get('failures'), suite.get('errors')) == ('3', '1', '1')
+    cases = suite.findall('testcase')
+    assert cases[1].find('failure').get('message') == "HTTP 404"
+    assert cases[2].find('error') is not None
+
+
+def test_jsonl_report_writes_incrementally():
+    """Test each result is written and flushed as it is added"""
+    stream = io.StringIO()
+    writer = JsonLinesReportWriter(stream)
+    writer.start()
+    writer.add(RunResult("ok", "GET", "https://a", 200, iteration=1))
+    assert json.loads(stream.getvalue())['iteration'] == 1
+    writer.add(RunResult("bad", "GET", "https://a", 500, iteration=2))
+    writer.finish()
+    assert len(stream.getvalue().splitlines()) == 2
+    assert (writer.total, writer.failed) == (2, 1)
+
+
+def test_replay_report_compares_recording():
+    """Test replayed requests pass on an unchanged status and are compared with the recording"""
+    results = [
+        RunResult("history #1", "GET", "https://a", 404, 30, recorded_status=404, recorded_time=10),
+        RunResult("history #2", "GET", "https://a", 500, 50, recorded_status=200, recorded_time=20),
+    ]
+    assert results[0].passed and not results[1].passed
+    report = json.loads(json_report(results))
+    assert report['replay'] == {'replayed': 2, 'status_changes': 1,
+                                'mean_response_time': 40.0, 'mean_recorded_time': 15.0}
+    assert "500 (was 200) 50 ms (was 20 ms)" in text_report(results)
+
+
+def test_extract_value():
+    """Test status, header and body extraction"""
+    response = HttpResponse(201, {'X-Request-Id': 'r1'}, {}, b'{"token": "abc"}', 1)
+    document = ResponseDocument(response.text, 'application/json')
+    assert extract_value(response, 'status', document) == '201'
+    assert extract_value(response, 'header: x-request-id', document) == 'r1'
+    assert extract_value(response, '$.token', document) == 'abc'
+    with pytest.raises(ValueError):
+        extract_value(response, 'header:Location', document)
+
+
+@patch('runner.send_request')
+def test_run_job_policy_and_attempts(mock_send):
+    """Test the request's policy overrides the run's and attempts are reported"""
+    def send(*args, policy=None, on_attempt=None, **kwargs):
+        on_attempt({'attempt': 1, 'status_code': 503, 'response_time': 5, 'delay': 0.1})
+        on_attempt({'attempt': 2, 'status_code': 200, 'response_time': 7})
+        assert (policy.retries, policy.read_timeout) == (3, 5)
+        return HttpResponse(200, {}, {}, b"", 7)
+
+    mock_send.side_effect = send
+    request = RequestModel(url="https://example.com", policy={'retries': 3})
+    result = run_job(RunJob("Flaky", request), {}, RetryPolicy(read_timeout=5, retries=1))
+    assert result.passed
+    assert [attempt['attempt'] for attempt in result.to_dict()['attempts']] == [1, 2]
+    assert "after 2 attempts" in text_report([result])
+
+    bad = run_job(RunJob("Bad", RequestModel(url="https://example.com", policy={'retry': 1})), {})
+    assert bad.error.startswith("Invalid policy")
+
+
+@patch('runner.send_request')
+def test_run_job_extraction_failure(mock_send):
+    """Test a missing extracted value fails the request"""
+    mock_send.return_value = HttpResponse(200, {}, {}, b'{}', 1)
+    request = RequestModel(url="https://example.com", extract={'token': '$.token'})
+    result = run_job(RunJob("Login", request), {})
+    assert not result.passed
+    assert "token" in result.error
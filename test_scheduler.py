@@ -0,0 +1,91 @@
+import threading
+import time
+import pytest
+
+from constants import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from scheduler import RequestScheduler, request_host
+
+
+class Gate:
+    """Calls that block until released, recording their start order"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+        self.lock = threading.Lock()
+
+    def call(self, name):
+        def run():
+            with self.lock:
+                self.started.append(name)
+            assert self.release.wait(5)
+            return name
+        return run
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_request_host():
+    """Test hosts include the port and ignore case"""
+    assert request_host("https://API.example.com:8443/users?x=1") == "api.example.com:8443"
+
+
+def test_per_host_limit():
+    """Test a saturated host is passed over in favour of other hosts"""
+    scheduler = RequestScheduler(max_concurrent=4, max_per_host=1, reserved_interactive=0)
+    gate = Gate()
+    futures = [scheduler.submit(gate.call("a1"), "https://a.test/1"),
+               scheduler.submit(gate.call("a2"), "https://a.test/2"),
+               scheduler.submit(gate.call("b1"), "https://b.test/1")]
+    wait_for(lambda: len(gate.started) == 2)
+    assert sorted(gate.started) == ["a1", "b1"]
+    metrics = scheduler.metrics()
+    assert (metrics['running'], metrics['queued']) == (2, 1)
+    assert metrics['running_by_host'] == {'a.test': 1, 'b.test': 1}
+
+    gate.release.set()
+    assert [future.result(5) for future in futures] == ["a1", "a2", "b1"]
+    wait_for(lambda: scheduler.metrics()['completed'] == 3)
+
+
+def test_interactive_first_and_reserved_slot():
+    """Test interactive requests skip the queue and get the reserved slot"""
+    scheduler = RequestScheduler(max_concurrent=2, max_per_host=10, reserved_interactive=1)
+    gate = Gate()
+    batch = [scheduler.submit(gate.call(f"batch{i}"), "https://a.test", PRIORITY_BATCH) for i in range(3)]
+    wait_for(lambda: len(gate.started) == 1)
+    time.sleep(0.05)
+    assert gate.started == ["batch0"]  # The second slot is reserved
+
+    interactive = scheduler.submit(gate.call("interactive"), "https://a.test", PRIORITY_INTERACTIVE)
+    wait_for(lambda: len(gate.started) == 2)
+    assert gate.started[1] == "interactive"
+    assert scheduler.metrics()['queued_by_priority'] == {PRIORITY_BATCH: 2}
+
+    gate.release.set()
+    assert interactive.result(5) == "interactive"
+    assert [future.result(5) for future in batch] == ["batch0", "batch1", "batch2"]
+
+
+def test_cancel_queued_and_errors():
+    """Test cancelled requests never run and exceptions reach the future"""
+    scheduler = RequestScheduler(max_concurrent=1, max_per_host=1, reserved_interactive=0)
+    gate = Gate()
+    first = scheduler.submit(gate.call("first"), "https://a.test")
+    cancelled = scheduler.submit(gate.call("cancelled"), "https://a.test")
+    assert cancelled.cancel()
+
+    def fail():
+        raise ValueError("boom")
+
+    failing = scheduler.submit(fail, "https://a.test")
+    gate.release.set()
+    assert first.result(5) == "first"
+    with pytest.raises(ValueError):
+        failing.result(5)
+    assert gate.started == ["first"]
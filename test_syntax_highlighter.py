@@ -120,4 +120,87 @@ def test_highlight_block_exception(mock_json_lexer, highlighter):
     highlighter.highlightBlock('invalid json')
 
     # Should still call setFormat if tokens were processed before exception
-    # But in this case, exception happens immediately
\ No newline at end of file
+    # But in this case, exception happens immediately
+
+@pytest.fixture
+def buffer_highlighter():
+    hl = SyntaxHighlighter(None)
+    yield hl
+
+
+def _span_positions(spans):
+    return [(start, length) for start, length, _ in spans]
+
+
+def test_set_lexer_large_document_uses_tokenizer(buffer_highlighter):
+    """Test documents above the Pygments limit use the line tokenizer"""
+    from line_buffer import LineBuffer
+    from tokenizers import tokenize_json_line
+
+    buffer_highlighter.pygments_max_size = 0
+    buffer_highlighter.set_lexer('application/json', LineBuffer.from_text('{"a": 1}'))
+
+    assert buffer_highlighter.lexer is None
+    assert buffer_highlighter.tokenizer is tokenize_json_line
+
+
+def test_set_lexer_above_max_size_disables(buffer_highlighter):
+    """Test highlighting switches off above the size limit"""
+    from line_buffer import LineBuffer
+
+    buffer_highlighter.max_size = 4
+    buffer = LineBuffer.from_text('{"a": 1}')
+    buffer_highlighter.set_lexer('application/json', buffer)
+
+    assert buffer_highlighter.lexer is None
+    assert buffer_highlighter.tokenizer is None
+    assert buffer_highlighter.line_spans(0, buffer.line(0)) == []
+
+
+def test_pygments_and_tokenizer_agree(buffer_highlighter):
+    """Test both strategies produce the same JSON spans"""
+    from line_buffer import LineBuffer
+
+    buffer = LineBuffer.from_text('{\n  "a": [1, true],\n  "b": "x"\n}')
+    buffer_highlighter.set_lexer('application/json', buffer)
+    lexed = [_span_positions(buffer_highlighter.line_spans(i, buffer.line(i))) for i in range(buffer.line_count)]
+
+    buffer_highlighter.pygments_max_size = 0
+    buffer_highlighter.set_lexer('application/json', buffer)
+    tokenized = [_span_positions(buffer_highlighter.line_spans(i, buffer.line(i))) for i in range(buffer.line_count)]
+
+    assert lexed == tokenized
+    assert lexed[1] == [(2, 3), (8, 1), (11, 4)]
+
+
+def test_random_access_carries_state(buffer_highlighter, monkeypatch):
+    """Test jumping into a document uses the state left by earlier lines"""
+    import syntax_highlighter
+    from line_buffer import LineBuffer
+
+    monkeypatch.setattr(syntax_highlighter, 'CHECKPOINT_INTERVAL', 4)
+    lines = ['<root>'] + ['<a/>'] * 9 + ['<!-- comment', 'still comment', '-->', '<b/>']
+    buffer = LineBuffer.from_text('\n'.join(lines))
+    buffer_highlighter.pygments_max_size = 0
+    buffer_highlighter.set_lexer('application/xml', buffer)
+
+    spans = buffer_highlighter.line_spans(11, buffer.line(11))
+    assert _span_positions(spans) == [(0, len('still comment'))]
+    assert spans[0][2] is buffer_highlighter.kind_formats['comment']
+
+
+def test_lexer_failure_is_logged(buffer_highlighter, caplog):
+    """Test a failing lexer keeps the spans lexed so far and logs why it stopped"""
+    from pygments.token import Token
+
+    def tokens(text):
+        yield Token.Keyword, 'true'
+        yield Token.Text, '\n'
+        raise RuntimeError("lexer bug")
+
+    buffer_highlighter.lexer = Mock(get_tokens=tokens)
+    spans = buffer_highlighter._lex_spans('true\nfalse')
+
+    assert [_span_positions(line) for line in spans] == [[(0, 4)], []]
+    assert "Syntax highlighting stopped at line 2: lexer bug" in caplog.text
+
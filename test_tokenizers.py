@@ -0,0 +1,73 @@
+from tokenizers import (
+    tokenize_json_line, tokenize_xml_line, tokenizer_for_content_type,
+    KIND_KEYWORD, KIND_STRING, KIND_NUMBER, KIND_COMMENT, KIND_NAME,
+    XML_TEXT, XML_COMMENT, XML_CDATA, XML_ATTR_DOUBLE
+)
+
+
+def _tokens(text, spans):
+    return [(text[start:start + length], kind) for start, length, kind in spans]
+
+
+def test_json_line():
+    """Test JSON keys, strings, numbers and keywords"""
+    text = '  "key": "va\\"lue", "n": -1.5e3, "ok": true, "x": null'
+    spans, state = tokenize_json_line(text)
+
+    assert state == 0
+    assert _tokens(text, spans) == [
+        ('"key"', KIND_NAME), ('"va\\"lue"', KIND_STRING),
+        ('"n"', KIND_NAME), ('-1.5e3', KIND_NUMBER),
+        ('"ok"', KIND_NAME), ('true', KIND_KEYWORD),
+        ('"x"', KIND_NAME), ('null', KIND_KEYWORD),
+    ]
+
+
+def test_json_keywords_inside_strings():
+    """Test keywords inside strings are not highlighted separately"""
+    text = '"true null 42"'
+    spans, _ = tokenize_json_line(text)
+    assert _tokens(text, spans) == [('"true null 42"', KIND_STRING)]
+
+
+def test_xml_tags_and_attributes():
+    """Test XML tag names, attributes and values"""
+    text = '<item id="1" name=\'a\'>text</item>'
+    spans, state = tokenize_xml_line(text)
+
+    assert state == XML_TEXT
+    assert _tokens(text, spans) == [
+        ('<item', KIND_KEYWORD), ('id', KIND_NAME), ('"1"', KIND_STRING),
+        ('name', KIND_NAME), ("'a'", KIND_STRING), ('</item', KIND_KEYWORD),
+    ]
+
+
+def test_xml_comment_spans_lines():
+    """Test comment state carries over to the next line"""
+    spans, state = tokenize_xml_line('<a> <!-- start')
+    assert state == XML_COMMENT
+    assert spans[-1][2] == KIND_COMMENT
+
+    text = 'still comment --> <b/>'
+    spans, state = tokenize_xml_line(text, state)
+    assert state == XML_TEXT
+    assert _tokens(text, spans) == [('still comment -->', KIND_COMMENT), ('<b', KIND_KEYWORD)]
+
+
+def test_xml_cdata_and_attribute_continuation():
+    """Test CDATA and multi-line attribute values"""
+    _, state = tokenize_xml_line('<![CDATA[ <not a tag>')
+    assert state == XML_CDATA
+    _, state = tokenize_xml_line(']]><a href="x')
+    assert state == XML_ATTR_DOUBLE
+    text = 'y">'
+    spans, state = tokenize_xml_line(text, state)
+    assert state == XML_TEXT
+    assert _tokens(text, spans) == [('y"', KIND_STRING)]
+
+
+def test_tokenizer_for_content_type():
+    """Test tokenizer selection"""
+    assert tokenizer_for_content_type('application/json; charset=utf-8') is tokenize_json_line
+    assert tokenizer_for_content_type('text/xml') is tokenize_xml_line
+    assert tokenizer_for_content_type('text/plain') is None
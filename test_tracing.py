@@ -0,0 +1,71 @@
+import json
+import threading
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+from http_client import send_request
+from tracing import Tracer
+
+
+@pytest.fixture
+def trace():
+    trace = Tracer()
+    trace.enable()
+    with patch('http_client.tracer', return_value=trace):
+        yield trace
+
+
+def test_disabled_tracer_records_nothing():
+    """Test spans are no-ops until tracing is enabled"""
+    trace = Tracer()
+    with trace.span('build') as args:
+        assert args is None
+    trace.add_span('network', 0.0, 1.0)
+    assert trace.events() == []
+
+
+def test_span_records_complete_event(trace):
+    """Test a span becomes a complete event with its args and thread"""
+    with trace.span('substitute', 'prepare', request='Ping') as args:
+        args['variables'] = 3
+    event, = trace.events()
+    assert (event['name'], event['cat'], event['ph']) == ('substitute', 'prepare', 'X')
+    assert event['args'] == {'request': 'Ping', 'variables': 3}
+    assert event['dur'] >= 0
+    assert event['tid'] == threading.get_ident()
+
+
+def test_events_bounded_and_cleared():
+    """Test only the latest events are kept and clear drops them"""
+    trace = Tracer(max_events=2)
+    trace.enable()
+    for index in range(3):
+        trace.add_span(f"span {index}", 0.0, 0.1)
+    assert [event['name'] for event in trace.events()] == ['span 1', 'span 2']
+    trace.clear()
+    assert trace.events() == []
+
+
+def test_export_chrome_trace(trace, tmp_path):
+    """Test the export names threads and holds the spans"""
+    with trace.span('display'):
+        pass
+    path = tmp_path / 'trace.json'
+    assert trace.export(str(path)) == 1
+    document = json.loads(path.read_text(encoding='utf-8'))
+    phases = [event['ph'] for event in document['traceEvents']]
+    assert phases == ['M', 'X']
+    assert document['traceEvents'][0]['args']['name'] == threading.current_thread().name
+
+
+def test_send_request_traces_network_and_decode(trace):
+    """Test a send records the network phases of each attempt and decoding"""
+    session = Mock()
+    session.request.return_value = Mock(status_code=200, headers={}, cookies={}, content=b'ok',
+                                        elapsed=timedelta(milliseconds=1))
+    send_request('GET', 'https://example.com', {}, session=session)
+    names = [event['name'] for event in trace.events()]
+    assert names == ['network', 'network.headers', 'network.body', 'decode']
+    assert trace.events()[0]['args']['status_code'] == 200
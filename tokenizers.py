@@ -0,0 +1,140 @@
+"""Fast line tokenizers for JSON and XML response bodies.
+
+Each tokenizer takes one line of text and the state left by the previous
+line, and returns (start, length, kind) spans plus the state to carry into
+the next line. They are used instead of Pygments for large documents.
+"""
+
+import re
+from typing import List, Tuple
+
+# Token kinds, mapped to text formats by the highlighter
+KIND_KEYWORD = 'keyword'
+KIND_STRING = 'string'
+KIND_NUMBER = 'number'
+KIND_COMMENT = 'comment'
+KIND_NAME = 'name'
+
+Span = Tuple[int, int, str]
+
+_JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"?|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_JSON_KEY_SUFFIX = re.compile(r'\s*:')
+
+
+def tokenize_json_line(text: str, state: int = 0) -> Tuple[List[Span], int]:
+    """Tokenize one line of JSON; JSON strings cannot span lines so state is always 0"""
+    spans = []
+    for match in _JSON_TOKEN.finditer(text):
+        value = match.group()
+        first = value[0]
+        if first == '"':
+            kind = KIND_NAME if _JSON_KEY_SUFFIX.match(text, match.end()) else KIND_STRING
+        elif first == '-' or first.isdigit():
+            kind = KIND_NUMBER
+        else:
+            kind = KIND_KEYWORD
+        spans.append((match.start(), len(value), kind))
+    return spans, 0
+
+
+# XML states carried between lines
+XML_TEXT = 0
+XML_TAG = 1
+XML_COMMENT = 2
+XML_CDATA = 3
+XML_ATTR_DOUBLE = 4
+XML_ATTR_SINGLE = 5
+XML_DECLARATION = 6
+
+_XML_TAG_NAME = re.compile(r'</?[^\s/>]+')
+_XML_ATTR_NAME = re.compile(r'[^\s=/>"\']+')
+_XML_SPACE = re.compile(r'[\s=]+')
+
+# Closing delimiter and token kind for states that run until a terminator
+_XML_BLOCK_STATES = {
+    XML_COMMENT: ('-->', KIND_COMMENT, XML_TEXT),
+    XML_CDATA: (']]>', KIND_STRING, XML_TEXT),
+    XML_DECLARATION: ('>', KIND_KEYWORD, XML_TEXT),
+    XML_ATTR_DOUBLE: ('"', KIND_STRING, XML_TAG),
+    XML_ATTR_SINGLE: ("'", KIND_STRING, XML_TAG),
+}
+
+
+def tokenize_xml_line(text: str, state: int = XML_TEXT) -> Tuple[List[Span], int]:
+    """Tokenize one line of XML, carrying comment/CDATA/tag state across lines"""
+    spans = []
+    position = 0
+    length = len(text)
+
+    while position < length:
+        if state in _XML_BLOCK_STATES:
+            terminator, kind, next_state = _XML_BLOCK_STATES[state]
+            end = text.find(terminator, position)
+            if end == -1:
+                spans.append((position, length - position, kind))
+                return spans, state
+            end += len(terminator)
+            spans.append((position, end - position, kind))
+            position = end
+            state = next_state
+
+        elif state == XML_TAG:
+            space = _XML_SPACE.match(text, position)
+            if space:
+                position = space.end()
+                continue
+            char = text[position]
+            if char == '>':
+                position += 1
+                state = XML_TEXT
+            elif text.startswith('/>', position):
+                position += 2
+                state = XML_TEXT
+            elif char == '"' or char == "'":
+                end = text.find(char, position + 1)
+                if end == -1:
+                    spans.append((position, length - position, KIND_STRING))
+                    return spans, XML_ATTR_DOUBLE if char == '"' else XML_ATTR_SINGLE
+                spans.append((position, end + 1 - position, KIND_STRING))
+                position = end + 1
+            else:
+                name = _XML_ATTR_NAME.match(text, position)
+                if name:
+                    spans.append((position, name.end() - position, KIND_NAME))
+                    position = name.end()
+                else:
+                    position += 1
+
+        else:
+            start = text.find('<', position)
+            if start == -1:
+                break
+            if text.startswith('<!--', start):
+                position = start
+                state = XML_COMMENT
+            elif text.startswith('<![CDATA[', start):
+                position = start
+                state = XML_CDATA
+            elif text.startswith('<?', start) or text.startswith('<!', start):
+                position = start
+                state = XML_DECLARATION
+            else:
+                tag = _XML_TAG_NAME.match(text, start)
+                if tag:
+                    spans.append((start, tag.end() - start, KIND_KEYWORD))
+                    position = tag.end()
+                    state = XML_TAG
+                else:
+                    position = start + 1
+
+    return spans, state
+
+
+def tokenizer_for_content_type(content_type: str):
+    """Return the line tokenizer for a content type, or None"""
+    content_type = (content_type or "").lower()
+    if 'json' in content_type:
+        return tokenize_json_line
+    if 'xml' in content_type:
+        return tokenize_xml_line
+    return None
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+from constants import TRACE_MAX_EVENTS
+
+# Returned by span() while tracing is off, so disabled spans cost one check
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Records timed spans of the stages of a send while enabled.
+
+    Spans are kept as Chrome trace-event "complete" events, with times in
+    microseconds since the tracer was created and the recording thread as
+    tid, so a send can be followed from the GUI thread through the
+    scheduler and back. Only the latest max_events are kept.
+    """
+
+    def __init__(self, max_events: int = TRACE_MAX_EVENTS):
+        self.enabled = False
+        self._events = deque(maxlen=max_events)
+        self._threads: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def add_span(self, name: str, start: float, end: float, category: str = 'pypost',
+                 args: Optional[Dict] = None):
+        """Record a span between two time.perf_counter() readings"""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - self._origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            self._threads[thread.ident] = thread.name
+
+    @contextmanager
+    def _span(self, name: str, category: str, args: Dict):
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, time.perf_counter(), category, args)
+
+    def span(self, name: str, category: str = 'pypost', **args):
+        """Context manager recording the time spent in its block.
+
+        It yields the span's args, which the block may add to, or None while
+        tracing is off.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, category, args)
+
+    def events(self) -> List[Dict]:
+        with self._lock:
+            return list(self._events)
+
+    def chrome_trace(self) -> Dict:
+        """The recorded spans as a Chrome trace-event document"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for tid, name in threads.items()]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str) -> int:
+        """Write the trace for chrome://tracing or Perfetto; returns the number of spans"""
+        document = self.chrome_trace()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+        return sum(1 for event in document['traceEvents'] if event['ph'] == 'X')
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def tracer() -> Tracer:
+    """Tracer shared by the GUI, the network layer and the runner"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+    return _tracer